@@ -22,94 +22,95 @@ Backends are a way to permanently store a project on a medium
 and to read projects from this medium
 """
 
-import sys
 import uuid
-import os.path
 import logging
+import importlib
 
 from GTG.core.borg import Borg
 from GTG.core.config import CoreConfig
+from GTG.core.importtime import timed_import
 from GTG.backends.generic_backend import GenericBackend
 
 log = logging.getLogger(__name__)
 
 
+# Backend name (as in its _general_description) -> module implementing it.
+# Modules are only imported once a backend of that type is needed, so that
+# heavy dependencies (caldav, vobject, ...) don't slow down every startup.
+BACKEND_MANIFEST = {
+    'backend_localfile': 'GTG.backends.backend_localfile',
+    'backend_caldav': 'GTG.backends.backend_caldav',
+}
+
+
 class BackendFactory(Borg):
     """
     This class holds the information about the backend types.
     Since it's about types, all information is static. The instantiated
     backends are handled in the Datastore.
-    It is a Borg for what matters its only state (_backend_modules),
+    It is a Borg for what matters its only state (backend_modules),
     since it makes no sense of keeping multiple instances of this.
     """
 
-    BACKEND_PREFIX = "backend_"
-
     def __init__(self):
-        """ Creates a dictionary of the modules containing a GenericBackend
-        subclass (which are all available backends)
+        """ Prepares the (lazily filled) dictionary of the modules containing
+        a GenericBackend subclass
         """
         super().__init__()
         if hasattr(self, "backend_modules"):
             # This object has already been constructed
             return
+        # Backend name -> module, or None if it failed to load
         self.backend_modules = {}
-        backend_files = self._find_backend_files()
-        # Create module names
-        module_names = [f.replace(".py", "") for f in backend_files]
-        log.debug("Backends found: %r", module_names)
-        # Load backend modules
-        for module_name in module_names:
-            extended_module_name = "GTG.backends." + module_name
-            try:
-                __import__(extended_module_name)
-            except ImportError as exception:
-                # Something is wrong with this backend, skipping
-                log.warning("Backend %s could not be loaded: %r",
-                            module_name, exception)
-                continue
-            except Exception:
-                # Other exception log as errors
-                log.exception("Malformated backend %s:", module_name)
-                continue
+        log.debug("Backends available: %r", list(BACKEND_MANIFEST))
+
+    def _load_backend(self, backend_name):
+        """Import the module of a backend listed in the manifest."""
+        module_name = BACKEND_MANIFEST[backend_name]
+        try:
+            with timed_import(module_name):
+                module = importlib.import_module(module_name)
+        except ImportError as exception:
+            # Something is wrong with this backend, skipping
+            log.warning("Backend %s could not be loaded: %r",
+                        backend_name, exception)
+            return None
+        except Exception:
+            # Other exception log as errors
+            log.exception("Malformated backend %s:", backend_name)
+            return None
 
-        def browse_subclasses(cls):
-            """Will yield all subclasses with a valid `_general_description`"""
-            for subcls in cls.__subclasses__():
-                gen_desc = getattr(subcls, '_general_description', {})
-                if gen_desc and gen_desc.get('name'):
-                    yield gen_desc['name'], subcls.__module__
-                yield from browse_subclasses(subcls)
-
-        # Adding all available backend to backend_modules dict
-        for module_name, module in browse_subclasses(GenericBackend):
-            self.backend_modules[module_name] = sys.modules[module]
-
-    def _find_backend_files(self):
-        # Look for backends in the GTG/backends dir
-        this_dir = os.path.dirname(__file__)
-        for filename in os.listdir(this_dir):
-            is_python = filename.endswith(".py")
-            has_prefix = filename.startswith(self.BACKEND_PREFIX)
-            if is_python and has_prefix:
-                yield filename
+        if module.Backend.get_name() != backend_name:
+            log.error("Backend module %s does not provide %s",
+                      module_name, backend_name)
+            return None
+        return module
 
     def get_backend(self, backend_name):
         """
         Returns the backend module for the backend matching
         backend_name. Else, returns none
         """
-        if backend_name in self.backend_modules:
-            return self.backend_modules[backend_name]
-        else:
+        if backend_name not in BACKEND_MANIFEST:
             log.debug("Trying to load backend %s, but failed!", backend_name)
             return None
+        if backend_name not in self.backend_modules:
+            self.backend_modules[backend_name] = \
+                self._load_backend(backend_name)
+        return self.backend_modules[backend_name]
 
     def get_all_backends(self):
         """
-        Returns a dictionary containing all the backends types
+        Returns a dictionary containing all the backends types.
+
+        Note that this imports every backend module.
         """
-        return self.backend_modules
+        modules = {}
+        for backend_name in BACKEND_MANIFEST:
+            module = self.get_backend(backend_name)
+            if module:
+                modules[backend_name] = module
+        return modules
 
     def get_new_backend_dict(self, backend_name, additional_parameters={}):
         """
@@ -117,10 +118,10 @@ class BackendFactory(Borg):
         exact terms, creates a dictionary, containing all the necessary
         entries to initialize a backend.
         """
-        if backend_name not in self.backend_modules:
+        module = self.get_backend(backend_name)
+        if module is None:
             return None
         dic = {'first_run': True}
-        module = self.get_backend(backend_name)
         # Different pids are necessary to discern between backends of the same
         # type
         parameters = module.Backend.get_static_parameters()
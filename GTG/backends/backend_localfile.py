@@ -97,6 +97,9 @@ class Backend(GenericBackend):
         if self.KEY_DEFAULT_BACKEND not in parameters:
             parameters[self.KEY_DEFAULT_BACKEND] = True
 
+        # Tasks were set or removed, and the file needs to be written
+        self._dirty = False
+
     def get_path(self) -> str:
         """Return the current path to XML
 
@@ -164,8 +167,8 @@ class Backend(GenericBackend):
         old_path = self.find_old_path(DATA_DIR)
         if old_path is not None:
             log.warning('Found old file: %r. Running versioning code.', old_path)
-            tree = versioning.convert(old_path, self.datastore)
-            xml.save_file(filepath, tree)
+            versioning.convert_file(old_path, filepath,
+                                    progress=self._versioning_progress)
             os.rename(old_path, old_path + '.imported')
         else:
             root = firstrun_tasks.generate()
@@ -173,6 +176,11 @@ class Backend(GenericBackend):
             xml.save_file(self.get_path(), root)
 
 
+    @staticmethod
+    def _versioning_progress(done: int, total: int) -> None:
+        log.info('Converted %d of %d tasks from the old file', done, total)
+
+
     def find_old_path(self, datadir: str) -> str:
         """Reliably find the old data files."""
         # used by which version?
@@ -235,8 +243,8 @@ class Backend(GenericBackend):
         else:
             self.task_tree.append(element)
 
-        # Write the xml
-        xml.save_file(self.get_path(), self.data_tree)
+        # The xml is written once the queued tasks are all set
+        self._dirty = True
 
     def remove_task(self, tid: str) -> None:
         """ This function is called from GTG core whenever a task must be
@@ -249,6 +257,13 @@ class Backend(GenericBackend):
 
         if element:
             element[0].getparent().remove(element[0])
+            self._dirty = True
+
+    def batch_done(self) -> None:
+        """ Write the xml once for all the tasks set or removed. """
+
+        if self._dirty:
+            self._dirty = False
             xml.save_file(self.get_path(), self.data_tree)
 
     def save_tags(self, tagnames, tagstore) -> None:
@@ -161,6 +161,14 @@ class GenericBackend():
         """
         pass
 
+    def batch_done(self):
+        """
+        Called by the setting thread once it has set and removed all the
+        tasks in its queues. Backends which write all their tasks at once
+        can do it here, once for many changed tasks.
+        """
+        pass
+
 ###############################################################################
 # You don't need to reimplement the functions below this line #################
 ###############################################################################
@@ -665,6 +673,7 @@ class GenericBackend():
             except IndexError:
                 break
             self.remove_task(tid)
+        self.batch_done()
         # we release the weak lock
         self.to_set_timer = None
 
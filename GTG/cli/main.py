@@ -0,0 +1,355 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""List, count, export and change tasks from the command line.
+
+Tasks are picked with the search syntax of GTG.core.search. Listing,
+counting and exporting only read the data file (see GTG.cli.reader).
+Changes are made on the tasks of the file (see GTG.cli.writer), in one
+bulk change saved once.
+"""
+
+import argparse
+import logging
+import os
+import sys
+from datetime import timedelta
+from typing import List, Optional
+
+from GTG.cli.reader import TaskRecord, read_tasks
+from GTG.core.dates import Date
+from GTG.core.export_formats import WRITERS
+from GTG.core.search import InvalidQuery, parse_search_query, search_filter
+
+log = logging.getLogger(__name__)
+
+#: Statuses of the tasks picked by --status. GTG.core.task writes Dismiss,
+#: Datastore2 writes Dismissed.
+STATUSES = {
+    'active': ('Active',),
+    'done': ('Done',),
+    'dismissed': ('Dismiss', 'Dismissed'),
+    'closed': ('Done', 'Dismiss', 'Dismissed'),
+    'all': None,
+}
+
+
+class CommandError(Exception):
+    """The command can't be run, with a message for the user."""
+
+
+def default_data_file() -> str:
+    # Imported here, since it's only needed without --file
+    from GTG.core.dirs import DATA_DIR
+
+    return os.path.join(DATA_DIR, 'gtg_data.xml')
+
+
+# ------------------------------------------------------------------------------
+# SELECTING TASKS
+# ------------------------------------------------------------------------------
+
+def select(args) -> List[TaskRecord]:
+    """Get the tasks matching the query and status of the arguments."""
+
+    if not os.path.exists(args.file):
+        raise CommandError(f'No data file at {args.file}')
+
+    parameters = None
+
+    if args.query:
+        try:
+            parameters = parse_search_query(args.query)
+        except InvalidQuery as error:
+            raise CommandError(f'Invalid query: {error}')
+
+    statuses = STATUSES[args.status]
+
+    return [task for task in read_tasks(args.file)
+            if (statuses is None or task.status in statuses)
+            and (parameters is None or search_filter(task, parameters))]
+
+
+def task_record(task: TaskRecord) -> dict:
+    """Fields of a task for exported documents, see FIELDS of
+    GTG.core.export_formats."""
+
+    return {
+        'id': task.id,
+        'parent': task.parent,
+        'title': task.title,
+        'status': task.status,
+        'tags': task.tags,
+        'added_date': task.added,
+        'modified': task.modified,
+        'start_date': task.start,
+        'due_date': task.due,
+        'closed_date': task.closed,
+        'text': task.content,
+    }
+
+
+# ------------------------------------------------------------------------------
+# READING COMMANDS
+# ------------------------------------------------------------------------------
+
+def list_tasks(args) -> None:
+    """One task per line: id, status, due date, title and tags."""
+
+    for task in select(args):
+        title = ' '.join(task.title.split())
+        print(task.id, task.status, task.due or '-', title,
+              ','.join(task.tags), sep='\t')
+
+
+def count_tasks(args) -> None:
+    print(len(select(args)))
+
+
+def export_tasks(args) -> None:
+    records = (task_record(task) for task in select(args))
+    write = WRITERS[args.format]
+
+    if args.output in (None, '-'):
+        write(sys.stdout, records)
+    else:
+        with open(args.output, 'w', encoding='utf-8', newline='') as stream:
+            write(stream, records)
+
+
+# ------------------------------------------------------------------------------
+# CHANGING COMMANDS
+# ------------------------------------------------------------------------------
+
+def change_tasks(args, change) -> None:
+    """Call change(data, task) on the selected tasks, and save once.
+
+    change returns whether it changed the task.
+    """
+
+    selected = select(args)
+
+    if args.dry_run:
+        for task in selected:
+            print(task.id, task.title, sep='\t')
+
+        return
+
+    if not selected:
+        print('No task matches', file=sys.stderr)
+        return
+
+    # Only needed to write, and slower to import
+    from GTG.cli.writer import DataFile
+
+    data = DataFile(args.file)
+    changed = 0
+
+    with data.tasks.bulk():
+        for record in selected:
+            task = data.tasks.get(record.id)
+
+            if change(data, task):
+                task.update_modified()
+                changed += 1
+
+    if changed:
+        data.save()
+
+    print(f'Changed {changed} of {len(selected)} tasks', file=sys.stderr)
+
+
+def tag_tasks(args) -> None:
+    if not args.add and not args.remove:
+        raise CommandError('Nothing to do, use --add or --remove')
+
+    add = [name.lstrip('@') for name in args.add]
+    remove = [name.lstrip('@') for name in args.remove]
+
+    def change(data, task) -> bool:
+        names = {tag.name for tag in task.tags}
+
+        for name in add:
+            if name not in names:
+                task.add_tag(data.tags.new(name))
+
+        for name in remove:
+            if name in names:
+                task.remove_tag(name)
+
+        return names != {tag.name for tag in task.tags}
+
+    change_tasks(args, change)
+
+
+def close_tasks(args) -> None:
+    from GTG.core.tasks2 import Status
+
+    status = Status.DISMISSED if args.dismiss else Status.DONE
+
+    def change(data, task) -> bool:
+        # Closing a parent closes its subtasks, which might be selected too
+        if task.status is not Status.ACTIVE:
+            return False
+
+        # GTG adds the next occurrence when closing them, gtg-cli can't
+        if data.is_recurring(task.id):
+            print(f'Skipped recurring task {task.id}, close it in GTG',
+                  file=sys.stderr)
+            return False
+
+        task.close(status)
+        return True
+
+    change_tasks(args, change)
+
+
+def parse_date(value: str) -> Date:
+    try:
+        return Date.parse(value)
+    except ValueError as error:
+        raise CommandError(str(error))
+
+
+def due_tasks(args) -> None:
+    if args.clear:
+        due = Date.no_date()
+    elif args.set:
+        due = parse_date(args.set)
+    else:
+        due = None
+
+    def change(data, task) -> bool:
+        if due is not None:
+            if task.date_due == due:
+                return False
+
+            task.date_due = due
+            return True
+
+        # Fuzzy dates and tasks without a date don't move
+        if not task.date_due or task.date_due.is_fuzzy():
+            return False
+
+        task.date_due = Date(task.date_due.date()
+                             + timedelta(days=args.shift))
+        return True
+
+    change_tasks(args, change)
+
+
+# ------------------------------------------------------------------------------
+# ARGUMENTS
+# ------------------------------------------------------------------------------
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='gtg-cli',
+        description='Work on GTG tasks without opening GTG.',
+        epilog='Changes are written to the data file. Quit GTG before '
+               'making changes, or it will save its own tasks over them.')
+    parser.add_argument(
+        '--file', metavar='PATH', default=None,
+        help='Data file to use, instead of the one of GTG')
+    parser.add_argument(
+        '--debug', action='store_true', help='Show debug output')
+
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND')
+    commands.required = True
+
+    def add_command(name: str, func, help: str,
+                    changes: bool = False) -> argparse.ArgumentParser:
+        command = commands.add_parser(name, help=help, description=help)
+        command.set_defaults(func=func)
+        command.add_argument(
+            'query', nargs='?',
+            help='Search query, as in the search bar of GTG')
+        command.add_argument(
+            '--status', choices=STATUSES, default='active',
+            help='Status of the tasks (default: active)')
+
+        if changes:
+            command.add_argument(
+                '-n', '--dry-run', action='store_true',
+                help='List the tasks to change, without changing them')
+
+        return command
+
+    add_command('list', list_tasks, 'List tasks, one per line')
+    add_command('count', count_tasks, 'Count tasks')
+
+    command = add_command('export', export_tasks,
+                          'Write tasks as JSON Lines or CSV')
+    command.add_argument(
+        '--format', choices=WRITERS, default='jsonl',
+        help='Format of the document (default: jsonl)')
+    command.add_argument(
+        '-o', '--output', metavar='PATH',
+        help='Where to write the document (default: standard output)')
+
+    command = add_command('tag', tag_tasks, 'Add or remove tags',
+                          changes=True)
+    command.add_argument(
+        '--add', action='append', default=[], metavar='TAG',
+        help='Tag to add, can be repeated')
+    command.add_argument(
+        '--remove', action='append', default=[], metavar='TAG',
+        help='Tag to remove, can be repeated')
+
+    command = add_command('close', close_tasks,
+                          'Mark tasks as done, with their subtasks',
+                          changes=True)
+    command.add_argument(
+        '--dismiss', action='store_true',
+        help='Dismiss the tasks instead')
+
+    command = add_command('due', due_tasks, 'Change due dates',
+                          changes=True)
+    dates = command.add_mutually_exclusive_group(required=True)
+    dates.add_argument(
+        '--set', metavar='DATE',
+        help='New due date, in any format GTG understands')
+    dates.add_argument(
+        '--shift', metavar='DAYS', type=int,
+        help='Move due dates by a number of days, can be negative')
+    dates.add_argument(
+        '--clear', action='store_true', help='Remove due dates')
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = make_parser()
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.WARNING)
+    args.file = args.file or default_data_file()
+
+    try:
+        args.func(args)
+    except CommandError as error:
+        print(f'gtg-cli: {error}', file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # Output piped to a command that stopped reading, like head. Don't
+        # fail again when Python flushes stdout on exit.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
+
+    return 0
@@ -0,0 +1,159 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Read-only access to the tasks of a data file.
+
+Tasks are read as the file is parsed, into plain records keeping the text
+of their fields. No tree of the whole file is kept and nothing is converted
+until it's needed, which takes a fraction of the time and memory of loading
+a Datastore2 when the tasks are only listed.
+"""
+
+from typing import Dict, Iterator, List, Optional
+
+from lxml import etree as et
+
+from GTG.core.dates import Date
+
+
+class TaskRecord:
+    """A task, as written in the data file.
+
+    Dates are kept as their text. It also has the methods of
+    GTG.core.task.Task used by GTG.core.search.search_filter().
+    """
+
+    __slots__ = ['id', 'status', 'title', 'tags', 'added', 'modified',
+                 'start', 'due', 'closed', 'content', 'parent', 'children',
+                 '_due_date']
+
+
+    def __init__(self, tid: str, status: str) -> None:
+        self.id = tid
+        self.status = status
+        self.title = ''
+        self.tags: List[str] = []
+        self.added = ''
+        self.modified = ''
+        self.start = ''
+        self.due = ''
+        self.closed = ''
+        self.content = ''
+        self.parent: Optional[str] = None
+        self.children: List[str] = []
+        self._due_date = None
+
+
+    # --------------------------------------------------------------------------
+    # SEARCH
+    # --------------------------------------------------------------------------
+
+    def get_due_date(self) -> Date:
+        if self._due_date is None:
+            self._due_date = Date.parse(self.due or None)
+
+        return self._due_date
+
+
+    def get_title(self) -> str:
+        return self.title
+
+
+    def get_tags_name(self) -> List[str]:
+        return self.tags
+
+
+    def get_tags(self) -> List[str]:
+        return self.tags
+
+
+    def get_excerpt(self, strip_tags: bool = False) -> str:
+        return self.content
+
+
+def _read_task(element, tag_names: Dict[str, str]) -> TaskRecord:
+    task = TaskRecord(element.get('id'), element.get('status', 'Active'))
+
+    for child in element:
+        name = child.tag
+
+        if name == 'title':
+            task.title = child.text or ''
+        elif name == 'content':
+            task.content = (child.text or '').replace(']]&gt;', ']]>')
+        elif name == 'tags':
+            task.tags = [tag_names[t.text] for t in child
+                         if t.text in tag_names]
+        elif name == 'subtasks':
+            task.children = [sub.text for sub in child]
+        elif name == 'dates':
+            for date in child:
+                if date.tag == 'added':
+                    task.added = date.text or ''
+                elif date.tag == 'modified':
+                    task.modified = date.text or ''
+                elif date.tag == 'done':
+                    task.closed = date.text or ''
+                elif date.tag in ('due', 'fuzzyDue'):
+                    task.due = task.due or date.text or ''
+                elif date.tag in ('start', 'fuzzyStart'):
+                    task.start = task.start or date.text or ''
+
+    return task
+
+
+def iter_tasks(path: str) -> Iterator[TaskRecord]:
+    """Read the tasks of a data file, one at a time.
+
+    Tasks don't know their parent yet, see read_tasks().
+    """
+
+    tag_names: Dict[str, str] = {}
+
+    for _event, element in et.iterparse(path, tag=('tag', 'task'),
+                                        remove_blank_text=True,
+                                        strip_cdata=False):
+        if element.tag == 'task':
+            yield _read_task(element, tag_names)
+        elif element.get('name') is not None:
+            # A tag of the tag list, not one of a task
+            tag_names[element.get('id')] = element.get('name')
+        else:
+            continue
+
+        # Only keep the element being parsed in memory
+        element.clear(keep_tail=True)
+
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+
+def read_tasks(path: str) -> List[TaskRecord]:
+    """Read all the tasks of a data file, with their parent."""
+
+    tasks = list(iter_tasks(path))
+    by_id = {task.id: task for task in tasks}
+
+    for task in tasks:
+        for child_id in task.children:
+            try:
+                by_id[child_id].parent = task.id
+            except KeyError:
+                pass
+
+    return tasks
@@ -0,0 +1,140 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Changes to the tasks of a data file, written back in place.
+
+Tasks are loaded in a TaskStore, so changes follow the rules of Task2
+(closing a task closes its subtasks, subtasks keep due dates before the
+one of their parent...). When saving, only the status, tags and dates of
+the tasks that changed are written into the parsed file, like the local
+file backend does. Everything else, like the recurrence of tasks, is
+kept as it was.
+"""
+
+import logging
+from typing import Dict, Set
+
+from lxml.etree import Element, SubElement
+
+from GTG.core import xml
+from GTG.core.tags2 import TagStore
+from GTG.core.tasks2 import Status, Task2, TaskStore
+
+log = logging.getLogger(__name__)
+
+#: Status of Task2 -> status in the data file, as written by GTG.core.task
+FILE_STATUS = {
+    Status.ACTIVE: 'Active',
+    Status.DONE: 'Done',
+    Status.DISMISSED: 'Dismiss',
+}
+
+
+class DataFile:
+    """The tasks and tags of a data file, to change and save them."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.tree = xml.get_xml_tree(path)
+
+        root = self.tree.getroot()
+        self._taglist = root.find('taglist')
+        self._elements: Dict[str, Element] = {
+            element.get('id'): element
+            for element in root.find('tasklist').iter('task')
+        }
+
+        self.tags = TagStore()
+        self.tasks = TaskStore()
+
+        with self.tags.bulk():
+            self.tags.from_xml(self._taglist)
+
+        with self.tasks.bulk():
+            self.tasks.from_xml(root.find('tasklist'), self.tags)
+
+        # Ids of the tasks to write back
+        self.changed: Set[str] = set()
+
+        self.tasks.connect('task-changed',
+                           lambda _, task: self.changed.add(task.id))
+        self.tasks.connect('bulk-changed',
+                           lambda _, ids: self.changed.update(ids))
+
+
+    def is_recurring(self, tid: str) -> bool:
+        """Whether a task repeats, which TaskStore doesn't know about."""
+
+        return self._elements[tid].get('recurring') == 'True'
+
+
+    def save(self) -> None:
+        """Write the changed tasks and the new tags to the file."""
+
+        known_tags = {element.get('id') for element in self._taglist}
+
+        for tag in self.tags.lookup.values():
+            if str(tag.id) not in known_tags:
+                element = SubElement(self._taglist, 'tag')
+                element.set('id', str(tag.id))
+                element.set('name', tag.name)
+
+        for tid in self.changed:
+            try:
+                element = self._elements[tid]
+                task = self.tasks.get(tid)
+            except KeyError:
+                continue
+
+            write_task(element, task)
+
+        xml.save_file(self.path, self.tree)
+        xml.write_backups(self.path)
+
+        log.debug('Saved %d changed tasks to %s',
+                  len(self.changed), self.path)
+
+
+def write_task(element: Element, task: Task2) -> None:
+    """Write the status, tags and dates of a task into its element."""
+
+    element.set('status', FILE_STATUS[task.status])
+
+    tags = element.find('tags')
+
+    if tags is None:
+        tags = SubElement(element, 'tags')
+
+    tags.clear()
+
+    for tag in task.tags:
+        SubElement(tags, 'tag').text = str(tag.id)
+
+    # Same dates and order as GTG.core.xml.task_to_element()
+    dates = element.find('dates')
+    dates.clear()
+
+    closed = task.date_closed if task.status != Status.ACTIVE else None
+
+    for key, value in (('added', task.date_added),
+                       ('modified', task.date_modified),
+                       ('done', closed),
+                       ('due', task.date_due),
+                       ('start', task.date_start)):
+        if value:
+            SubElement(dates, key).text = str(value)
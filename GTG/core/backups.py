@@ -0,0 +1,429 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Deduplicated backups of data files.
+
+Backups live in the backup/ directory next to the data file. The file is
+cut into chunks before the lines of elements with an id (tasks, tags and
+searches), and each chunk is stored once, named after the hash of its
+content. A backup is only a manifest listing its chunks, so making one
+writes the chunks that changed since the last backups and a small
+manifest.
+
+Numbered manifests get increasing numbers instead of being renamed, and
+only the last few are kept. The first backup of each day is also kept as
+a daily manifest, until it gets too old.
+"""
+
+import datetime
+import hashlib
+import io
+import logging
+import os
+import re
+import time
+import zlib
+from collections import Counter
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+#: Chunks are never cut before this size...
+MIN_CHUNK = 4 * 1024
+
+#: ...and always before this one
+MAX_CHUNK = 64 * 1024
+
+#: Cut before about one in 8 lines with an id
+CHUNK_MASK = 0x7
+
+#: Chunks of a file are in this directory, next to its manifests
+CHUNKS_SUFFIX = '.chunks'
+
+MANIFEST_SUFFIX = '.manifest'
+MANIFEST_HEADER = 'GTG backup 1'
+
+# name.<number>.manifest or name.<date>.manifest
+MANIFEST_NAME = re.compile(r'^(.+)\.(\d+|\d{4}-\d{2}-\d{2})\.manifest$')
+
+Chunk = Tuple[str, int]
+
+
+class BackupError(Exception):
+    """A backup can't be restored."""
+
+
+def split(data: bytes) -> Iterator[bytes]:
+    """Cut data into chunks at points chosen by the content.
+
+    Lines with an id attribute are candidates, and the hash of the line
+    decides if it starts a new chunk. Editing a task only changes the
+    chunk it is in, and maybe the ones next to it.
+    """
+
+    size = len(data)
+    start = 0
+    pos = data.find(b' id="', MIN_CHUNK)
+
+    while pos != -1:
+        line_start = data.rfind(b'\n', start, pos) + 1
+        line_end = data.find(b'\n', pos)
+
+        if line_end == -1:
+            break
+
+        if (line_start - start >= MIN_CHUNK
+                and not zlib.crc32(data[pos:line_end]) & CHUNK_MASK):
+
+            while line_start - start > MAX_CHUNK:
+                yield data[start:start + MAX_CHUNK]
+                start += MAX_CHUNK
+
+            yield data[start:line_start]
+            start = line_start
+
+        pos = data.find(b' id="', line_end)
+
+    while start < size:
+        yield data[start:start + MAX_CHUNK]
+        start += MAX_CHUNK
+
+
+def is_manifest(path: str) -> bool:
+    """Check if a path is a backup manifest."""
+
+    return MANIFEST_NAME.match(os.path.basename(path)) is not None
+
+
+def chunks_dir(manifest: str) -> str:
+    """Get the directory of the chunks listed in a manifest."""
+
+    dirname, filename = os.path.split(manifest)
+    name = MANIFEST_NAME.match(filename).group(1)
+
+    return os.path.join(dirname, name + CHUNKS_SUFFIX)
+
+
+def read_manifest(manifest: str) -> List[Chunk]:
+    """Get the chunks (hash and size) listed in a manifest."""
+
+    with open(manifest, encoding='utf-8') as stream:
+        lines = stream.read().splitlines()
+
+    if not lines or lines[0] != MANIFEST_HEADER:
+        raise BackupError(f'{manifest} is not a backup manifest')
+
+    try:
+        return [(digest, int(size))
+                for digest, size in (line.split() for line in lines[1:])]
+    except ValueError:
+        raise BackupError(f'Manifest {manifest} is damaged')
+
+
+def read_backup(manifest: str) -> bytes:
+    """Put the content of a backup back together."""
+
+    directory = chunks_dir(manifest)
+    content = bytearray()
+
+    for digest, size in read_manifest(manifest):
+        with open(os.path.join(directory, digest[:2], digest), 'rb') as stream:
+            chunk = stream.read()
+
+        if len(chunk) != size or hashlib.sha256(chunk).hexdigest() != digest:
+            raise BackupError(f'Chunk {digest} of {manifest} is damaged')
+
+        content += chunk
+
+    return bytes(content)
+
+
+def open_backup(path: str) -> BinaryIO:
+    """Open a file for reading, putting it together if it's a manifest."""
+
+    if is_manifest(path):
+        return io.BytesIO(read_backup(path))
+
+    return open(path, 'rb')
+
+
+def restore(manifest: str, path: str) -> None:
+    """Write the content of a backup to a file."""
+
+    content = read_backup(manifest)
+    temp_path = path + '__restore'
+
+    with open(temp_path, 'wb') as stream:
+        stream.write(content)
+
+    os.replace(temp_path, path)
+
+
+class BackupStore:
+    """Backups of a data file."""
+
+    #: Numbered backups to keep
+    KEEP = 7
+
+
+    def __init__(self, path: str, keep: int = KEEP) -> None:
+        dirname, self.name = os.path.split(path)
+
+        self.path = path
+        self.keep = keep
+        self.directory = os.path.join(dirname, 'backup')
+        self.chunks_dir = os.path.join(self.directory,
+                                       self.name + CHUNKS_SUFFIX)
+
+        # Chunks of each manifest, and how many manifests use each chunk.
+        # Loaded on first use.
+        self._manifests: Optional[Dict[str, List[Chunk]]] = None
+        self._refs: Counter = Counter()
+
+
+    # --------------------------------------------------------------------------
+    # MANIFESTS
+    # --------------------------------------------------------------------------
+
+    def _list(self) -> Tuple[List[Tuple[int, str]], List[str]]:
+        """Get numbered and daily manifests, newest first."""
+
+        numbered = []
+        daily = []
+
+        try:
+            filenames = os.listdir(self.directory)
+        except FileNotFoundError:
+            return numbered, daily
+
+        for filename in filenames:
+            match = MANIFEST_NAME.match(filename)
+
+            if not match or match.group(1) != self.name:
+                continue
+
+            path = os.path.join(self.directory, filename)
+
+            if match.group(2).isdigit():
+                numbered.append((int(match.group(2)), path))
+            else:
+                daily.append(path)
+
+        numbered.sort(reverse=True)
+        daily.sort(reverse=True)
+
+        return numbered, daily
+
+
+    def manifests(self) -> List[str]:
+        """Get numbered backups, then daily ones, newest first."""
+
+        numbered, daily = self._list()
+        return [path for _, path in numbered] + daily
+
+
+    def _load(self) -> Dict[str, List[Chunk]]:
+        if self._manifests is None:
+            self._manifests = {}
+            self._refs.clear()
+
+            for path in self.manifests():
+                try:
+                    self._track(path, read_manifest(path))
+                except (OSError, BackupError) as error:
+                    log.warning('Ignoring backup %r: %r', path, error)
+
+        return self._manifests
+
+
+    def _track(self, path: str, chunks: List[Chunk]) -> None:
+        self._manifests[path] = chunks
+        self._refs.update({digest for digest, _ in chunks})
+
+
+    def _write_manifest(self, path: str, chunks: List[Chunk]) -> None:
+        lines = [MANIFEST_HEADER]
+        lines += [f'{digest} {size}' for digest, size in chunks]
+
+        with open(path + '__', 'w', encoding='utf-8') as stream:
+            stream.write('\n'.join(lines) + '\n')
+
+        os.replace(path + '__', path)
+        self._track(path, chunks)
+
+
+    def _drop(self, path: str) -> None:
+        """Remove a manifest, and the chunks nothing else uses."""
+
+        chunks = self._load().pop(path, [])
+
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+        for digest in {digest for digest, _ in chunks}:
+            self._refs[digest] -= 1
+
+            if self._refs[digest] <= 0:
+                del self._refs[digest]
+                self._remove_chunk(digest)
+
+
+    # --------------------------------------------------------------------------
+    # CHUNKS
+    # --------------------------------------------------------------------------
+
+    def _chunk_path(self, digest: str) -> str:
+        return os.path.join(self.chunks_dir, digest[:2], digest)
+
+
+    def _write_chunk(self, digest: str, chunk: bytes) -> bool:
+        path = self._chunk_path(digest)
+
+        if os.path.exists(path):
+            return False
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(path + '__', 'wb') as stream:
+            stream.write(chunk)
+
+        os.replace(path + '__', path)
+        return True
+
+
+    def _remove_chunk(self, digest: str) -> None:
+        try:
+            os.remove(self._chunk_path(digest))
+        except FileNotFoundError:
+            pass
+
+
+    # --------------------------------------------------------------------------
+    # BACKUP AND PRUNING
+    # --------------------------------------------------------------------------
+
+    def backup(self) -> Optional[str]:
+        """Back up the data file, return the new manifest (if any)."""
+
+        manifests = self._load()
+
+        with open(self.path, 'rb') as stream:
+            content = stream.read()
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        chunks = []
+        written = 0
+
+        for chunk in split(content):
+            digest = hashlib.sha256(chunk).hexdigest()
+
+            # Chunks of existing backups are already there
+            if digest not in self._refs and self._write_chunk(digest, chunk):
+                written += len(chunk)
+
+            chunks.append((digest, len(chunk)))
+
+        numbered, daily = self._list()
+        manifest = None
+
+        # Nothing changed since the last backup
+        if not numbered or manifests.get(numbered[0][1]) != chunks:
+            number = numbered[0][0] + 1 if numbered else 0
+            manifest = os.path.join(self.directory,
+                                    f'{self.name}.{number}{MANIFEST_SUFFIX}')
+
+            self._write_manifest(manifest, chunks)
+            numbered.insert(0, (number, manifest))
+
+        today = datetime.date.today().isoformat()
+        daily_manifest = os.path.join(self.directory,
+                                      f'{self.name}.{today}{MANIFEST_SUFFIX}')
+
+        if daily_manifest not in manifests:
+            self._write_manifest(daily_manifest, chunks)
+
+        for _, old in numbered[self.keep:]:
+            self._drop(old)
+
+        log.debug('Backed up %s: %d of %d bytes written',
+                  self.path, written, len(content))
+
+        return manifest
+
+
+    def prune(self, days: int) -> int:
+        """Remove daily backups older than some days, and unused chunks.
+
+        Numbered backups are only removed by backup(), so there are always
+        some left.
+        """
+
+        limit = time.time() - days * 86_400
+        _, daily = self._list()
+        removed = 0
+
+        self._load()
+
+        for path in daily:
+            try:
+                if os.stat(path).st_mtime < limit:
+                    self._drop(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+
+        if removed:
+            self._sweep()
+
+        return removed
+
+
+    def _sweep(self) -> None:
+        """Remove chunks no manifest uses, like after a crash."""
+
+        try:
+            subdirs = os.listdir(self.chunks_dir)
+        except FileNotFoundError:
+            return
+
+        for subdir in subdirs:
+            subdir = os.path.join(self.chunks_dir, subdir)
+
+            for digest in os.listdir(subdir):
+                if digest not in self._refs:
+                    os.remove(os.path.join(subdir, digest))
+
+
+# Stores are kept around so manifests are only read once
+_stores: Dict[str, BackupStore] = {}
+
+
+def store_for(path: str, keep: int = BackupStore.KEEP) -> BackupStore:
+    """Get the backup store of a data file."""
+
+    path = os.path.abspath(path)
+
+    try:
+        store = _stores[path]
+    except KeyError:
+        store = _stores[path] = BackupStore(path, keep)
+
+    return store
@@ -22,22 +22,137 @@
 from gi.repository import GObject
 
 from uuid import UUID
+from itertools import islice
+from contextlib import contextmanager
 import logging
 
-from lxml.etree import Element
-from typing import List, Any, Dict
+from lxml.etree import Element, indent
+from typing import Any, Callable, Dict, Iterator, Set
 
 
 log = logging.getLogger(__name__)
 
 
+class ItemList:
+    """An ordered collection of store items, indexed by their ids.
+
+    It behaves like the list it replaces for roots and children, but
+    appending, removing and membership tests don't depend on its size.
+    """
+
+    __slots__ = ['_items']
+
+
+    def __init__(self, items=()) -> None:
+        self._items = {item.id: item for item in items}
+
+
+    def append(self, item: Any) -> None:
+        """Add an item at the end."""
+
+        self._items[item.id] = item
+
+
+    def remove(self, item: Any) -> None:
+        """Remove an item, raise ValueError if it isn't here."""
+
+        if self._items.get(item.id) is item:
+            del self._items[item.id]
+            return
+
+        # The item id changed after it was added, see reindex()
+        for key, value in self._items.items():
+            if value is item:
+                del self._items[key]
+                return
+
+        raise ValueError(f'{item} not in list')
+
+
+    def get(self, item_id: Any, default: Any = None) -> Any:
+        """Get an item by id."""
+
+        return self._items.get(item_id, default)
+
+
+    def reindex(self) -> None:
+        """Update the index after item ids have been changed."""
+
+        self._items = {item.id: item for item in self._items.values()}
+
+
+    def sort(self, key: Callable = None, reverse: bool = False) -> None:
+        """Sort in-place."""
+
+        items = sorted(self._items.values(), key=key, reverse=reverse)
+        self._items = {item.id: item for item in items}
+
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+    def copy(self) -> list:
+        return list(self._items.values())
+
+
+    def __iter__(self) -> Iterator:
+        return iter(self._items.values())
+
+
+    def __reversed__(self) -> Iterator:
+        return reversed(self._items.values())
+
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+    def __contains__(self, item: Any) -> bool:
+        return self._items.get(getattr(item, 'id', None)) is item
+
+
+    def __getitem__(self, index):
+        """Get items by position. Walks the list, iterate when possible."""
+
+        if isinstance(index, slice):
+            return list(self._items.values())[index]
+
+        if index < 0:
+            index += len(self._items)
+
+        if not 0 <= index < len(self._items):
+            raise IndexError('list index out of range')
+
+        return next(islice(self._items.values(), index, None))
+
+
+    def __eq__(self, other) -> bool:
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return NotImplemented
+
+
+    def __repr__(self) -> str:
+        return f'ItemList({list(self._items.values())!r})'
+
+
 class BaseStore(GObject.Object):
     """Base class for data stores."""
 
 
+    #: Signals held back while in bulk mode
+    BULK_SIGNALS = {'added', 'removed', 'parent-change', 'parent-removed'}
+
+
     def __init__(self) -> None:
         self.lookup: Dict[UUID, Any] = {}
-        self.data: List[Any] = []
+        self.data = ItemList()
+
+        # Nesting level of bulk(), and ids changed meanwhile
+        self._bulk_depth = 0
+        self._bulk_ids: Set[Any] = set()
 
         super().__init__()
 
@@ -107,19 +222,80 @@ class BaseStore(GObject.Object):
         item = self.lookup[item_id]
         parent = item.parent
 
-        for child in item.children:
-            del self.lookup[child.id]
+        # Forget the whole subtree, not only the direct children
+        stack = list(item.children)
+        removed = []
+
+        while stack:
+            child = stack.pop()
+            stack.extend(child.children)
+
+            if self.lookup.pop(child.id, None) is not None:
+                removed.append(child.id)
 
         if parent:
             parent.children.remove(item)
-            del self.lookup[item_id]
         else:
             self.data.remove(item)
-            del self.lookup[item_id]
+
+        del self.lookup[item_id]
+
+        for child_id in reversed(removed):
+            self.emit('removed', str(child_id))
 
         self.emit('removed', str(item_id))
 
 
+    # --------------------------------------------------------------------------
+    # BULK CHANGES
+    # --------------------------------------------------------------------------
+
+    @GObject.Signal(name='bulk-changed', arg_types=(object,))
+    def bulk_changed_signal(self, *_):
+        """Signal to emit after a bulk change, with the affected ids."""
+
+
+    @contextmanager
+    def bulk(self):
+        """Hold back per-item signals until the end of the block.
+
+        Instead of one signal per item, a single bulk-changed signal is
+        emitted with the set of ids that were added, removed or moved.
+        Removed items are reported by their string id, like in the
+        removed signal. Blocks can be nested, the signal is emitted
+        when the outermost one ends.
+        """
+
+        self._bulk_depth += 1
+
+        try:
+            yield self
+        finally:
+            self._bulk_depth -= 1
+
+            if not self._bulk_depth and self._bulk_ids:
+                ids, self._bulk_ids = self._bulk_ids, set()
+                super().emit('bulk-changed', ids)
+
+
+    def in_bulk(self) -> bool:
+        """Whether per-item signals are being held back."""
+
+        return self._bulk_depth > 0
+
+
+    def emit(self, signal: str, *args) -> Any:
+        """Emit a signal, or record its items when in bulk mode."""
+
+        if self._bulk_depth and signal in self.BULK_SIGNALS:
+            for arg in args:
+                self._bulk_ids.add(getattr(arg, 'id', arg))
+
+            return None
+
+        return super().emit(signal, *args)
+
+
     # --------------------------------------------------------------------------
     # PARENTING
     # --------------------------------------------------------------------------
@@ -127,36 +303,34 @@ class BaseStore(GObject.Object):
     def parent(self, item_id: UUID, parent_id: UUID) -> None:
         """Add a child to an item."""
 
-        try:
-            item = self.lookup[item_id]
-        except KeyError:
-            raise
+        item = self.lookup[item_id]
+        parent = self.lookup[parent_id]
 
-        try:
+        if item.parent:
+            item.parent.children.remove(item)
+        else:
             self.data.remove(item)
-            self.lookup[parent_id].children.append(item)
-            item.parent = self.lookup[parent_id]
 
-            self.emit('parent-change', item, self.lookup[parent_id])
-        except KeyError:
-            raise
+        parent.children.append(item)
+        item.parent = parent
+
+        self.emit('parent-change', item, parent)
 
 
     def unparent(self, item_id: UUID, parent_id: UUID) -> None:
         """Remove child item from a parent."""
 
-        for child in self.lookup[parent_id].children:
-            if child.id == item_id:
-                self.data.append(child)
-                self.lookup[parent_id].children.remove(child)
-                child.parent = None
+        parent = self.lookup[parent_id]
+        child = parent.children.get(item_id)
 
-                self.emit('parent-removed',
-                          self.lookup[item_id],
-                          self.lookup[parent_id])
-                return
+        if child is None:
+            raise KeyError(item_id)
 
-        raise KeyError
+        parent.children.remove(child)
+        self.data.append(child)
+        child.parent = None
+
+        self.emit('parent-removed', child, parent)
 
 
     # --------------------------------------------------------------------------
@@ -171,6 +345,42 @@ class BaseStore(GObject.Object):
         raise NotImplemented
 
 
+    def xml_elements(self) -> Iterator[Element]:
+        """Serialize items one by one, in the order of to_xml()."""
+
+        raise NotImplementedError
+
+
+    def write_xml(self, xf, level: int = 1) -> None:
+        """Stream the store to an lxml incremental writer (et.xmlfile).
+
+        Only one item is serialized at a time. The output is the same as
+        writing to_xml() with pretty_print, at the given nesting level.
+        """
+
+        outer = '\n' + '  ' * level
+        inner = outer + '  '
+        elements = self.xml_elements()
+        first = next(elements, None)
+
+        xf.write(outer)
+
+        if first is None:
+            xf.write(Element(self.XML_ROOT))
+            return
+
+        with xf.element(self.XML_ROOT):
+            element = first
+
+            while element is not None:
+                indent(element, level=level + 1)
+                xf.write(inner)
+                xf.write(element)
+                element = next(elements, None)
+
+            xf.write(outer)
+
+
     # --------------------------------------------------------------------------
     # UTILITIES
     # --------------------------------------------------------------------------
@@ -190,6 +400,8 @@ class BaseStore(GObject.Object):
         def add_children(nodes) -> None:
             """Recursively add children to lookup."""
 
+            nodes.reindex()
+
             for n in nodes:
                 self.lookup[n.id] = n
 
@@ -213,7 +425,7 @@ class BaseStore(GObject.Object):
     def print_tree(self) -> None:
         """Print the all the items as a tree."""
 
-        def recursive_print(tree: List, indent: int) -> None:
+        def recursive_print(tree: ItemList, indent: int) -> None:
             """Inner print function. """
 
             tab =  '   ' * indent if indent > 0 else ''
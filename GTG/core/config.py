@@ -25,6 +25,9 @@ import os
 import re
 import logging
 
+from gi.repository import GLib
+
+from GTG.core import profiler
 from GTG.core.dirs import CONFIG_DIR
 
 log = logging.getLogger(__name__)
@@ -49,6 +52,7 @@ DEFAULTS = {
         'autoclean_days': 30,
         'dark_mode': False,
         'maximized': False,
+        'query_service': False,
     },
     'tag_editor': {
         "custom_colors": [],
@@ -83,7 +87,8 @@ def open_config_file(config_file):
                         "Please check it")
     config = configparser.ConfigParser(interpolation=None)
     try:
-        config.read(config_file)
+        with profiler.span('Read configuration', path=config_file):
+            config.read(config_file)
     except configparser.Error as e:
         log.warning("Problem with opening file %s: %s", config_file, e)
     return config
@@ -92,7 +97,8 @@ def open_config_file(config_file):
 class SectionConfig():
     """ Configuration only for a section (system or a task) """
 
-    def __init__(self, section_name, section, defaults, save_function):
+    def __init__(self, section_name, section, defaults, save_function,
+                 cache=None):
         """ Initiatizes section config:
 
          - section_name: name for writing error logs
@@ -100,11 +106,14 @@ class SectionConfig():
          - defaults: dictionary of default values
          - save_function: function to be called to save changes (this function
                           needs to save the whole config)
+         - cache: dictionary of already parsed values. It should be shared by
+                  all the objects handling the same section.
         """
         self._section_name = section_name
         self._section = section
         self._defaults = defaults
         self._save_function = save_function
+        self._cache = cache if cache is not None else {}
 
     def _getlist(self, option):
         """ Parses string representation of list from configuration
@@ -147,6 +156,19 @@ class SectionConfig():
         type, return default value. If there is no default value,
         None is returned
         """
+        try:
+            value = self._cache[option]
+        except KeyError:
+            value = self._cache[option] = self._get_uncached(option)
+
+        # Lists are often modified in place by callers
+        if type(value) in (list, tuple):
+            return list(value)
+        else:
+            return value
+
+    def _get_uncached(self, option):
+        """ Parse option from the configuration (see get()) """
         default_value = self._defaults.get(option)
         get_function = self._type_function(default_value)
 
@@ -173,7 +195,8 @@ class SectionConfig():
         else:
             value = str(value)
         self._section[option] = value
-        # Immediately save the configuration
+        self._cache.pop(option, None)
+        # Ask for the configuration to be saved (see CoreConfig)
         self.save()
 
     def save(self):
@@ -181,7 +204,16 @@ class SectionConfig():
 
 
 class CoreConfig():
-    """ Class holding configuration to all systems and tasks """
+    """ Class holding configuration to all systems and tasks
+
+    Changes are not written right away: saving only marks a file as dirty,
+    and all dirty files are written once no change happened for
+    SAVE_DELAY milliseconds. Call flush() to write them immediately
+    (e.g. when quitting).
+    """
+
+    #: Idle time (in ms) to wait before writing changes
+    SAVE_DELAY = 1000
 
     def __init__(self):
         self._conf_path = os.path.join(CONFIG_DIR, 'gtg.conf')
@@ -193,14 +225,52 @@ class CoreConfig():
         self._backends_conf_path = os.path.join(CONFIG_DIR, 'backends.conf')
         self._backends_conf = open_config_file(self._backends_conf_path)
 
+        # Parsed values for each section, shared by their SectionConfig
+        self._caches = {}
+
+        # Paths of the files waiting to be written, with their config
+        self._dirty = {}
+        self._save_timeout = None
+
+    def _queue_save(self, config, path):
+        """ Mark a file as dirty and (re)start the save timeout """
+        self._dirty[path] = config
+
+        if self._save_timeout:
+            GLib.source_remove(self._save_timeout)
+
+        self._save_timeout = GLib.timeout_add(self.SAVE_DELAY, self.flush)
+
+    def flush(self):
+        """ Write all pending changes to disk """
+        if self._save_timeout:
+            GLib.source_remove(self._save_timeout)
+            self._save_timeout = None
+
+        while self._dirty:
+            path, config = self._dirty.popitem()
+
+            try:
+                with open(path, 'w') as config_file:
+                    config.write(config_file)
+            except OSError as error:
+                log.error('Could not write configuration file %s: %s',
+                          path, error)
+
+        # Don't run again if called from the timeout
+        return False
+
     def save_gtg_config(self):
-        self._conf.write(open(self._conf_path, 'w'))
+        self._queue_save(self._conf, self._conf_path)
 
     def save_task_config(self):
-        self._task_conf.write(open(self._task_conf_path, 'w'))
+        self._queue_save(self._task_conf, self._task_conf_path)
 
     def save_backends_config(self):
-        self._backends_conf.write(open(self._backends_conf_path, 'w'))
+        self._queue_save(self._backends_conf, self._backends_conf_path)
+
+    def _get_cache(self, path, section):
+        return self._caches.setdefault((path, section), {})
 
     def get_subconfig(self, name):
         """ Returns configuration object for special section of config """
@@ -208,7 +278,8 @@ class CoreConfig():
             self._conf.add_section(name)
         defaults = DEFAULTS.get(name, dict())
         return SectionConfig(
-            name, self._conf[name], defaults, self.save_gtg_config)
+            name, self._conf[name], defaults, self.save_gtg_config,
+            self._get_cache(self._conf_path, name))
 
     def get_task_config(self, task_id):
         if task_id not in self._task_conf:
@@ -217,7 +288,8 @@ class CoreConfig():
             f'Task {task_id}',
             self._task_conf[task_id],
             DEFAULTS['task'],
-            self.save_task_config)
+            self.save_task_config,
+            self._get_cache(self._task_conf_path, task_id))
 
     def get_all_backends(self):
         return self._backends_conf.sections()
@@ -230,4 +302,5 @@ class CoreConfig():
             f'Backend {backend}',
             self._backends_conf[backend],
             DEFAULTS['backend'],
-            self.save_backends_config)
+            self.save_backends_config,
+            self._get_cache(self._backends_conf_path, backend))
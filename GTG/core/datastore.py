@@ -28,8 +28,13 @@ import uuid
 from GTG.backends.backend_signals import BackendSignals
 from GTG.backends.generic_backend import GenericBackend
 from GTG.core.config import CoreConfig
+from GTG.core import profiler
 from GTG.core import requester
+from GTG.core.dirs import STATISTICS_FILE
+from GTG.core import date_columns
+from GTG.core.modified_index import ModifiedIndex
 from GTG.core.search import parse_search_query, search_filter, InvalidQuery
+from GTG.core.statistics import Statistics
 from GTG.core.tag import Tag, SEARCH_TAG, SEARCH_TAG_PREFIX
 from GTG.core.task import Task
 from GTG.core.treefactory import TreeFactory
@@ -59,9 +64,21 @@ class DataStore():
         self._tasks = self.treefactory.get_tasks_tree()
         self.requester = requester.Requester(self, global_conf)
         self.tagfile_loaded = False
-        self._tagstore = self.treefactory.get_tags_tree(self.requester)
+        with profiler.span('Build tag tree'):
+            self._tagstore = self.treefactory.get_tags_tree(self.requester)
         self._backend_signals = BackendSignals()
         self.conf = global_conf
+        self.statistics = Statistics(STATISTICS_FILE)
+        self.statistics.connect(self.requester, self._tasks.get_main_view())
+        self.modified_index = ModifiedIndex()
+        self.modified_index.connect(self.requester, self._tasks.get_main_view())
+        self.date_columns = None
+
+        if date_columns.numpy is not None:
+            self.date_columns = date_columns.DateColumns()
+            self.date_columns.connect(self.requester,
+                                      self._tasks.get_main_view())
+
         self.tag_idmap = {}
 
         # Flag when turned to true, all pending operation should be
@@ -93,6 +110,31 @@ class DataStore():
         """
         return self.requester
 
+    def get_statistics(self):
+        """
+        Return the statistics about the tasks of this DataStore
+
+        @returns GTG.core.statistics.Statistics: the statistics object
+        """
+        return self.statistics
+
+    def get_modified_index(self):
+        """
+        Return the index of the tasks of this DataStore by modified date
+
+        @returns GTG.core.modified_index.ModifiedIndex: the index
+        """
+        return self.modified_index
+
+    def get_date_columns(self):
+        """
+        Return the dates of the tasks of this DataStore as NumPy arrays
+
+        @returns GTG.core.date_columns.DateColumns: the columns, or None
+                                                   without NumPy
+        """
+        return self.date_columns
+
     def get_tasks_tree(self):
         """
         Return the Tree with all the tasks contained in this Datastore
@@ -374,6 +416,8 @@ class DataStore():
         def adding(task):
             self._tasks.add_node(task)
             task.set_loaded()
+            # Relationships waiting for the task to be added are there now
+            task.clear_date_cache()
             if self.is_default_backend_loaded:
                 task.sync()
         if self.has_task(task.get_id()):
@@ -456,11 +500,16 @@ class DataStore():
             # if it's enabled, we initialize it
             if source.is_enabled() and \
                     (self.is_default_backend_loaded or source.is_default()):
-                source.initialize(connect_signals=False)
+                name = backend.get_name()
+
+                with profiler.span('Initialize backend', backend=name):
+                    source.initialize(connect_signals=False)
+
                 # Filling the backend
                 # Doing this at start is more efficient than
                 # after the GUI is launched
-                source.start_get_tasks()
+                with profiler.span('Push tasks', backend=name):
+                    source.start_get_tasks()
             return source
         else:
             log.error("Tried to register a backend without a pid")
@@ -478,6 +527,11 @@ class DataStore():
             return
 
         self.is_default_backend_loaded = True
+
+        # No statistics saved yet, count the tasks that were there before
+        if not self.statistics.loaded:
+            self.requester.rebuild_statistics()
+
         for backend in self.backends.values():
             if backend.is_enabled() and not backend.is_default():
                 self._backend_startup(backend)
@@ -495,9 +549,16 @@ class DataStore():
 
             @param backend: the backend object
             """
-            backend.initialize()
-            backend.start_get_tasks()
-            self.flush_all_tasks(backend.get_id())
+            name = backend.get_name()
+
+            with profiler.span('_backend_startup', backend=name):
+                with profiler.span('Initialize backend', backend=name):
+                    backend.initialize()
+
+                with profiler.span('Push tasks', backend=name):
+                    backend.start_get_tasks()
+
+                self.flush_all_tasks(backend.get_id())
 
         thread = threading.Thread(target=__backend_startup,
                                   args=(self, backend))
@@ -639,6 +700,8 @@ class DataStore():
         #  Saving the tagstore
         self.save_tagtree()
 
+        self.statistics.save()
+
     def request_task_deletion(self, tid):
         """
         This is a proxy function to request a task deletion from a backend
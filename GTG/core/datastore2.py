@@ -21,16 +21,17 @@
 import os
 import threading
 import logging
-import shutil
 from datetime import datetime, timedelta
 from time import time
 import random
 import string
 
-from GTG.core.tasks2 import TaskStore, Filter
+from GTG.core.tasks2 import TaskStore, TagUsage, Filter, date_sort_key
+from GTG.core import backups
 from GTG.core.tags2 import TagStore
 from GTG.core.saved_searches import SavedSearchStore
 from GTG.core import firstrun_tasks
+from GTG.core import profiler
 from GTG.core.dates import Date
 from GTG.backends.backend_signals import BackendSignals
 from GTG.backends.generic_backend import GenericBackend
@@ -54,6 +55,7 @@ class Datastore2:
         self.tasks = TaskStore()
         self.tags = TagStore()
         self.saved_searches = SavedSearchStore()
+        self.tag_usage = TagUsage(self.tasks, self.tags)
         self.xml_tree = None
 
         self._mutex = threading.Lock()
@@ -86,11 +88,20 @@ class Datastore2:
     def load_data(self, data: et.Element) -> None:
         """Load data from an lxml element object."""
 
-        self.saved_searches.from_xml(data.find('searchlist'))
-        self.tags.from_xml(data.find('taglist'))
-        self.tasks.from_xml(data.find('tasklist'), self.tags)
+        with profiler.span('Load saved searches'):
+            with self.saved_searches.bulk():
+                self.saved_searches.from_xml(data.find('searchlist'))
 
-        self.refresh_task_count()
+        with profiler.span('Build tag tree'):
+            with self.tags.bulk():
+                self.tags.from_xml(data.find('taglist'))
+
+        with profiler.span('Load tasks'):
+            with self.tasks.bulk():
+                self.tasks.from_xml(data.find('tasklist'), self.tags)
+
+        with profiler.span('Count tasks'):
+            self.refresh_task_count()
 
 
     def load_file(self, path: str) -> None:
@@ -103,8 +114,10 @@ class Datastore2:
 
         parser = et.XMLParser(remove_blank_text=True, strip_cdata=False)
 
-        with open(path, 'rb') as stream:
-            self.xml_tree = et.parse(stream, parser=parser)
+        with backups.open_backup(path) as stream:
+            with profiler.span('Parse data file', path=path):
+                self.xml_tree = et.parse(stream, parser=parser)
+
             self.load_data(self.xml_tree)
 
         if log.isEnabledFor(logging.DEBUG):
@@ -130,13 +143,26 @@ class Datastore2:
 
 
     def write_file(self, path: str) -> None:
-        """Generate and write xml file."""
+        """Write the xml file.
+
+        Items are streamed to the file as they are serialized, so no tree
+        of the whole data is built. The result is the same as writing
+        generate_xml() with pretty_print.
+        """
 
-        tree = self.generate_xml()
+        attributes = {'appVersion': info.VERSION, 'xmlVersion': '2'}
 
         with open(path, 'wb') as stream:
-            tree.write(stream, xml_declaration=True, pretty_print=True,
-                       encoding='UTF-8')
+            with et.xmlfile(stream, encoding='UTF-8') as xf:
+                xf.write_declaration()
+
+                with xf.element('gtgData', attributes):
+                    self.tags.write_xml(xf)
+                    self.saved_searches.write_xml(xf)
+                    self.tasks.write_xml(xf)
+                    xf.write('\n')
+
+            stream.write(b'\n')
 
 
     def save(self, path: Optional[str] = None) -> None:
@@ -245,39 +271,14 @@ class Datastore2:
 
 
     def write_backups(self, path: str) -> None:
-        backup_name = self.get_backup_path(path)
-        backup_dir = os.path.dirname(backup_name)
+        """Back up the data file, only storing what changed."""
 
-        # Make sure backup dir exists
         try:
-            os.makedirs(backup_dir, exist_ok=True)
-
-        except IOError:
-            log.error('Backup dir %r cannot be created!', backup_dir)
+            backups.store_for(path, self.BACKUPS_NUMBER).backup()
+        except OSError as error:
+            log.error('Could not back up %r: %r', path, error)
             return
 
-        # Cycle backups
-        for current_backup in range(self.BACKUPS_NUMBER, 0, -1):
-            older = f"{backup_name}.bak.{current_backup}"
-            newer = f"{backup_name}.bak.{current_backup - 1}"
-
-            try:
-                shutil.move(newer, older)
-            except FileNotFoundError:
-                pass
-
-        # bak.0 is always a fresh copy of the closed file
-        # so that it's not touched in case of not opening next time
-        bak_0 = f"{backup_name}.bak.0"
-        shutil.copy(path, bak_0)
-
-        # Add daily backup
-        today = datetime.today().strftime('%Y-%m-%d')
-        daily_backup = f'{backup_name}.{today}.bak'
-
-        if not os.path.exists(daily_backup):
-            shutil.copy(path, daily_backup)
-
         self.purge_backups(path)
 
 
@@ -287,10 +288,17 @@ class Datastore2:
 
         now = time()
         day_in_secs = 86_400
-        basedir = os.path.dirname(path)
+        basedir = os.path.dirname(Datastore2.get_backup_path(path))
+
+        backups.store_for(path).prune(days)
 
+        # Full copies made by older versions
         for filename in os.listdir(basedir):
             filename = os.path.join(basedir, filename)
+
+            if not os.path.isfile(filename) or backups.is_manifest(filename):
+                continue
+
             filestamp = os.stat(filename).st_mtime
             filecompare = now - (days * day_in_secs)
 
@@ -303,9 +311,10 @@ class Datastore2:
 
         If file could not be opened, try:
             - file__
+            - the backups, newest first
             - file.bak.0
             - file.bak.1
-            - .... until BACKUP_NUMBER
+            - .... until BACKUP_NUMBER (made by older versions)
 
         If file doesn't exist, create a new file."""
 
@@ -315,6 +324,7 @@ class Datastore2:
         ]
 
         # Add backup files
+        files += backups.store_for(path, self.BACKUPS_NUMBER).manifests()
         files += [self.get_backup_path(path, i)
                   for i in range(self.BACKUPS_NUMBER)]
 
@@ -334,6 +344,9 @@ class Datastore2:
                         'time': mtime
                     }
 
+                    # Save over the main file, not the backup
+                    self.data_path = path
+
                 # We could open a file, let's stop this loop
                 break
 
@@ -345,7 +358,7 @@ class Datastore2:
                 log.debug('Not allowed to open: %r. Trying next.', filepath)
                 continue
 
-            except et.XMLSyntaxError as error:
+            except (et.XMLSyntaxError, backups.BackupError) as error:
                 log.debug('Syntax error in %r. %r. Trying next.',
                           filepath, error)
                 continue
@@ -366,20 +379,30 @@ class Datastore2:
         log.debug("Deleting old tasks")
 
         today = Date.today()
-        for task in self.tasks.data:
-            if (today - task.date_closed).days > max_days:
+        limit = today.date().toordinal() - max_days
+
+        # Closed tasks come first in this view, oldest first. Dates are
+        # checked again in case a change wasn't reported to the store.
+        closed = self.tasks.sorted_view('closed')
+        expired = [t for t in closed.until(date_sort_key(limit))
+                   if (today - t.date_closed).days > max_days]
+
+        with self.tasks.bulk():
+            for task in expired:
                 self.tasks.remove(task.id)
 
         log.debug("Deleting unused tags")
 
-        for tag in self.tags.data:
-            count_open = self.task_count['open'].get(tag.name, 0)
-            count_closed = self.task_count['closed'].get(tag.name, 0)
-            customized = tag.color or tag.icon
+        unused = [tag for tag in self.tag_usage.take_unused()
+                  if not (tag.color or tag.icon or tag.children)]
 
-            if (count_open + count_closed) == 0 and not customized:
+        with self.tags.bulk():
+            for tag in unused:
                 self.tags.remove(tag.id)
 
+        if (expired or unused) and self.data_path:
+            self.save()
+
 
     # --------------------------------------------------------------------------
     # BACKENDS
@@ -595,6 +618,13 @@ class Datastore2:
     def fill_with_samples(self, tasks_count: int) -> None:
         """Fill the Datastore with sample data."""
 
+        with self.saved_searches.bulk(), self.tags.bulk(), self.tasks.bulk():
+            self._generate_samples(tasks_count)
+
+
+    def _generate_samples(self, tasks_count: int) -> None:
+        """Generate random searches, tags and tasks."""
+
         def random_date(start: datetime = None):
             start = start or datetime.now()
             end = start + timedelta(days=random.randint(1, 365 * 5))
@@ -611,6 +641,18 @@ class Datastore2:
             return ''.join(random.choice(letters) for _ in range(length))
 
 
+        def is_ancestor(item, other) -> bool:
+            """Whether item is other, or one of its parents."""
+
+            while other is not None:
+                if other is item:
+                    return True
+
+                other = other.parent
+
+            return False
+
+
         if tasks_count == 0:
             return
 
@@ -635,11 +677,13 @@ class Datastore2:
 
 
         # Parent the tags
-        for tag in self.tags.data:
+        tags = list(self.tags.data)
+
+        for tag in tags:
             if bool(random.getrandbits(1)):
-                parent = random.choice(self.tags.data)
+                parent = random.choice(tags)
 
-                if tag.id == parent.id:
+                if is_ancestor(tag, parent):
                     continue
 
                 self.tags.parent(tag.id, parent.id)
@@ -690,11 +734,13 @@ class Datastore2:
 
 
         # Parent the tasks
-        for task in self.tasks.data:
+        tasks = list(self.tasks.data)
+
+        for task in tasks:
             if bool(random.getrandbits(1)):
-                parent = random.choice(self.tasks.data)
+                parent = random.choice(tasks)
 
-                if task.id == parent.id:
+                if is_ancestor(task, parent):
                     continue
 
                 self.tasks.parent(task.id, parent.id)
@@ -0,0 +1,276 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Dates of all tasks, as NumPy arrays of day ordinals.
+
+Questions like "which tasks were closed more than 30 days ago" become a
+couple of array comparisons, instead of date arithmetic on every task.
+NumPy is optional: without it the datastore has no columns, and the
+requester checks tasks one by one like before.
+"""
+
+import datetime
+import logging
+from typing import Dict, List, Optional
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from GTG.core.dates import SOMEDAY, SOON, Date
+from GTG.core.task import Task
+
+log = logging.getLogger(__name__)
+
+#: Day ordinals of fuzzy and missing dates, after all real dates
+ORDINAL_SOON = 2**31 - 3
+ORDINAL_SOMEDAY = 2**31 - 2
+ORDINAL_NONE = 2**31 - 1
+
+#: Status of tasks in the status column. Free rows are -1.
+STATUS_CODES = {Task.STA_ACTIVE: 0, Task.STA_DONE: 1, Task.STA_DISMISSED: 2}
+
+
+def date_ordinal(value) -> int:
+    """Get the day ordinal of a Date (or date), or an ORDINAL_* value."""
+
+    if isinstance(value, Date):
+        value = value.dt_value
+
+    if isinstance(value, datetime.date):
+        return value.toordinal()
+    elif value == SOON:
+        return ORDINAL_SOON
+    elif value == SOMEDAY:
+        return ORDINAL_SOMEDAY
+
+    return ORDINAL_NONE
+
+
+class DateColumns:
+    """Status and dates of every task, one row per task.
+
+    Signals only mark tasks as changed, rows are copied from the tasks
+    when the next query runs. Loading thousands of tasks costs nothing
+    until the columns are used.
+    """
+
+    #: Column name -> getter of old core tasks
+    COLUMNS = {
+        'closed': 'get_closed_date',
+    }
+
+    #: Rows allocated at first
+    MIN_CAPACITY = 1024
+
+
+    def __init__(self) -> None:
+        self._requester = None
+
+        # Task id -> row
+        self._rows: Dict[str, int] = {}
+
+        # Rows of deleted tasks, to be used again
+        self._free: List[int] = []
+
+        # Rows used so far (including free ones)
+        self._size = 0
+
+        # Ids of tasks added, changed or deleted since the last query
+        self._pending = set()
+
+        self._allocate(self.MIN_CAPACITY)
+
+
+    def _allocate(self, capacity: int) -> None:
+        self._ids = numpy.empty(capacity, dtype=object)
+        self._status = numpy.full(capacity, -1, dtype=numpy.int8)
+        self._dates = {name: numpy.full(capacity, ORDINAL_NONE,
+                                        dtype=numpy.int32)
+                       for name in self.COLUMNS}
+
+
+    # --------------------------------------------------------------------------
+    # QUERIES
+    # --------------------------------------------------------------------------
+
+    def closed_before(self, days: int,
+                      today: Optional[datetime.date] = None) -> List[str]:
+        """Get closed tasks, closed more than some days ago."""
+
+        limit = self._today(today) - days
+        closed = self._column('closed')
+
+        return self._select((closed < limit) & self._closed())
+
+
+    def done_since(self, days: int,
+                   today: Optional[datetime.date] = None) -> List[str]:
+        """Get done tasks closed in the last days (or later)."""
+
+        limit = self._today(today) - days
+        closed = self._column('closed')
+        mask = (closed >= limit) & (closed != ORDINAL_NONE)
+
+        return self._select(mask & (self._status_column()
+                                    == STATUS_CODES[Task.STA_DONE]))
+
+
+    def _column(self, name: str):
+        self._sync()
+        return self._dates[name][:self._size]
+
+
+    def _status_column(self):
+        self._sync()
+        return self._status[:self._size]
+
+
+    def _closed(self):
+        status = self._status_column()
+
+        return ((status == STATUS_CODES[Task.STA_DONE])
+                | (status == STATUS_CODES[Task.STA_DISMISSED]))
+
+
+    def _select(self, mask) -> List[str]:
+        return self._ids[:self._size][mask].tolist()
+
+
+    @staticmethod
+    def _today(today: Optional[datetime.date]) -> int:
+        return (today or datetime.date.today()).toordinal()
+
+
+    def __len__(self) -> int:
+        self._sync()
+        return len(self._rows)
+
+
+    # --------------------------------------------------------------------------
+    # ROWS
+    # --------------------------------------------------------------------------
+
+    def update(self, tid: str, task) -> None:
+        """Copy the status and dates of a task."""
+
+        self.update_many([(tid, task)])
+
+
+    def update_many(self, tasks) -> None:
+        """Copy the status and dates of (task id, task) pairs, at once."""
+
+        tasks = list(tasks)
+        count = len(tasks)
+
+        if not count:
+            return
+
+        rows = numpy.fromiter((self._row(tid) for tid, _task in tasks),
+                              dtype=numpy.intp, count=count)
+
+        self._status[rows] = numpy.fromiter(
+            (STATUS_CODES.get(t.get_status(), -1) for _tid, t in tasks),
+            dtype=numpy.int8, count=count)
+
+        for name, getter in self.COLUMNS.items():
+            self._dates[name][rows] = numpy.fromiter(
+                (date_ordinal(getattr(t, getter)()) for _tid, t in tasks),
+                dtype=numpy.int32, count=count)
+
+
+    def remove(self, tid: str) -> None:
+        """Forget about a task."""
+
+        row = self._rows.pop(tid, None)
+
+        if row is not None:
+            self._ids[row] = None
+            self._status[row] = -1
+            self._free.append(row)
+
+
+    def _row(self, tid: str) -> int:
+        row = self._rows.get(tid)
+
+        if row is None:
+            row = self._rows[tid] = self._new_row()
+            self._ids[row] = tid
+
+        return row
+
+
+    def _new_row(self) -> int:
+        if self._free:
+            return self._free.pop()
+
+        capacity = len(self._ids)
+
+        if self._size == capacity:
+            ids, status, dates = self._ids, self._status, self._dates
+            self._allocate(capacity * 2)
+
+            self._ids[:capacity] = ids
+            self._status[:capacity] = status
+
+            for name, column in dates.items():
+                self._dates[name][:capacity] = column
+
+        self._size += 1
+        return self._size - 1
+
+
+    # --------------------------------------------------------------------------
+    # SIGNALS
+    # --------------------------------------------------------------------------
+
+    def connect(self, requester, tasks_tree) -> None:
+        """Follow the tasks of a datastore."""
+
+        self._requester = requester
+
+        tasks_tree.register_cllbck('node-added', self._on_task_changed)
+        tasks_tree.register_cllbck('node-modified', self._on_task_changed)
+        tasks_tree.register_cllbck('node-deleted', self._on_task_changed)
+
+
+    def _on_task_changed(self, tid, path=None) -> None:
+        self._pending.add(tid)
+
+
+    def _sync(self) -> None:
+        """Copy the tasks that changed since last time."""
+
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, set()
+        changed = []
+
+        for tid in pending:
+            task = (self._requester.get_task(tid)
+                    if self._requester.has_task(tid) else None)
+
+            if task is None:
+                self.remove(tid)
+            else:
+                changed.append((tid, task))
+
+        self.update_many(changed)
+        log.debug('Updated the dates of %d tasks', len(changed))
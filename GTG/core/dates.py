@@ -27,6 +27,7 @@ import calendar
 import locale
 from datetime import date, datetime, timedelta, timezone
 from enum import Enum
+from functools import lru_cache
 from gettext import gettext as _
 from gettext import ngettext
 
@@ -89,17 +90,103 @@ class Accuracy(Enum):
     timezone = 'timezone'
 
 
-# ISO 8601 date format
-# get date format from locale
-DATE_FORMATS = [(locale.nl_langinfo(locale.D_T_FMT), Accuracy.datetime),
-                ('%Y-%m-%dT%H:%M%S.%f%z', Accuracy.timezone),
-                ('%Y-%m-%d %H:%M%S.%f%z', Accuracy.timezone),
-                ('%Y-%m-%dT%H:%M%S.%f', Accuracy.datetime),
-                ('%Y-%m-%d %H:%M%S.%f', Accuracy.datetime),
-                ('%Y-%m-%dT%H:%M%S', Accuracy.datetime),
-                ('%Y-%m-%d %H:%M%S', Accuracy.datetime),
-                (locale.nl_langinfo(locale.D_FMT), Accuracy.date),
-                ('%Y-%m-%d', Accuracy.date)]
+# Tables used in parsing depend on the locale, and are built once for each
+# locale (and each day, when they depend on it).
+
+def _locale_key():
+    """Name of the current locale, to know when tables must be rebuilt."""
+    return locale.setlocale(locale.LC_ALL)
+
+
+@lru_cache(maxsize=4)
+def _date_formats(locale_key):
+    """Formats tried by the Date constructor: ISO 8601 and the locale's."""
+    return [(locale.nl_langinfo(locale.D_T_FMT), Accuracy.datetime),
+            ('%Y-%m-%dT%H:%M%S.%f%z', Accuracy.timezone),
+            ('%Y-%m-%d %H:%M%S.%f%z', Accuracy.timezone),
+            ('%Y-%m-%dT%H:%M%S.%f', Accuracy.datetime),
+            ('%Y-%m-%d %H:%M%S.%f', Accuracy.datetime),
+            ('%Y-%m-%dT%H:%M%S', Accuracy.datetime),
+            ('%Y-%m-%d %H:%M%S', Accuracy.datetime),
+            (locale.nl_langinfo(locale.D_FMT), Accuracy.date),
+            ('%Y-%m-%d', Accuracy.date)]
+
+
+@lru_cache(maxsize=4)
+def _now_words(locale_key):
+    """Words for now, which aren't the same date from one call to the
+    next."""
+    return {'now', _('now').lower()}
+
+
+@lru_cache(maxsize=4)
+def _weekday_names(locale_key):
+    """Week day names in English and the current locale, and their
+    number (0 is Monday)."""
+    names = {}
+    for i, (english, local) in enumerate([
+        ("Monday", _("Monday")),
+        ("Tuesday", _("Tuesday")),
+        ("Wednesday", _("Wednesday")),
+        ("Thursday", _("Thursday")),
+        ("Friday", _("Friday")),
+        ("Saturday", _("Saturday")),
+        ("Sunday", _("Sunday")),
+    ]):
+        names[english.lower()] = i
+        names[local.lower()] = i
+    return names
+
+
+@lru_cache(maxsize=4)
+def _text_offsets(today, locale_key):
+    """Text representations of dates and their number of days from
+    today."""
+    offsets = {
+        'today': 0,
+        # Translators: Used in parsing, made lowercased in code
+        _('today').lower(): 0,
+        'tomorrow': 1,
+        # Translators: Used in parsing, made lowercased in code
+        _('tomorrow').lower(): 1,
+        'next week': 7,
+        # Translators: Used in parsing, made lowercased in code
+        _('next week').lower(): 7,
+        'next month': calendar.mdays[today.month],
+        # Translators: Used in parsing, made lowercased in code
+        _('next month').lower(): calendar.mdays[today.month],
+        'next year': 365 + int(calendar.isleap(today.year)),
+        # Translators: Used in parsing, made lowercased in code
+        _('next year').lower(): 365 + int(calendar.isleap(today.year)),
+    }
+
+    for name, i in _weekday_names(locale_key).items():
+        offsets[name] = i - today.weekday() + 7 * int(i <= today.weekday())
+
+    return offsets
+
+
+@lru_cache(maxsize=4)
+def _recurring_words(locale_key):
+    """Recurring periods in English and the current locale, mapped to
+    their English name."""
+    return {
+        'day': 'day',
+        # Translators: Used in recurring parsing, made lowercased in code
+        _('day').lower(): 'day',
+        'other-day': 'other-day',
+        # Translators: Used in recurring parsing, made lowercased in code
+        _('other-day').lower(): 'other-day',
+        'week': 'week',
+        # Translators: Used in recurring parsing, made lowercased in code
+        _('week').lower(): 'week',
+        'month': 'month',
+        # Translators: Used in recurring parsing, made lowercased in code
+        _('month').lower(): 'month',
+        'year': 'year',
+        # Translators: Used in recurring parsing, made lowercased in code
+        _('year').lower(): 'year',
+    }
 
 
 class Date:
@@ -143,7 +230,8 @@ class Date:
             except (ValueError,  # ignoring no iso format value
                     AttributeError):  # ignoring python < 3.7
                 pass
-        for date_format, accuracy in DATE_FORMATS:
+        locale_key = _locale_key()
+        for date_format, accuracy in _date_formats(locale_key):
             try:
                 dt_value = datetime.strptime(string, date_format)
                 if accuracy is Accuracy.date:
@@ -151,7 +239,7 @@ class Date:
                 return dt_value
             except ValueError:
                 pass
-        if string in {'now', _('now').lower()}:
+        if string in _now_words(locale_key):
             return datetime.now()
         return LOOKUP.get(str(string).lower(), None)
 
@@ -333,7 +421,7 @@ class Date:
         return _GLOBAL_DATE_SOMEDAY
 
     @staticmethod
-    def _parse_only_month_day(string):
+    def _parse_only_month_day(string, today):
         """ Parse next Xth day in month """
         try:
             mday = int(string)
@@ -342,7 +430,6 @@ class Date:
         except ValueError:
             return None
 
-        today = date.today()
         try:
             result = today.replace(day=mday)
         except ValueError:
@@ -364,10 +451,9 @@ class Date:
         return result
 
     @staticmethod
-    def _parse_numerical_format(string):
+    def _parse_numerical_format(string, today):
         """ Parse numerical formats like %Y/%m/%d, %Y%m%d or %m%d """
         result = None
-        today = date.today()
         for fmt in ['%Y/%m/%d', '%Y%m%d', '%m%d']:
             try:
                 result = datetime.strptime(string, fmt).date()
@@ -384,44 +470,9 @@ class Date:
         return result
 
     @staticmethod
-    def _parse_text_representation(string):
+    def _parse_text_representation(string, today):
         """ Match common text representation for date """
-        today = date.today()
-
-        # accepted date formats
-        formats = {
-            'today': 0,
-            # Translators: Used in parsing, made lowercased in code
-            _('today').lower(): 0,
-            'tomorrow': 1,
-            # Translators: Used in parsing, made lowercased in code
-            _('tomorrow').lower(): 1,
-            'next week': 7,
-            # Translators: Used in parsing, made lowercased in code
-            _('next week').lower(): 7,
-            'next month': calendar.mdays[today.month],
-            # Translators: Used in parsing, made lowercased in code
-            _('next month').lower(): calendar.mdays[today.month],
-            'next year': 365 + int(calendar.isleap(today.year)),
-            # Translators: Used in parsing, made lowercased in code
-            _('next year').lower(): 365 + int(calendar.isleap(today.year)),
-        }
-
-        # add week day names in the current locale
-        for i, (english, local) in enumerate([
-            ("Monday", _("Monday")),
-            ("Tuesday", _("Tuesday")),
-            ("Wednesday", _("Wednesday")),
-            ("Thursday", _("Thursday")),
-            ("Friday", _("Friday")),
-            ("Saturday", _("Saturday")),
-            ("Sunday", _("Sunday")),
-        ]):
-            offset = i - today.weekday() + 7 * int(i <= today.weekday())
-            formats[english.lower()] = offset
-            formats[local.lower()] = offset
-
-        offset = formats.get(string, None)
+        offset = _text_offsets(today, _locale_key()).get(string, None)
         if offset is None:
             return None
         return today + timedelta(offset)
@@ -435,13 +486,39 @@ class Date:
             - fuzzy dates
             - 'today', 'tomorrow', 'next week', 'next month' or 'next year' in
                 English or the system locale.
+
+        Results are cached until the next day or a change of locale.
         """
         # sanitize input
         if string is None:
             string = ''
+
+        # fast path for ISO dates, as in the data file
+        if string[:4].isdigit() and string[4:5] == '-':
+            try:
+                if len(string) == 10:
+                    return cls(date.fromisoformat(string))
+                return cls(datetime.fromisoformat(string))
+            except ValueError:
+                pass
+
+        string = string.lower()
+        locale_key = _locale_key()
+
+        if string in _now_words(locale_key):
+            return cls(string)
+
+        result = _parse_cached(string, date.today(), locale_key)
+
+        # Announce the result
+        if result is not None:
+            return result
         else:
-            string = string.lower()
+            raise ValueError(f"Can't parse date '{string}'")
 
+    @classmethod
+    def _parse(cls, string, today):
+        """Parse a lowercase string without the cache."""
         # try the default formats
         try:
             return cls(string)
@@ -449,17 +526,15 @@ class Date:
             pass
 
         # do several parsing
-        result = cls._parse_only_month_day(string)
+        result = cls._parse_only_month_day(string, today)
         if result is None:
-            result = cls._parse_numerical_format(string)
+            result = cls._parse_numerical_format(string, today)
         if result is None:
-            result = cls._parse_text_representation(string)
+            result = cls._parse_text_representation(string, today)
 
-        # Announce the result
         if result is not None:
             return cls(result)
-        else:
-            raise ValueError(f"Can't parse date '{string}'")
+        return None
 
     @staticmethod
     def date_in_the_next_month(mday, dt):
@@ -532,47 +607,30 @@ class Date:
             string (str): text representation.
             newtask (bool, optional): depending on the task if it is new, the offset changes
         """
-        # accepted date formats
         self_date = self.dt_by_accuracy(Accuracy.date)
-        formats = {
-            # change the offset depending on the task.
-            'day': 0 if newtask else 1,
-            # Translators: Used in recurring parsing, made lowercased in code
-            _('day').lower(): 0 if newtask else 1,
-            'other-day': 0 if newtask else 2,
-            # Translators: Used in recurring parsing, made lowercased in code
-            _('other-day').lower(): 0 if newtask else 2,
-            'week': 0 if newtask else 7,
-            # Translators: Used in recurring parsing, made lowercased in code
-            _('week').lower(): 0 if newtask else 7,
-            'month': 0 if newtask else calendar.mdays[self_date.month],
-            # Translators: Used in recurring parsing, made lowercased in code
-            _('month').lower(): 0 if newtask else calendar.mdays[self_date.month],
-            'year': 0 if newtask else 365 + int(calendar.isleap(self_date.year)),
-            # Translators: Used in recurring parsing, made lowercased in code
-            _('year').lower(): 0 if newtask else 365 + int(calendar.isleap(self_date.year)),
-        }
+        locale_key = _locale_key()
 
-        # add week day names in the current locale
-        for i, (english, local) in enumerate([
-            ("Monday", _("Monday")),
-            ("Tuesday", _("Tuesday")),
-            ("Wednesday", _("Wednesday")),
-            ("Thursday", _("Thursday")),
-            ("Friday", _("Friday")),
-            ("Saturday", _("Saturday")),
-            ("Sunday", _("Sunday")),
-        ]):
-            offset = i - self_date.weekday() + 7 * int(i <= self_date.weekday())
-            formats[english.lower()] = offset
-            formats[local.lower()] = offset
-
-        offset = formats.get(string, None)
-        if offset is None:
-            return None
-        else:
+        weekday = _weekday_names(locale_key).get(string, None)
+        if weekday is not None:
+            offset = weekday - self_date.weekday() + \
+                7 * int(weekday <= self_date.weekday())
             return self_date + timedelta(offset)
 
+        period = _recurring_words(locale_key).get(string, None)
+        if period is None:
+            return None
+        # change the offset depending on the task.
+        if newtask:
+            return self_date
+        offsets = {
+            'day': 1,
+            'other-day': 2,
+            'week': 7,
+            'month': calendar.mdays[self_date.month],
+            'year': 365 + int(calendar.isleap(self_date.year)),
+        }
+        return self_date + timedelta(offsets[period])
+
     def parse_from_date(self, string, newtask=False):
         """parse_from_date returns the date from a string
         but counts since a given date"""
@@ -630,6 +688,15 @@ class Date:
             return self.dt_by_accuracy(Accuracy.date).strftime(locale_format)
 
 
+@lru_cache(maxsize=1024)
+def _parse_cached(string, today, locale_key):
+    """Cached Date._parse(), None if string isn't a date.
+
+    Results are only kept for the day and locale they were parsed in.
+    """
+    return Date._parse(string, today)
+
+
 _GLOBAL_DATE_NOW = Date(NOW)
 _GLOBAL_DATE_SOON = Date(SOON)
 _GLOBAL_DATE_NODATE = Date(NODATE)
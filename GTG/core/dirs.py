@@ -30,6 +30,9 @@ CONFIG_DIR = os.path.join(GLib.get_user_config_dir(), 'gtg')
 # File defining used tags
 TAGS_XMLFILE = os.path.join(DATA_DIR, 'tags.xml')
 
+# File keeping statistics about tasks
+STATISTICS_FILE = os.path.join(DATA_DIR, 'statistics.json')
+
 # Root is 2 folders up of this file (as it is in GTG/core)
 local_rootdir = os.path.abspath(
     os.path.join(os.path.dirname(__file__), '..', '..'))
@@ -38,6 +41,10 @@ local_rootdir = os.path.abspath(
 ICONS_DIR = os.path.join(local_rootdir, 'data', 'icons')
 CSS_DIR = os.path.join(local_rootdir, 'GTG', 'gtk', 'data')
 
+# Socket of the query service, see GTG.core.query_service
+QUERY_SOCKET = os.path.join(GLib.get_user_runtime_dir(), 'gtg',
+                            'query.socket')
+
 # Where data & cache for synchronization services is stored
 SYNC_DATA_DIR = os.path.join(DATA_DIR, 'backends')
 SYNC_CACHE_DIR = os.path.join(GLib.get_user_cache_dir(), 'gtg')
@@ -0,0 +1,59 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Machine readable documents of tasks, as JSON Lines or CSV.
+
+Used by both the export plugin and gtg-cli, so their documents stay the
+same. Tasks come as records: dicts with the keys of FIELDS, where tags
+are a list of names. Nothing here needs GTK.
+"""
+
+import csv
+import json
+from typing import Callable, Dict, Iterable, TextIO
+
+#: Fields of the records, in the order of CSV columns
+FIELDS = ('id', 'parent', 'title', 'status', 'tags', 'added_date',
+          'modified', 'start_date', 'due_date', 'closed_date', 'text')
+
+
+def write_jsonl(stream: TextIO, records: Iterable[dict]) -> None:
+    """One JSON object per task and per line."""
+
+    for record in records:
+        stream.write(json.dumps(record, ensure_ascii=False))
+        stream.write('\n')
+
+
+def write_csv(stream: TextIO, records: Iterable[dict]) -> None:
+    """A header, then one row per task, with tags separated by commas."""
+
+    writer = csv.writer(stream)
+    writer.writerow(FIELDS)
+
+    for record in records:
+        writer.writerow([','.join(record[name]) if name == 'tags'
+                         else record[name] or ''
+                         for name in FIELDS])
+
+
+#: Format name -> writer
+WRITERS: Dict[str, Callable[[TextIO, Iterable[dict]], None]] = {
+    'jsonl': write_jsonl,
+    'csv': write_csv,
+}
@@ -0,0 +1,71 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Book-keeping for the time spent importing plugins and backends.
+
+Timings are only collected when debug logging is enabled (gtg --debug),
+and can be dumped with report(). Imports also show up in the startup
+timeline when it is being recorded.
+"""
+
+import logging
+from contextlib import contextmanager
+from time import perf_counter
+
+from GTG.core import profiler
+
+log = logging.getLogger(__name__)
+
+# Module name -> milliseconds spent importing it
+_timings = {}
+
+
+@contextmanager
+def timed_import(name):
+    """Record how long the wrapped import of `name` takes."""
+
+    if not log.isEnabledFor(logging.DEBUG):
+        with profiler.span(name, 'import'):
+            yield
+        return
+
+    start = perf_counter()
+    try:
+        with profiler.span(name, 'import'):
+            yield
+    finally:
+        _timings[name] = (perf_counter() - start) * 1000
+
+
+def get_timings():
+    """Return a copy of the recorded timings."""
+
+    return dict(_timings)
+
+
+def report():
+    """Log the recorded timings, slowest first."""
+
+    if not _timings:
+        return
+
+    log.debug('Import times (%d modules, %.2f ms total):',
+              len(_timings), sum(_timings.values()))
+
+    for name, ms in sorted(_timings.items(), key=lambda i: i[1], reverse=True):
+        log.debug('  %8.2f ms  %s', ms, name)
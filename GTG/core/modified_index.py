@@ -0,0 +1,138 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Tasks sorted by modified date.
+
+Finding the tasks modified in a range of time is a bisection, so periodic
+checks like the untouched tasks plugin only see the tasks that crossed a
+date since they last ran.
+"""
+
+import logging
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from GTG.core.dates import Accuracy, Date
+
+log = logging.getLogger(__name__)
+
+
+def modified_key(value) -> float:
+    """Get a timestamp out of a modified date.
+
+    Tasks have a datetime once modified, and a Date when loaded.
+    """
+
+    if isinstance(value, Date):
+        if value.is_fuzzy():
+            return float('-inf')
+
+        value = value.dt_by_accuracy(Accuracy.datetime)
+    elif not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+
+    return value.timestamp()
+
+
+class ModifiedIndex:
+    """Ids of tasks, sorted by their modified date."""
+
+    def __init__(self) -> None:
+        # Task id to timestamp
+        self._keys: Dict[str, float] = {}
+
+        # Sorted (timestamp, task id), only built when first needed since
+        # tasks are all added when loading
+        self._entries: Optional[List[Tuple[float, str]]] = None
+
+
+    def update(self, tid: str, modified) -> None:
+        """Add a task, or move it after its modified date changed."""
+
+        key = modified_key(modified)
+        old_key = self._keys.get(tid)
+
+        if key == old_key:
+            return
+
+        self._keys[tid] = key
+
+        if self._entries is not None:
+            if old_key is not None:
+                self._discard(old_key, tid)
+
+            insort(self._entries, (key, tid))
+
+
+    def remove(self, tid: str) -> None:
+        """Forget about a task."""
+
+        key = self._keys.pop(tid, None)
+
+        if key is not None and self._entries is not None:
+            self._discard(key, tid)
+
+
+    def _discard(self, key: float, tid: str) -> None:
+        index = bisect_left(self._entries, (key, tid))
+        del self._entries[index]
+
+
+    def between(self, start: Optional[datetime],
+                end: datetime) -> List[str]:
+        """Get tasks modified from start (included) to end, oldest first.
+
+        Without start, get all the tasks modified before end.
+        """
+
+        if self._entries is None:
+            self._entries = sorted((k, t) for t, k in self._keys.items())
+
+        low = 0 if start is None else bisect_left(self._entries,
+                                                  (modified_key(start),))
+        high = bisect_left(self._entries, (modified_key(end),))
+
+        return [tid for _, tid in self._entries[low:high]]
+
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+    # --------------------------------------------------------------------------
+    # SIGNALS
+    # --------------------------------------------------------------------------
+
+    def connect(self, requester, tasks_tree) -> None:
+        """Follow the tasks of a datastore."""
+
+        self._requester = requester
+
+        tasks_tree.register_cllbck('node-added', self._on_task_changed)
+        tasks_tree.register_cllbck('node-modified', self._on_task_changed)
+        tasks_tree.register_cllbck('node-deleted', self._on_task_deleted)
+
+
+    def _on_task_changed(self, tid, path=None) -> None:
+        if self._requester.has_task(tid):
+            self.update(tid, self._requester.get_task(tid).get_modified())
+
+
+    def _on_task_deleted(self, tid, path=None) -> None:
+        self.remove(tid)
@@ -16,6 +16,7 @@
 # this program.  If not, see <http://www.gnu.org/licenses/>.
 # -----------------------------------------------------------------------------
 
+import copy
 import os
 import pickle
 import logging
@@ -25,6 +26,76 @@ from GTG.core.dirs import plugin_configuration_dir
 log = logging.getLogger(__name__)
 
 
+class ConfigurationCache():
+    """Configuration objects of plugins, kept in memory.
+
+    Objects are read from disk the first time they are loaded. Saving one
+    only replaces the copy in memory and marks it as dirty, and dirty
+    objects are pickled to their file once no change happened for
+    SAVE_DELAY milliseconds, or when flush() is called.
+    """
+
+    #: Idle time (in ms) to wait before writing changes
+    SAVE_DELAY = 1000
+
+    def __init__(self):
+        # Objects by path, None for files that don't exist or can't be read
+        self._items = {}
+        self._dirty = set()
+        self._save_timeout = None
+
+    def load(self, path):
+        """ Get a copy of the object saved to a file, or None """
+        try:
+            item = self._items[path]
+        except KeyError:
+            try:
+                with open(path, 'rb') as file:
+                    item = pickle.load(file)
+            except Exception:
+                item = None
+
+            self._items[path] = item
+
+        # Callers change what they get, that shouldn't change the cache
+        return copy.deepcopy(item)
+
+    def save(self, path, item):
+        """ Replace the object of a file, and write it a bit later """
+        self._items[path] = copy.deepcopy(item)
+        self._dirty.add(path)
+
+        if self._save_timeout:
+            GLib.source_remove(self._save_timeout)
+
+        self._save_timeout = GLib.timeout_add(self.SAVE_DELAY, self.flush)
+
+    def flush(self):
+        """ Write all pending changes to disk """
+        if self._save_timeout:
+            GLib.source_remove(self._save_timeout)
+            self._save_timeout = None
+
+        while self._dirty:
+            path = self._dirty.pop()
+            dirname = os.path.dirname(path)
+
+            try:
+                if not os.path.isdir(dirname):
+                    os.makedirs(dirname)
+
+                with open(path + '__', 'wb') as file:
+                    pickle.dump(self._items[path], file)
+
+                os.replace(path + '__', path)
+            except OSError as error:
+                log.error('Could not write plugin configuration %s: %s',
+                          path, error)
+
+        # Don't run again if called from the timeout
+        return False
+
+
 class PluginAPI():
     """The plugin engine's API.
 
@@ -36,6 +107,9 @@ class PluginAPI():
     with the task editor.
     """
 
+    #: Configuration objects of the plugins, shared by all the instances
+    configurations = ConfigurationCache()
+
     def __init__(self,
                  requester,
                  view_manager,
@@ -240,18 +314,16 @@ class PluginAPI():
 
         dirname = plugin_configuration_dir(plugin_name)
         path = os.path.join(dirname, filename)
-        try:
-            with open(path, 'rb') as file:
-                item = pickle.load(file)
-                config.update(item)
-        except Exception:
-            pass
+        item = self.configurations.load(path)
+        if item:
+            config.update(item)
         return config
 
     def save_configuration_object(self, plugin_name, filename, item):
         dirname = plugin_configuration_dir(plugin_name)
-        if not os.path.isdir(dirname):
-            os.makedirs(dirname)
         path = os.path.join(dirname, filename)
-        with open(path, 'wb') as file:
-            pickle.dump(item, file)
+        self.configurations.save(path, item)
+
+    def flush_configuration(self):
+        """Write the configuration objects waiting to be saved."""
+        self.configurations.flush()
@@ -22,6 +22,8 @@ from gi.repository import GLib
 
 from GTG.core.dirs import PLUGIN_DIRS
 from GTG.core.borg import Borg
+from GTG.core import profiler
+from GTG.core.importtime import timed_import
 
 log = logging.getLogger(__name__)
 
@@ -37,6 +39,8 @@ class Plugin():
     error = False
     # True if the plugin is actually loaded and running.
     _active = False
+    # The class implementing the plugin, set once the module is imported.
+    plugin_class = None
     missing_modules = []
     missing_dbus = []
 
@@ -67,7 +71,9 @@ class Plugin():
         # ensure the dbus dependencies are a list
         if isinstance(self.dbus_depends, str):
             self.dbus_depends = [self.dbus_depends]
-        self._load_module(module_paths)
+        # The module is only imported when the plugin gets activated,
+        # see load()
+        self.module_paths = module_paths
 
     # 'active' property
     def _get_active(self):
@@ -75,6 +81,7 @@ class Plugin():
 
     def _set_active(self, value):
         if value:
+            self.load()
             self.instance = self.plugin_class()
         else:
             self.instance = None
@@ -97,12 +104,28 @@ class Plugin():
         return self.instance and hasattr(self.instance, 'is_configurable') and\
             self.instance.is_configurable()
 
+    def is_loaded(self):
+        """Whether the module containing this plugin has been imported."""
+        return self.plugin_class is not None
+
+    def load(self):
+        """Import the plugin module, unless it has been done already.
+
+        Returns True if the plugin class is available.
+        """
+        if not self.is_loaded() and not self.error:
+            self._load_module(self.module_paths)
+        return self.is_loaded()
+
     def _load_module(self, module_paths):
         """Load the module containing this plugin."""
+        self.error = False
+        self.missing_modules = []
         try:
             # import the module containing the plugin
             f, pathname, desc = imp.find_module(self.module_name, module_paths)
-            module = imp.load_module(self.module_name, f, pathname, desc)
+            with timed_import(f'plugin {self.module_name}'):
+                module = imp.load_module(self.module_name, f, pathname, desc)
             # find the class object for the actual plugin
             for key, item in module.__dict__.items():
                 if isinstance(item, type):
@@ -123,6 +146,7 @@ class Plugin():
 
     def reload(self, module_paths):
         if not self.active:
+            self.module_paths = module_paths
             self._load_module(module_paths)
 
 
@@ -143,7 +167,8 @@ class PluginEngine(Borg):
         self.plugins = {}
         self.plugin_apis = []
 
-        # find all plugin info files (*.gtg-plugin)
+        # find all plugin info files (*.gtg-plugin). Only the metadata is
+        # read here, modules are imported when a plugin is activated.
         for path in PLUGIN_DIRS:
             for f in os.listdir(path):
                 info_file = os.path.join(path, f)
@@ -193,20 +218,28 @@ class PluginEngine(Borg):
         if not plugins:
             plugins = self.get_plugins("inactive")
         for plugin in plugins:
+            if not plugin.enabled:
+                continue
+            # import the plugin module now that it is actually needed
+            plugin.load()
             # activate enabled plugins without errors
-            if plugin.enabled and not plugin.error:
-                # activate the plugin
-                plugin.active = True
-                for api in self.plugin_apis:
-                    if hasattr(plugin.instance, "activate"):
-                        plugin.instance.activate(api)
-                    if api.is_editor():
-                        if hasattr(plugin.instance, "onTaskOpened"):
-                            plugin.instance.onTaskOpened(api)
-                        # also refresh the content of the task
-                        tv = api.get_ui().get_textview()
-                        if tv:
-                            tv.on_modified(None)
+            if not plugin.error:
+                with profiler.span(plugin.module_name, 'plugins'):
+                    self._activate_plugin(plugin)
+
+    def _activate_plugin(self, plugin):
+        """Activate a loaded plugin on all registered apis."""
+        plugin.active = True
+        for api in self.plugin_apis:
+            if hasattr(plugin.instance, "activate"):
+                plugin.instance.activate(api)
+            if api.is_editor():
+                if hasattr(plugin.instance, "onTaskOpened"):
+                    plugin.instance.onTaskOpened(api)
+                # also refresh the content of the task
+                tv = api.get_ui().get_textview()
+                if tv:
+                    tv.on_modified(None)
 
     def deactivate_plugins(self, plugins=[]):
         """Deactivate plugins."""
@@ -235,6 +268,10 @@ class PluginEngine(Borg):
                     if hasattr(plugin.instance, "onQuit"):
                         plugin.instance.onQuit(api)
 
+        # Write what the plugins saved while deactivating or quitting
+        for api in self.plugin_apis:
+            api.flush_configuration()
+
     def onTaskLoad(self, plugin_api):
         """Pass the onTaskLoad signal to all active plugins."""
         for plugin in self.get_plugins("active"):
@@ -0,0 +1,139 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Startup timeline profiler (gtg --profile-startup=FILE).
+
+Records spans and instant events and writes them in the Chrome trace
+event format, which can be opened in chrome://tracing or Perfetto.
+All functions are no-ops unless enable() has been called.
+"""
+
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from time import perf_counter_ns
+
+log = logging.getLogger(__name__)
+
+_enabled = False
+_output_path = None
+_events = []
+_lock = threading.Lock()
+
+
+def enable(path=None):
+    """Start recording events. They are written to path by write()."""
+
+    global _enabled, _output_path
+
+    _enabled = True
+    if path:
+        _output_path = path
+
+
+def is_enabled():
+    return _enabled
+
+
+def _now():
+    """Current timestamp in microseconds."""
+
+    return perf_counter_ns() // 1000
+
+
+def _add_event(event):
+    event['pid'] = os.getpid()
+    event['tid'] = threading.get_ident()
+
+    with _lock:
+        _events.append(event)
+
+
+@contextmanager
+def span(name, category='startup', **args):
+    """Record the duration of the wrapped block."""
+
+    if not _enabled:
+        yield
+        return
+
+    start = _now()
+    try:
+        yield
+    finally:
+        event = {'name': name, 'cat': category, 'ph': 'X',
+                 'ts': start, 'dur': _now() - start}
+
+        if args:
+            event['args'] = args
+
+        _add_event(event)
+
+
+def instant(name, category='startup', **args):
+    """Record a single point in time."""
+
+    if not _enabled:
+        return
+
+    event = {'name': name, 'cat': category, 'ph': 'i', 's': 'p',
+             'ts': _now()}
+
+    if args:
+        event['args'] = args
+
+    _add_event(event)
+
+
+def write(path=None):
+    """Write the recorded timeline and stop recording.
+
+    Returns the path written to, or None.
+    """
+
+    global _enabled
+
+    path = path or _output_path
+
+    if not _enabled or not path:
+        return None
+
+    _enabled = False
+
+    with _lock:
+        events = list(_events)
+        _events.clear()
+
+    threads = {t.ident: t.name for t in threading.enumerate()}
+    for tid in {e['tid'] for e in events}:
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(),
+                       'tid': tid,
+                       'args': {'name': threads.get(tid, str(tid))}})
+
+    try:
+        with open(path, 'w') as stream:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'},
+                      stream)
+    except OSError:
+        log.exception('Could not write startup profile to %s', path)
+        return None
+
+    log.info('Startup profile written to %s', path)
+    return path
@@ -0,0 +1,721 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Answer questions about the tasks of the running instance.
+
+Other programs connect to a Unix socket and send requests as JSON, one per
+line, like JSON-RPC:
+
+    {"id": 1, "method": "search", "params": {"query": "@work"}}
+
+and get one line back for each:
+
+    {"id": 1, "result": {"total": 1, "tasks": [...]}}
+    {"id": 2, "error": {"code": -32602, "message": "..."}}
+
+Methods:
+
+- search: tasks matching a query of GTG.core.search, with a status
+  ("active" by default), a sort key of SORT_KEYS, offset and limit.
+- get: tasks by id, null for unknown ones.
+- subscribe/unsubscribe: after subscribing, changes come as
+  {"method": "changed", "params": {"changed": [ids], "removed": [ids]}}.
+- batch: a list of operations ("new", "update" or "delete"), checked
+  first and then applied together, or not at all.
+
+The service works on the requester, like the UI: answers are the tasks
+the UI shows, and changes made by batch go through the same methods of
+GTG.core.task.Task as edits in the UI, so they are saved by the backends.
+
+Connections are handled in threads, but requests are run in the main loop,
+where the datastore lives. See QueryClient for a client.
+"""
+
+import inspect
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+from collections import deque
+from typing import Any, Callable, Iterable, List, Optional
+
+from gi.repository import GLib
+
+from GTG.core.dates import Date
+from GTG.core.search import InvalidQuery, parse_search_query, search_filter
+from GTG.core.task import DisabledSyncCtx, Task
+from GTG.core.tasks2 import date_sort_key, pack_date
+
+log = logging.getLogger(__name__)
+
+# Error codes, as in JSON-RPC
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+#: Statuses of the tasks picked by the status parameter of search
+STATUSES = {
+    'active': (Task.STA_ACTIVE,),
+    'done': (Task.STA_DONE,),
+    'dismissed': (Task.STA_DISMISSED,),
+    'closed': (Task.STA_DONE, Task.STA_DISMISSED),
+    'all': None,
+}
+
+#: Sort keys of the sort parameter of search. Real dates come first, then
+#: fuzzy ones, then missing ones.
+SORT_KEYS = {
+    'added': lambda t: date_sort_key(pack_date(t.get_added_date())),
+    'modified': lambda t: date_sort_key(pack_date(t.get_modified())),
+    'due': lambda t: date_sort_key(pack_date(t.get_due_date())),
+    'start': lambda t: date_sort_key(pack_date(t.get_start_date())),
+    'closed': lambda t: date_sort_key(pack_date(t.get_closed_date())),
+    'title': lambda t: t.get_title().casefold(),
+}
+
+#: Longest request accepted, in bytes
+MAX_REQUEST = 16 * 1024 * 1024
+
+
+class QueryError(Exception):
+    """Error of a request, sent back to the client."""
+
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+def task_to_json(task: Task) -> dict:
+    """Fields of a task, as sent to clients."""
+
+    parents = task.get_parents()
+
+    return {
+        'id': task.get_id(),
+        'parent': parents[0] if parents else None,
+        'children': task.get_children(),
+        'title': task.get_title(),
+        'status': task.get_status(),
+        'tags': task.get_tags_name(),
+        'added': str(task.get_added_date()),
+        'modified': str(Date(task.get_modified())),
+        'start': str(task.get_start_date()),
+        'due': str(task.get_due_date()),
+        'closed': str(task.get_closed_date()),
+        'content': task.get_text(),
+    }
+
+
+def call_in_main_loop(func: Callable[[], Any]) -> Any:
+    """Run a function in the main loop, and wait for its result."""
+
+    done = threading.Event()
+    outcome = {}
+
+    def run():
+        try:
+            outcome['result'] = func()
+        except Exception as error:
+            outcome['error'] = error
+
+        done.set()
+        return GLib.SOURCE_REMOVE
+
+    GLib.idle_add(run)
+    done.wait()
+
+    if 'error' in outcome:
+        raise outcome['error']
+
+    return outcome['result']
+
+
+# ------------------------------------------------------------------------------
+# CONNECTIONS
+# ------------------------------------------------------------------------------
+
+class _Connection:
+    """A client, with a thread reading its requests and one writing to it.
+
+    Responses and notifications are queued, so a slow client never blocks
+    the main loop.
+    """
+
+    def __init__(self, service: 'QueryService', sock: socket.socket) -> None:
+        self.service = service
+        self.sock = sock
+        self.outgoing: queue.Queue = queue.Queue()
+
+        threading.Thread(target=self._read, daemon=True).start()
+        threading.Thread(target=self._write, daemon=True).start()
+
+
+    def send(self, message: dict) -> None:
+        self.outgoing.put(json.dumps(message).encode('utf-8') + b'\n')
+
+
+    def close(self) -> None:
+        self.outgoing.put(None)
+
+
+    def _read(self) -> None:
+        stream = self.sock.makefile('rb')
+
+        try:
+            while True:
+                line = stream.readline(MAX_REQUEST)
+
+                if not line:
+                    break
+
+                if line.strip():
+                    self.send(self.service.handle_line(self, line))
+        except OSError as error:
+            log.debug('Query client went away: %r', error)
+        finally:
+            stream.close()
+            self.service.dispatch(lambda: self.service.forget(self))
+            self.close()
+
+
+    def _write(self) -> None:
+        while True:
+            data = self.outgoing.get()
+
+            if data is None:
+                break
+
+            try:
+                self.sock.sendall(data)
+            except OSError:
+                break
+
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+        self.sock.close()
+
+
+# ------------------------------------------------------------------------------
+# SERVICE
+# ------------------------------------------------------------------------------
+
+class QueryService:
+    """Serve requests about the tasks of a requester on a Unix socket.
+
+    dispatch runs a function where the requester can be used, and returns
+    its result. By default, that's the main loop.
+    """
+
+    def __init__(self, requester, path: str,
+                 dispatch: Callable[[Callable[[], Any]], Any] = None) -> None:
+        self.req = requester
+        self.path = path
+        self.dispatch = dispatch or call_in_main_loop
+
+        self._socket: Optional[socket.socket] = None
+        self._connections: List[_Connection] = []
+        self._subscribers: List[_Connection] = []
+
+        # Ids of the tasks changed by the running batch, None out of batches
+        self._batch_ids: Optional[set] = None
+
+        self.methods = {
+            'search': self.search,
+            'get': self.get,
+            'subscribe': self.subscribe,
+            'unsubscribe': self.unsubscribe,
+            'batch': self.batch,
+        }
+
+        tasks_tree = requester.get_main_view()
+        tasks_tree.register_cllbck('node-added', self._on_task_changed)
+        tasks_tree.register_cllbck('node-modified', self._on_task_changed)
+        tasks_tree.register_cllbck('node-deleted', self._on_task_changed)
+
+
+    def start(self) -> None:
+        """Listen on the socket, in a thread."""
+
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+        if os.path.exists(self.path):
+            if self._is_listening():
+                raise OSError(f'Query service already running at {self.path}')
+
+            # Left by an instance that crashed
+            os.unlink(self.path)
+
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.bind(self.path)
+        os.chmod(self.path, 0o600)
+        self._socket.listen()
+
+        threading.Thread(target=self._accept, args=(self._socket,),
+                         daemon=True).start()
+        log.info('Query service listening at %s', self.path)
+
+
+    def stop(self) -> None:
+        """Close the socket and all connections."""
+
+        if self._socket is None:
+            return
+
+        # Closing doesn't wake up accept(), shutting it down does
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+        self._socket.close()
+        self._socket = None
+
+        for connection in self._connections:
+            connection.close()
+
+        self._connections.clear()
+        self._subscribers.clear()
+
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+    def _is_listening(self) -> bool:
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        try:
+            probe.connect(self.path)
+        except OSError:
+            return False
+        finally:
+            probe.close()
+
+        return True
+
+
+    def _accept(self, server: socket.socket) -> None:
+        while True:
+            try:
+                sock, _address = server.accept()
+            except OSError:
+                # The service stopped
+                return
+
+            self.dispatch(lambda: self._connections.append(
+                _Connection(self, sock)))
+
+
+    def forget(self, connection: _Connection) -> None:
+        """Stop sending anything to a connection."""
+
+        for connections in (self._connections, self._subscribers):
+            if connection in connections:
+                connections.remove(connection)
+
+
+    def _on_task_changed(self, tid, path=None) -> None:
+        if self._batch_ids is not None:
+            self._batch_ids.add(tid)
+        else:
+            self._notify([tid])
+
+
+    def _notify(self, ids: Iterable[str]) -> None:
+        if not self._subscribers:
+            return
+
+        ids = set(ids)
+        changed = sorted(tid for tid in ids if self.req.has_task(tid))
+        removed = sorted(ids.difference(changed))
+
+        message = {'method': 'changed',
+                   'params': {'changed': changed, 'removed': removed}}
+
+        for connection in self._subscribers:
+            connection.send(message)
+
+
+    # --------------------------------------------------------------------------
+    # REQUESTS
+    # --------------------------------------------------------------------------
+
+    def handle_line(self, connection: _Connection, line: bytes) -> dict:
+        """Get the response to a line sent by a client."""
+
+        try:
+            request = json.loads(line)
+        except ValueError as error:
+            return {'id': None, 'error': {'code': PARSE_ERROR,
+                                          'message': str(error)}}
+
+        if not isinstance(request, dict):
+            return {'id': None, 'error': {'code': INVALID_REQUEST,
+                                          'message': 'Expected an object'}}
+
+        request_id = request.get('id')
+
+        try:
+            method = self.methods.get(request.get('method'))
+
+            if method is None:
+                raise QueryError(METHOD_NOT_FOUND,
+                                 f'Unknown method {request.get("method")!r}')
+
+            params = request.get('params') or {}
+
+            if not isinstance(params, dict):
+                raise QueryError(INVALID_PARAMS, 'Expected named params')
+
+            try:
+                inspect.signature(method).bind(connection, **params)
+            except TypeError as error:
+                raise QueryError(INVALID_PARAMS, str(error))
+
+            result = self.dispatch(lambda: method(connection, **params))
+        except QueryError as error:
+            return {'id': request_id,
+                    'error': {'code': error.code, 'message': str(error)}}
+        except Exception as error:
+            log.exception('Query failed: %r', request)
+            return {'id': request_id,
+                    'error': {'code': INTERNAL_ERROR, 'message': str(error)}}
+
+        return {'id': request_id, 'result': result}
+
+
+    def search(self, connection, query: str = None, status: str = 'active',
+               sort: str = 'added', offset: int = 0,
+               limit: Optional[int] = None) -> dict:
+        """Find tasks, sorted by sort."""
+
+        if status not in STATUSES:
+            raise QueryError(INVALID_PARAMS, f'Unknown status {status!r}')
+
+        if sort not in SORT_KEYS:
+            raise QueryError(INVALID_PARAMS, f'Unknown sort key {sort!r}')
+
+        parameters = None
+
+        if query:
+            try:
+                parameters = parse_search_query(query)
+            except InvalidQuery as error:
+                raise QueryError(INVALID_PARAMS, f'Invalid query: {error}')
+
+        statuses = STATUSES[status]
+        tasks = []
+
+        for tid in self.req.get_main_view().get_all_nodes():
+            task = self.req.get_task(tid)
+
+            if task is None:
+                continue
+
+            if statuses is not None and task.get_status() not in statuses:
+                continue
+
+            if parameters and not search_filter(task, parameters):
+                continue
+
+            tasks.append(task)
+
+        key = SORT_KEYS[sort]
+        tasks.sort(key=lambda task: (key(task), task.get_id()))
+        stop = None if limit is None else offset + limit
+
+        return {'total': len(tasks),
+                'tasks': [task_to_json(task) for task in tasks[offset:stop]]}
+
+
+    def get(self, connection, ids: List[str]) -> dict:
+        """Get tasks by id."""
+
+        if not isinstance(ids, list):
+            raise QueryError(INVALID_PARAMS, 'Expected a list of ids')
+
+        tasks = [self.req.get_task(tid) if isinstance(tid, str) else None
+                 for tid in ids]
+
+        return {'tasks': [task_to_json(t) if t else None for t in tasks]}
+
+
+    def subscribe(self, connection) -> dict:
+        if connection not in self._subscribers:
+            self._subscribers.append(connection)
+
+        return {'subscribed': True}
+
+
+    def unsubscribe(self, connection) -> dict:
+        if connection in self._subscribers:
+            self._subscribers.remove(connection)
+
+        return {'subscribed': False}
+
+
+    # --------------------------------------------------------------------------
+    # CHANGES
+    # --------------------------------------------------------------------------
+
+    def batch(self, connection, operations: List[dict]) -> dict:
+        """Check all operations, then apply them one after the other.
+
+        Subscribers get a single notification for the whole batch. Returns
+        the ids of the tasks created by "new" operations.
+        """
+
+        if not isinstance(operations, list):
+            raise QueryError(INVALID_PARAMS, 'Expected a list of operations')
+
+        changes = [self._prepare(i, op) for i, op in enumerate(operations)]
+        created = []
+        self._batch_ids = set()
+
+        try:
+            for change in changes:
+                tid = change()
+
+                if tid is not None:
+                    created.append(tid)
+        finally:
+            ids, self._batch_ids = self._batch_ids, None
+
+            if ids:
+                self._notify(ids)
+
+        return {'created': created}
+
+
+    def _prepare(self, index: int, operation: Any) -> Callable:
+        """Check an operation and get a function applying it."""
+
+        def fail(message: str):
+            raise QueryError(INVALID_PARAMS, f'Operation {index}: {message}')
+
+        if not isinstance(operation, dict):
+            fail('expected an object')
+
+        operation = dict(operation)
+        kind = operation.pop('op', None)
+
+        def existing(key: str, required: bool = True) -> Optional[Task]:
+            tid = operation.pop(key, None)
+
+            if tid is None and not required:
+                return None
+
+            task = self.req.get_task(tid) if isinstance(tid, str) else None
+
+            if task is None:
+                fail(f'no task {tid!r}')
+
+            return task
+
+        def date(key: str) -> Optional[Date]:
+            if key not in operation:
+                return None
+
+            value = operation.pop(key)
+
+            try:
+                return Date.parse(value) if value else Date.no_date()
+            except (ValueError, TypeError, AttributeError):
+                fail(f'{key} is not a date: {value!r}')
+
+        def tag_names(key: str) -> List[str]:
+            names = operation.pop(key, [])
+
+            if not isinstance(names, list):
+                fail(f'{key} should be a list')
+
+            # Tags of old core tasks keep their @
+            return ['@' + str(name).lstrip('@') for name in names]
+
+        if kind == 'delete':
+            task = existing('id')
+        elif kind == 'new':
+            parent = existing('parent', required=False)
+
+            if not isinstance(operation.get('title'), str):
+                fail('new tasks need a title')
+        elif kind == 'update':
+            task = existing('id')
+        else:
+            fail(f'unknown op {kind!r}')
+
+        if kind != 'delete':
+            status = operation.pop('status', None)
+
+            if status is not None and status not in (Task.STA_ACTIVE,
+                                                     Task.STA_DONE,
+                                                     Task.STA_DISMISSED):
+                fail(f'unknown status {status!r}')
+
+            changes = {
+                'title': operation.pop('title', None),
+                'content': operation.pop('content', None),
+                'status': status,
+                'due': date('due'),
+                'start': date('start'),
+                'add_tags': tag_names('tags' if kind == 'new'
+                                      else 'add_tags'),
+                'remove_tags': tag_names('remove_tags'),
+            }
+
+        if operation:
+            fail(f'unknown fields {sorted(operation)}')
+
+        if kind == 'delete':
+            def apply():
+                # Deleting its parent might have removed it already
+                if self.req.has_task(task.get_id()):
+                    self.req.delete_task(task.get_id())
+
+        elif kind == 'new':
+            def apply():
+                new = self.req.new_task(newtask=True)
+
+                if parent is not None:
+                    parent.add_child(new.get_id())
+
+                new.set_to_keep()
+                self._update(new, **changes)
+                return new.get_id()
+
+        else:
+            def apply():
+                self._update(task, **changes)
+
+        return apply
+
+
+    def _update(self, task: Task, title, content, status, due, start,
+                add_tags, remove_tags) -> None:
+        # Synced once at the end, like the editor does
+        with DisabledSyncCtx(task):
+            if title is not None:
+                task.set_title(title)
+
+            if content is not None:
+                task.set_text(content)
+
+            if due is not None:
+                task.set_due_date(due)
+
+            if start is not None:
+                task.set_start_date(start)
+
+            for name in add_tags:
+                task.add_tag(name)
+
+            for name in remove_tags:
+                task.remove_tag(name)
+
+            if status is not None and status != task.get_status():
+                task.set_status(status)
+
+
+# ------------------------------------------------------------------------------
+# CLIENT
+# ------------------------------------------------------------------------------
+
+class QueryClient:
+    """Talk to a QueryService.
+
+    Notifications received while waiting for a response are kept for
+    notifications().
+    """
+
+    def __init__(self, path: str, timeout: Optional[float] = None) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+
+        self._stream = self.sock.makefile('rb')
+        self._next_id = 0
+        self._pending: deque = deque()
+
+
+    def close(self) -> None:
+        self._stream.close()
+        self.sock.close()
+
+
+    def __enter__(self) -> 'QueryClient':
+        return self
+
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+    def _receive(self) -> dict:
+        line = self._stream.readline()
+
+        if not line:
+            raise ConnectionError('Query service closed the connection')
+
+        return json.loads(line)
+
+
+    def call(self, method: str, **params) -> Any:
+        """Send a request and wait for its result.
+
+        Raises QueryError if the request failed.
+        """
+
+        self._next_id += 1
+        request = {'id': self._next_id, 'method': method, 'params': params}
+        self.sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+
+        while True:
+            message = self._receive()
+
+            if 'method' in message:
+                self._pending.append(message)
+            elif message.get('id') == self._next_id:
+                break
+
+        if 'error' in message:
+            raise QueryError(message['error']['code'],
+                             message['error']['message'])
+
+        return message['result']
+
+
+    def notifications(self) -> Iterable[dict]:
+        """Yield the params of notifications, as they come."""
+
+        while True:
+            while self._pending:
+                yield self._pending.popleft()['params']
+
+            message = self._receive()
+
+            if 'method' in message:
+                yield message['params']
@@ -0,0 +1,248 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Recurrence rules of recurring tasks.
+
+A recurring term ('day', 'week', 'monday', '15', '0314'...) is compiled
+once into a rule. Rules find the first occurrence after any date
+directly, without going through the ones in between.
+"""
+
+import calendar
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from gettext import gettext as _
+from typing import Dict, Optional
+
+from GTG.core.dates import Date
+
+__all__ = ['Rule', 'compile_term']
+
+
+def _clamped(year: int, month: int, day: int) -> date:
+    """Get a date, using the last day of the month if day is past it."""
+
+    return date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+class Rule:
+    """The dates a task recurs on."""
+
+    __slots__ = []
+
+
+    def next_after(self, day: date, anchor: date) -> Optional[date]:
+        """Get the first occurrence after day.
+
+        anchor is a known occurrence (usually the due date), for rules that
+        depend on where they started like 'other-day' or 'month'.
+        """
+
+        raise NotImplementedError
+
+
+    def next_occurrence(self, due: date, today: date) -> Optional[date]:
+        """Get the next due date of a task due on a given day.
+
+        This is the first occurrence after the due date, or if the task is
+        overdue, the first one from today on.
+        """
+
+        return self.next_after(max(due, today - timedelta(days=1)), due)
+
+
+    def __eq__(self, other) -> bool:
+        return (type(self) is type(other)
+                and all(getattr(self, s) == getattr(other, s)
+                        for s in self.__slots__))
+
+
+    def __hash__(self) -> int:
+        return hash((type(self),) + tuple(getattr(self, s)
+                                          for s in self.__slots__))
+
+
+    def __repr__(self) -> str:
+        args = ', '.join(repr(getattr(self, s)) for s in self.__slots__)
+        return f'{type(self).__name__}({args})'
+
+
+class Every(Rule):
+    """Every few days, counted from the anchor."""
+
+    __slots__ = ['days']
+
+
+    def __init__(self, days: int) -> None:
+        self.days = days
+
+
+    def next_after(self, day: date, anchor: date) -> date:
+        periods = (day - anchor).days // self.days + 1
+        return anchor + timedelta(days=periods * self.days)
+
+
+class Weekly(Rule):
+    """On a day of the week (0 is Monday)."""
+
+    __slots__ = ['weekday']
+
+
+    def __init__(self, weekday: int) -> None:
+        self.weekday = weekday
+
+
+    def next_after(self, day: date, anchor: date) -> date:
+        return day + timedelta(days=(self.weekday - day.weekday() - 1) % 7 + 1)
+
+
+class Monthly(Rule):
+    """On a day of the month, or on the day of the anchor.
+
+    In shorter months, the last day of the month is used instead.
+    """
+
+    __slots__ = ['day']
+
+
+    def __init__(self, day: Optional[int] = None) -> None:
+        self.day = day
+
+
+    def next_after(self, day: date, anchor: date) -> date:
+        mday = self.day or anchor.day
+        result = _clamped(day.year, day.month, mday)
+
+        if result <= day:
+            year, month = divmod(day.year * 12 + day.month, 12)
+            result = _clamped(year, month + 1, mday)
+
+        return result
+
+
+class Yearly(Rule):
+    """On a day of the year, or on the day of the anchor.
+
+    February 29 falls on February 28 in other years.
+    """
+
+    __slots__ = ['month', 'day']
+
+
+    def __init__(self, month: Optional[int] = None,
+                 day: Optional[int] = None) -> None:
+        self.month = month
+        self.day = day
+
+
+    def next_after(self, day: date, anchor: date) -> date:
+        month = self.month or anchor.month
+        mday = self.day or anchor.day
+        result = _clamped(day.year, month, mday)
+
+        if result <= day:
+            result = _clamped(day.year + 1, month, mday)
+
+        return result
+
+
+class Once(Rule):
+    """A single date, given in full."""
+
+    __slots__ = ['date']
+
+
+    def __init__(self, when: date) -> None:
+        self.date = when
+
+
+    def next_after(self, day: date, anchor: date) -> Optional[date]:
+        return self.date if self.date > day else None
+
+
+@lru_cache(maxsize=1)
+def _named_rules() -> Dict[str, Rule]:
+    """Rules for terms given by name, in English and the current locale."""
+
+    rules = {}
+
+    for english, local, rule in (
+            ('day', _('day'), Every(1)),
+            ('other-day', _('other-day'), Every(2)),
+            ('week', _('week'), Every(7)),
+            ('month', _('month'), Monthly()),
+            ('year', _('year'), Yearly())):
+
+        rules[english] = rule
+        rules[local.lower()] = rule
+
+    for weekday, (english, local) in enumerate((
+            ('monday', _('Monday')),
+            ('tuesday', _('Tuesday')),
+            ('wednesday', _('Wednesday')),
+            ('thursday', _('Thursday')),
+            ('friday', _('Friday')),
+            ('saturday', _('Saturday')),
+            ('sunday', _('Sunday')))):
+
+        rules[english] = rules[local.lower()] = Weekly(weekday)
+
+    return rules
+
+
+@lru_cache(maxsize=256)
+def compile_term(term: str) -> Rule:
+    """Get the rule of a recurring term.
+
+    Terms are the same as Date.parse_from_date() takes. Raises ValueError
+    for terms that aren't a valid recurrence.
+    """
+
+    term = (term or '').lower()
+
+    try:
+        rule = _named_rules()[term]
+    except KeyError:
+        pass
+    else:
+        return rule
+
+    # Day of the month, like 15
+    if term.isdigit() and not term.startswith('0') and 1 <= int(term) <= 31:
+        return Monthly(int(term))
+
+    for fmt in ('%Y/%m/%d', '%Y%m%d', '%m%d'):
+        try:
+            parsed = datetime.strptime(term, fmt).date()
+        except ValueError:
+            continue
+
+        if fmt == '%m%d':
+            return Yearly(parsed.month, parsed.day)
+
+        return Once(parsed)
+
+    try:
+        value = Date(term)
+    except ValueError:
+        value = None
+
+    if value and not value.is_fuzzy():
+        return Once(value.date())
+
+    raise ValueError(f"Invalid recurring term '{term}'")
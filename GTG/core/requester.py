@@ -142,7 +142,38 @@ class Requester(GObject.GObject):
         """
         # send the signal before actually deleting the task !
         log.debug("deleting task %s", tid)
-        return self.__basetree.del_node(tid, recursive=recursive)
+        task = self.get_task(tid)
+        related = task.get_parents() + task.get_children() if task else []
+        result = self.__basetree.del_node(tid, recursive=recursive)
+        # Parents and orphaned children have different dates now
+        for related_id in related:
+            related_task = self.get_task(related_id)
+            if related_task is not None:
+                related_task.clear_date_cache()
+        return result
+
+    def get_tasks_modified_between(self, start, end):
+        """
+        Returns ids of the tasks last modified from start (a datetime, or
+        None for the beginning) to end (excluded), oldest first.
+        """
+        return self.ds.get_modified_index().between(start, end)
+
+    def get_tasks_closed_before(self, days):
+        """
+        Returns ids of the closed tasks closed more than days ago, or None
+        when the datastore has no date columns (NumPy is missing).
+        """
+        columns = self.ds.get_date_columns()
+        return None if columns is None else columns.closed_before(days)
+
+    def get_tasks_done_since(self, days):
+        """
+        Returns ids of the done tasks closed in the last days, or None
+        when the datastore has no date columns (NumPy is missing).
+        """
+        columns = self.ds.get_date_columns()
+        return None if columns is None else columns.done_since(days)
 
     def get_task_id(self, task_title):
         """ Heuristic which convert task_title to a task_id
@@ -268,6 +299,16 @@ class Requester(GObject.GObject):
     def save_datastore(self, quit=False):
         return self.ds.save(quit)
 
+    # Statistics ########################
+    def get_statistics(self):
+        """ Returns the statistics about tasks, see GTG.core.statistics """
+        return self.ds.get_statistics()
+
+    def rebuild_statistics(self):
+        """ Computes the statistics again from all the tasks """
+        tasks = [self.get_task(tid) for tid in self.__basetree.get_all_nodes()]
+        self.ds.get_statistics().rebuild(tasks)
+
     # Config ############################
     def get_config(self, system):
         """ Returns configuration object for subsytem, e.g. browser """
@@ -276,3 +317,7 @@ class Requester(GObject.GObject):
     def get_task_config(self, task_id):
         """ Returns configuration object for task """
         return self._config.get_task_config(task_id)
+
+    def save_config(self):
+        """ Write pending configuration changes to disk """
+        self._config.flush()
@@ -19,24 +19,22 @@
 """Everything related to saved searches."""
 
 
-from gi.repository import GObject
-
 from uuid import uuid4, UUID
-from typing import Optional
+from typing import Iterator, Optional
 import logging
 
-from lxml.etree import Element, SubElement
+from lxml.etree import Element
 
-from GTG.core.base_store import BaseStore
+from GTG.core.base_store import BaseStore, ItemList
 
 log = logging.getLogger(__name__)
 
 
-class SavedSearch(GObject.Object):
+class SavedSearch:
     """A saved search."""
 
-    __gtype_name__ = 'gtg_SavedSearch'
-    __slots__ = ['id', 'name', 'query', 'icon', 'children']
+    __slots__ = ['id', 'name', 'query', 'icon', 'children', 'parent',
+                 '__weakref__']
 
 
     def __init__(self, id: UUID, name: str, query: str) -> None:
@@ -45,7 +43,7 @@ class SavedSearch(GObject.Object):
         self.query = query
 
         self.icon = None
-        self.children = []
+        self.children = ItemList()
         self.parent = None
 
 
@@ -76,6 +74,9 @@ class SavedSearchStore(BaseStore):
     #: Tag to look for in XML
     XML_TAG = 'savedSearch'
 
+    #: Tag of the element holding all searches
+    XML_ROOT = 'searchlist'
+
 
     def __str__(self) -> str:
         """String representation."""
@@ -125,7 +126,14 @@ class SavedSearchStore(BaseStore):
     def to_xml(self) -> Element:
         """Save searches to an LXML element."""
 
-        root = Element('searchlist')
+        root = Element(self.XML_ROOT)
+        root.extend(self.xml_elements())
+
+        return root
+
+
+    def xml_elements(self) -> Iterator[Element]:
+        """Serialize searches one by one."""
 
         parent_map = {}
 
@@ -134,7 +142,7 @@ class SavedSearchStore(BaseStore):
                 parent_map[child.id] = search.name
 
         for search in self.lookup.values():
-            element = SubElement(root, self.XML_TAG)
+            element = Element(self.XML_TAG)
             element.set('id', str(search.id))
             element.set('name', search.name)
             element.set('query', search.query)
@@ -145,7 +153,7 @@ class SavedSearchStore(BaseStore):
                 # Toplevel search
                 pass
 
-        return root
+            yield element
 
 
     def new(self, name: str, query: str, parent: UUID = None) -> SavedSearch:
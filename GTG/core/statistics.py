@@ -0,0 +1,453 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Statistics about tasks, kept up to date as tasks change.
+
+Tasks done per day and lead times (from adding a task to marking it as
+done) are updated from status changes, and saved to a small file a few
+minutes after they change. The open backlog is followed as tasks are
+added and removed.
+
+Going through all tasks only happens in rebuild(), which is also how
+changes made while GTG wasn't running (or to the dates of closed tasks)
+are taken into account.
+"""
+
+import json
+import logging
+import os
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from gi.repository import GLib
+
+log = logging.getLogger(__name__)
+
+#: Days of history kept for tasks done per day
+HISTORY_DAYS = 2 * 365
+
+#: Upper bounds of the backlog age buckets, in days
+AGE_BUCKETS = (7, 30, 90, 365)
+
+#: Changes are written at most this often, in seconds
+SAVE_INTERVAL = 5 * 60
+
+FILE_VERSION = 1
+
+Counted = Tuple[int, Optional[int], Tuple[str, ...]]
+
+# Same values as in GTG.core.task.Task, which can't be imported from here
+STA_ACTIVE = 'Active'
+STA_DONE = 'Done'
+
+
+def _day(value) -> Optional[int]:
+    """Get the day ordinal of a GTG date, None when it has no real date."""
+
+    if not value or value.is_fuzzy():
+        return None
+
+    return value.date().toordinal()
+
+
+class Statistics:
+    """Rolling aggregates about tasks."""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+
+        # Day ordinal to number of tasks done that day
+        self._done: Counter = Counter()
+
+        # Tag to [tasks, total days] of done tasks, and the same for all
+        # tasks (with or without tags) under the None key
+        self._lead: Dict[Optional[str], List[int]] = {}
+
+        # Closed day, added day and tags of done tasks, as they were counted
+        self._counted: Dict[str, Counted] = {}
+
+        # Open tasks and the day they were added on, and the number of open
+        # tasks added on each day
+        self._open: Dict[str, Optional[int]] = {}
+        self._open_days: Counter = Counter()
+
+        self.since = date.today()
+        self._save_timeout = None
+
+        # Whether aggregates were read from a file
+        self.loaded = False
+
+        if path:
+            self.load()
+
+
+    # --------------------------------------------------------------------------
+    # UPDATES
+    # --------------------------------------------------------------------------
+
+    def _open_task(self, tid: str, added: Optional[int]) -> None:
+        if tid in self._open:
+            return
+
+        self._open[tid] = added
+        self._open_days[added] += 1
+
+
+    def _close_task(self, tid: str) -> None:
+        try:
+            added = self._open.pop(tid)
+        except KeyError:
+            return
+
+        self._open_days[added] -= 1
+
+        if not self._open_days[added]:
+            del self._open_days[added]
+
+
+    def _counted_values(self, task) -> Optional[Counted]:
+        closed = _day(task.get_closed_date())
+
+        if closed is None:
+            return None
+
+        return (closed, _day(task.get_added_date()),
+                tuple(task.get_tags_name()))
+
+
+    def _count_done(self, task) -> None:
+        """Add a done task to the aggregates."""
+
+        counted = self._counted_values(task)
+
+        if counted:
+            self._counted[task.get_id()] = counted
+            self._update_done(*counted, 1)
+
+
+    def _uncount_done(self, task) -> None:
+        """Take a done task back from the aggregates, as it was counted."""
+
+        counted = (self._counted.pop(task.get_id(), None)
+                   or self._counted_values(task))
+
+        if counted:
+            self._update_done(*counted, -1)
+
+
+    def _update_done(self, closed: int, added: Optional[int],
+                     tags: Tuple[str, ...], sign: int) -> None:
+        """Add (or take back, with a negative sign) to the aggregates."""
+
+        self._done[closed] += sign
+
+        if self._done[closed] <= 0:
+            del self._done[closed]
+
+        if added is None:
+            return
+
+        days = max(closed - added, 0)
+
+        for key in (None,) + tags:
+            lead = self._lead.setdefault(key, [0, 0])
+            lead[0] += sign
+            lead[1] += sign * days
+
+            if lead[0] <= 0:
+                del self._lead[key]
+
+
+    def task_added(self, task) -> None:
+        """Follow a task added to the datastore."""
+
+        status = task.get_status()
+
+        if status == STA_ACTIVE:
+            self._open_task(task.get_id(), _day(task.get_added_date()))
+        elif status == STA_DONE:
+            # Already in the history, remember how in case it changes
+            counted = self._counted_values(task)
+
+            if counted:
+                self._counted[task.get_id()] = counted
+
+
+    def task_removed(self, tid: str) -> None:
+        """Stop following a task. What it was done stays in the history."""
+
+        self._close_task(tid)
+        self._counted.pop(tid, None)
+
+
+    def status_changed(self, task, old_status: str, status: str) -> None:
+        """Update the aggregates for a task going from a status to another.
+
+        The signal comes after the change, so the task already has its new
+        closed date.
+        """
+
+        # Marking a done task as done again moves its closed date
+        if old_status == status and status != STA_DONE:
+            return
+
+        if old_status == STA_DONE:
+            self._uncount_done(task)
+
+        if status == STA_DONE:
+            self._count_done(task)
+
+        if status == STA_ACTIVE:
+            self._open_task(task.get_id(), _day(task.get_added_date()))
+        else:
+            self._close_task(task.get_id())
+
+        self._queue_save()
+
+
+    def rebuild(self, tasks: Iterable) -> None:
+        """Compute everything again from all the tasks."""
+
+        self._done.clear()
+        self._lead.clear()
+        self._counted.clear()
+        self._open.clear()
+        self._open_days.clear()
+
+        for task in tasks:
+            if task.get_status() == STA_DONE:
+                self._count_done(task)
+            else:
+                self.task_added(task)
+
+        self.since = date.today()
+        self._queue_save()
+
+
+    def add_history(self, day: date, done: int) -> None:
+        """Count at least done tasks on a day, known from elsewhere.
+
+        For counts kept before the statistics, like the streak of the
+        gamify plugin. Tasks deleted since can't be found by rebuild().
+        """
+
+        ordinal = day.toordinal()
+
+        if self._done.get(ordinal, 0) < done:
+            self._done[ordinal] = done
+            self._queue_save()
+
+
+    # --------------------------------------------------------------------------
+    # SIGNALS
+    # --------------------------------------------------------------------------
+
+    def connect(self, requester, tasks_tree) -> None:
+        """Follow the changes of the tasks of a datastore."""
+
+        self._requester = requester
+
+        requester.connect('status-changed', self._on_status_changed)
+        tasks_tree.register_cllbck('node-added', self._on_task_added)
+        tasks_tree.register_cllbck('node-deleted', self._on_task_deleted)
+
+
+    def _on_status_changed(self, sender, tid, old_status, status) -> None:
+        # Emitted from an idle callback, the task might be gone already
+        if self._requester.has_task(tid):
+            self.status_changed(self._requester.get_task(tid),
+                                old_status, status)
+
+
+    def _on_task_added(self, tid, path=None) -> None:
+        self.task_added(self._requester.get_task(tid))
+
+
+    def _on_task_deleted(self, tid, path=None) -> None:
+        self.task_removed(tid)
+
+
+    # --------------------------------------------------------------------------
+    # QUERIES
+    # --------------------------------------------------------------------------
+
+    def done_on(self, day: date) -> int:
+        """Get the number of tasks done on a day."""
+
+        return self._done.get(day.toordinal(), 0)
+
+
+    def done_per_day(self, days: int = 30,
+                     today: Optional[date] = None) -> List[Tuple[date, int]]:
+        """Get the number of tasks done on each of the last days."""
+
+        today = today or date.today()
+        first = today.toordinal() - days + 1
+
+        return [(date.fromordinal(day), self._done.get(day, 0))
+                for day in range(first, first + days)]
+
+
+    def backlog(self) -> int:
+        """Get the number of open tasks."""
+
+        return len(self._open)
+
+
+    def backlog_by_age(self, today: Optional[date] = None
+                       ) -> List[Tuple[Optional[int], int]]:
+        """Count open tasks by age.
+
+        Returns (days, tasks) for each bucket of AGE_BUCKETS, with tasks
+        at most that many days old and older than the previous bucket. The
+        last bucket has None days, for older tasks and tasks without an
+        added date.
+        """
+
+        today = (today or date.today()).toordinal()
+        counts = [0] * (len(AGE_BUCKETS) + 1)
+
+        for added, count in self._open_days.items():
+            index = len(AGE_BUCKETS)
+
+            if added is not None:
+                for i, bound in enumerate(AGE_BUCKETS):
+                    if today - added <= bound:
+                        index = i
+                        break
+
+            counts[index] += count
+
+        return list(zip(AGE_BUCKETS + (None,), counts))
+
+
+    def lead_time(self, tag: Optional[str] = None) -> Optional[float]:
+        """Get the average days it took to do tasks (with a tag)."""
+
+        try:
+            count, total = self._lead[tag]
+        except KeyError:
+            return None
+
+        return total / count
+
+
+    def lead_times(self) -> Dict[str, Tuple[int, float]]:
+        """Get the number of done tasks and average lead time of each tag."""
+
+        return {tag: (count, total / count)
+                for tag, (count, total) in self._lead.items()
+                if tag is not None}
+
+
+    def streak(self, goal: int, today: Optional[date] = None) -> int:
+        """Count the days in a row at least goal tasks were done.
+
+        Today counts once the goal is reached, but the streak only breaks
+        on days before it.
+        """
+
+        day = (today or date.today()).toordinal()
+        streak = 0
+
+        if self._done.get(day, 0) >= goal:
+            streak += 1
+
+        day -= 1
+
+        while self._done.get(day, 0) >= goal:
+            streak += 1
+            day -= 1
+
+        return streak
+
+
+    # --------------------------------------------------------------------------
+    # SAVE AND LOAD
+    # --------------------------------------------------------------------------
+
+    def load(self) -> None:
+        """Read aggregates saved before, if any."""
+
+        try:
+            with open(self.path, encoding='utf-8') as stream:
+                data = json.load(stream)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as error:
+            log.warning('Ignoring statistics in %r: %r', self.path, error)
+            return
+
+        if data.get('version') != FILE_VERSION:
+            log.warning('Ignoring statistics in %r: unknown version',
+                        self.path)
+            return
+
+        self.since = date.fromordinal(data['since'])
+        self._done = Counter(dict(data['done']))
+        self._lead = {tag or None: lead for tag, lead in data['lead']}
+        self.loaded = True
+
+
+    def save(self) -> None:
+        """Write the aggregates now."""
+
+        if self._save_timeout:
+            GLib.source_remove(self._save_timeout)
+            self._save_timeout = None
+
+        if not self.path:
+            return
+
+        oldest = date.today().toordinal() - HISTORY_DAYS
+
+        for day in [d for d in self._done if d < oldest]:
+            del self._done[day]
+
+        data = {
+            'version': FILE_VERSION,
+            'since': self.since.toordinal(),
+            'done': sorted(self._done.items()),
+            'lead': [(tag or '', lead) for tag, lead in self._lead.items()],
+        }
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + '__'
+
+        with open(temp_path, 'w', encoding='utf-8') as stream:
+            json.dump(data, stream, separators=(',', ':'))
+
+        os.replace(temp_path, self.path)
+        log.debug('Saved statistics to %s', self.path)
+
+
+    def _queue_save(self) -> None:
+        """Save within SAVE_INTERVAL seconds, if not already planned."""
+
+        if self.path and not self._save_timeout:
+            self._save_timeout = GLib.timeout_add_seconds(SAVE_INTERVAL,
+                                                          self._on_timeout)
+
+
+    def _on_timeout(self) -> bool:
+        self._save_timeout = None
+        self.save()
+
+        # Don't run again, the next change plans another save
+        return False
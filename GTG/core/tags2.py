@@ -19,25 +19,23 @@
 """Everything related to tags."""
 
 
-from gi.repository import GObject
-
 from uuid import uuid4, UUID
 import logging
 import random
 
-from lxml.etree import Element, SubElement
-from typing import Any, Dict, Set
+from lxml.etree import Element
+from typing import Any, Dict, Iterator, Set
 
-from GTG.core.base_store import BaseStore
+from GTG.core.base_store import BaseStore, ItemList
 
 log = logging.getLogger(__name__)
 
 
-class Tag2(GObject.Object):
+class Tag2:
     """A tag that can be applied to a Task."""
 
-    __gtype_name__ = 'gtg_Tag'
-    __slots__ = ['id', 'name', 'icon', 'color', 'actionable', 'children']
+    __slots__ = ['id', 'name', 'icon', 'color', 'actionable', 'children',
+                 'parent', '__weakref__']
 
 
     def __init__(self, id: UUID, name: str) -> None:
@@ -47,7 +45,7 @@ class Tag2(GObject.Object):
         self.icon = None
         self.color = None
         self.actionable = True
-        self.children = []
+        self.children = ItemList()
         self.parent = None
 
 
@@ -78,6 +76,9 @@ class TagStore(BaseStore):
     #: Tag to look for in XML
     XML_TAG = 'tag'
 
+    #: Tag of the element holding all tags
+    XML_ROOT = 'taglist'
+
 
     def __init__(self) -> None:
         self.used_colors: Set[Color] = set()
@@ -159,7 +160,14 @@ class TagStore(BaseStore):
     def to_xml(self) -> Element:
         """Save searches to an LXML element."""
 
-        root = Element('taglist')
+        root = Element(self.XML_ROOT)
+        root.extend(self.xml_elements())
+
+        return root
+
+
+    def xml_elements(self) -> Iterator[Element]:
+        """Serialize tags one by one."""
 
         parent_map = {}
 
@@ -168,7 +176,7 @@ class TagStore(BaseStore):
                 parent_map[child.id] = tag.id
 
         for tag in self.lookup.values():
-            element = SubElement(root, self.XML_TAG)
+            element = Element(self.XML_TAG)
             element.set('id', str(tag.id))
             element.set('name', tag.name)
 
@@ -183,7 +191,7 @@ class TagStore(BaseStore):
             except KeyError:
                 pass
 
-        return root
+            yield element
 
 
     def generate_color(self) -> str:
@@ -30,6 +30,7 @@ from gi.repository import GLib
 
 from gettext import gettext as _
 from GTG.core.dates import Date
+from GTG.core import recurrence
 from liblarch import TreeNode
 
 log = logging.getLogger(__name__)
@@ -70,6 +71,10 @@ class Task(TreeNode):
         self.closed_date = Date.no_date()
         self.due_date = Date.no_date()
         self.start_date = Date.no_date()
+        # Cached get_urgent_date() and get_due_date_constraint() results,
+        # None when they need to be computed again
+        self._urgent_date = None
+        self._due_date_constraint = None
         self.can_be_deleted = newtask
         # tags
         self.tags = []
@@ -233,6 +238,8 @@ class Task(TreeNode):
             if not init:
                 GLib.idle_add(self.req.emit, "status-changed", self.tid, self.status, status)
             self.status = status
+            # Parents only count the urgent dates of active subtasks
+            self._forget_urgent_date()
 
         # Set closing date
         if status and status in [self.STA_DONE, self.STA_DISMISSED]:
@@ -393,23 +400,17 @@ class Task(TreeNode):
         Returns:
             Date: the next due date of a task
         """
-        today = date.today()
-        if today <= self.due_date:
-            try:
-                nextdate = self.due_date.parse_from_date(self.recurring_term, newtask=False)
-                while nextdate <= self.due_date:
-                    nextdate = nextdate.parse_from_date(self.recurring_term, newtask=False)
-                return nextdate
-            except Exception:
-                raise ValueError(f'Invalid recurring term {self.recurring_term}')
-        elif today > self.due_date:
-            try:
-                next_date = self.due_date.parse_from_date(self.recurring_term, newtask=False)
-                while next_date < date.today():
-                    next_date = next_date.parse_from_date(self.recurring_term, newtask=False)
-                return next_date
-            except Exception:
-                raise ValueError(f'Invalid recurring term {self.recurring_term}')
+        try:
+            rule = recurrence.compile_term(self.recurring_term)
+        except ValueError:
+            raise ValueError(f'Invalid recurring term {self.recurring_term}')
+
+        next_date = rule.next_occurrence(self.due_date.date(), date.today())
+
+        if next_date is None:
+            raise ValueError(f'Invalid recurring term {self.recurring_term}')
+
+        return Date(next_date)
 
     def is_parent_recurring(self):
         if self.has_parent():
@@ -488,6 +489,7 @@ class Task(TreeNode):
         old_due_date = self.due_date
         new_duedate_obj = Date(new_duedate)  # caching the conversion
         self.due_date = new_duedate_obj
+        self.clear_date_cache()
         # If the new date is fuzzy or undefined, we don't update related tasks
         if not new_duedate_obj.is_fuzzy():
             # if some ancestors' due dates happen before the task's new
@@ -523,6 +525,11 @@ class Task(TreeNode):
         """
         Returns the most urgent due date among the task and its active subtasks
         """
+        if self._urgent_date is None:
+            self._urgent_date = self._compute_urgent_date()
+        return self._urgent_date
+
+    def _compute_urgent_date(self):
         urgent_date = self.get_due_date()
         for subtask in self.get_subtasks():
             if subtask.get_status() == self.STA_ACTIVE:
@@ -533,6 +540,11 @@ class Task(TreeNode):
         """ Returns the most urgent due date constraint, following
             parents' due dates. Return Date.no_date() if no constraint
             is applied. """
+        if self._due_date_constraint is None:
+            self._due_date_constraint = self._compute_due_date_constraint()
+        return self._due_date_constraint
+
+    def _compute_due_date_constraint(self):
         # Check out for constraints depending on date definition/fuzziness.
         strongest_const_date = self.due_date
         if strongest_const_date.is_fuzzy():
@@ -559,6 +571,60 @@ class Task(TreeNode):
                     strongest_const_date = par_duedate
         return strongest_const_date
 
+    # ABOUT CACHED DATES
+    #
+    # Urgent dates and due date constraints are used to sort and display
+    # the task list, so they are kept instead of going through the whole
+    # hierarchy for each comparison. The urgent date of a task depends on
+    # its subtasks, so changes are passed up to the ancestors. The due date
+    # constraint depends on its parents, so changes are passed down to the
+    # descendants, but only through fuzzy or undefined due dates: the
+    # constraint of other tasks is their own due date.
+    def clear_date_cache(self):
+        """Forget the cached dates depending on the task's due date, status
+        or parents."""
+        self._forget_urgent_date()
+        self._forget_due_date_constraint()
+
+    def _forget_urgent_date(self):
+        """Forget the urgent date of the task and its ancestors."""
+        todo = [self]
+        seen = set()
+        while todo:
+            task = todo.pop()
+            if task.tid in seen:
+                continue
+            seen.add(task.tid)
+            task._urgent_date = None
+            for par_id in task.parents:
+                par = self.req.get_task(par_id)
+                if par is not None:
+                    todo.append(par)
+
+    def _forget_due_date_constraint(self):
+        """Forget the due date constraint of the task and the descendants
+        it applies to."""
+        todo = [self]
+        seen = set()
+        while todo:
+            task = todo.pop()
+            if task.tid in seen:
+                continue
+            seen.add(task.tid)
+            task._due_date_constraint = None
+            for child_id in task.children:
+                child = self.req.get_task(child_id)
+                if child is not None and child.get_due_date().is_fuzzy():
+                    todo.append(child)
+
+    def _relationship_changed(self, parent_id):
+        """Forget the cached dates affected by adding or removing a
+        parent."""
+        par = self.req.get_task(parent_id)
+        if par is not None:
+            par._forget_urgent_date()
+        self._forget_due_date_constraint()
+
     # ABOUT START DATE
     #
     # Start date is the date at which the user has decided to work or consider
@@ -681,6 +747,8 @@ class Task(TreeNode):
         TreeNode.add_child(self, tid)
         # now we set inherited attributes only if it's a new task
         child = self.req.get_task(tid)
+        if child:
+            child._relationship_changed(self.get_id())
         if self.is_loaded() and child and child.can_be_deleted:
             # If the the child is repeating no need to change the date
             if not child.get_recurring():
@@ -713,9 +781,23 @@ class Task(TreeNode):
         tree = self.get_tree()
         return [tree.get_node(node_id) for node_id in self.get_children()]
 
+    def add_parent(self, parent_id):
+        result = TreeNode.add_parent(self, parent_id)
+        self._relationship_changed(parent_id)
+        return result
+
+    def remove_parent(self, parent_id):
+        result = TreeNode.remove_parent(self, parent_id)
+        self._relationship_changed(parent_id)
+        return result
+
     def set_parent(self, parent_id):
         """Update the task's parent. Refresh due date constraints."""
+        old_parents = self.get_parents()
         TreeNode.set_parent(self, parent_id)
+        for par_id in old_parents + [parent_id]:
+            if par_id is not None:
+                self._relationship_changed(par_id)
         if parent_id is not None:
             par = self.req.get_task(parent_id)
             par_duedate = par.get_due_date_constraint()
@@ -18,23 +18,25 @@
 
 """Everything related to tasks."""
 
+from gettext import gettext as _
 
 from gi.repository import GObject
-from gettext import gettext as _
 
 from uuid import uuid4, UUID
 import logging
-from typing import Callable, Any, Optional
+from typing import Callable, Any, Dict, Iterable, Iterator, Optional
 from enum import Enum
+from contextlib import nullcontext
 import re
 import datetime
+from bisect import bisect_left, insort
 from operator import attrgetter
 
 from lxml.etree import Element, SubElement, CDATA
 
-from GTG.core.base_store import BaseStore
+from GTG.core.base_store import BaseStore, ItemList
 from GTG.core.tags2 import Tag2, TagStore
-from GTG.core.dates import Date
+from GTG.core.dates import Date, SOON, SOMEDAY
 
 log = logging.getLogger(__name__)
 
@@ -71,54 +73,130 @@ class Filter(Enum):
     CHILDREN = 'Children'
 
 
+# ------------------------------------------------------------------------------
+# DATES
+# ------------------------------------------------------------------------------
+
+# Tasks don't keep Date objects around, which would mean two objects (the Date
+# and its datetime) per date and per task. Plain dates are stored as ordinals,
+# datetimes as themselves, no date as None. Only fuzzy dates are kept as Date,
+# and those are shared.
+
+def pack_date(value: Any) -> Any:
+    """Convert a date to the compact representation used in tasks."""
+
+    if value is None:
+        return None
+
+    date = Date(value)
+    dt_value = date.dt_value
+
+    if isinstance(dt_value, datetime.datetime):
+        return dt_value
+    elif isinstance(dt_value, datetime.date):
+        return dt_value.toordinal()
+    elif dt_value == SOON:
+        return Date.soon()
+    elif dt_value == SOMEDAY:
+        return Date.someday()
+
+    return None
+
+
+def unpack_date(value: Any) -> Date:
+    """Get a Date back from its compact representation."""
+
+    if value is None:
+        return Date.no_date()
+    elif isinstance(value, int):
+        return Date(datetime.date.fromordinal(value))
+    elif isinstance(value, Date):
+        return value
+
+    return Date(value)
+
+
 # ------------------------------------------------------------------------------
 # TASK
 # ------------------------------------------------------------------------------
 
-class Task2(GObject.Object):
-    """A single task."""
+class Task2:
+    """A single task, as a plain record.
+
+    Once added to a store, changes of the title, dates, status and tags
+    are signaled by the store with task-changed.
+    """
 
-    __gtype_name__ = 'gtg_Task'
-    __slots__ = ['id', 'raw_title', 'content', 'tags',
-                 'children', 'status', 'parent', '_date_added',
+    __slots__ = ['id', 'raw_title', 'content', '_tags',
+                 'children', '_status', 'parent', 'store', '_date_added',
                  '_date_due', '_date_start', '_date_closed',
-                 '_date_modified']
+                 '_date_modified', '__weakref__']
 
 
     def __init__(self, id: UUID, title: str) -> None:
+        self.store = None
         self.id = id
         self.raw_title = title.strip('\t\n')
         self.content =  ''
-        self.tags = []
-        self.children = []
-        self.status = Status.ACTIVE
+        self._tags = ()
+        self.children = ItemList()
+        self._status = Status.ACTIVE
         self.parent = None
 
-        self._date_added = Date.no_date()
-        self._date_due = Date.no_date()
-        self._date_start = Date.no_date()
-        self._date_closed = Date.no_date()
-        self._date_modified = Date(datetime.datetime.now())
+        self._date_added = None
+        self._date_due = None
+        self._date_start = None
+        self._date_closed = None
+        self._date_modified = datetime.datetime.now()
+
+
+    def _changed(self) -> None:
+        """Signal a change, if this task is in a store."""
+
+        store = self.store
+
+        if store is not None and store.lookup.get(self.id) is self:
+            store.emit('task-changed', self)
+
+
+    def _bulk(self):
+        """Gather the changes of several tasks in one bulk-changed signal."""
+
+        return nullcontext() if self.store is None else self.store.bulk()
 
 
     def is_actionable(self) -> bool:
         """Determine if this task is actionable."""
 
-        actionable_tags = all(t.actionable for t in self.tags)
-        active_children = all(t.status != Status.ACTIVE for t in self.children)
-        days_left = self._date_start.days_left()
-        can_start = True if not days_left else days_left <= 0
+        if self.status != Status.ACTIVE:
+            return False
+
+        due = self._date_due
+        if isinstance(due, Date) and due == Date.someday():
+            return False
+
+        start = self._date_start
+        if isinstance(start, int):
+            if start > datetime.date.today().toordinal():
+                return False
+        elif start is not None:
+            days_left = unpack_date(start).days_left()
 
-        return (self.status == Status.ACTIVE
-                and self._date_due != Date.someday()
-                and actionable_tags
-                and active_children
-                and can_start)
+            if days_left and days_left > 0:
+                return False
+
+        return (all(t.actionable for t in self.tags)
+                and all(t.status != Status.ACTIVE for t in self.children))
 
 
     def toggle_active(self, propagate: bool = True) -> None:
         """Toggle between possible statuses."""
 
+        with self._bulk():
+            self._toggle_active(propagate)
+
+
+    def _toggle_active(self, propagate: bool) -> None:
         if self.status is Status.ACTIVE:
             self.status = Status.DONE
             self.date_closed = Date.today()
@@ -128,16 +206,21 @@ class Task2(GObject.Object):
             self.date_closed = Date.no_date()
 
             if self.parent and self.parent.status is not Status.ACTIVE:
-                self.parent.toggle_active(propagate=False)
+                self.parent._toggle_active(propagate=False)
 
         if propagate:
             for child in self.children:
-                child.toggle_active()
+                child._toggle_active(propagate=True)
 
 
     def toggle_dismiss(self, propagate: bool = True) -> None:
         """Set this task to be dismissed."""
 
+        with self._bulk():
+            self._toggle_dismiss(propagate)
+
+
+    def _toggle_dismiss(self, propagate: bool) -> None:
         if self.status is Status.ACTIVE:
             self.status = Status.DISMISSED
             self.date_closed = Date.today()
@@ -147,86 +230,137 @@ class Task2(GObject.Object):
             self.date_closed = Date.no_date()
 
             if self.parent and self.parent.status is not Status.ACTIVE:
-                self.parent.toggle_dismiss(propagate=False)
+                self.parent._toggle_dismiss(propagate=False)
 
         if propagate:
             for child in self.children:
-                child.toggle_dismiss()
+                child._toggle_dismiss(propagate=True)
+
+
+    def close(self, status: Status = Status.DONE) -> None:
+        """Mark this task and its open subtasks as done (or dismissed).
+
+        Unlike toggle_active(), subtasks closed before stay as they are.
+        """
+
+        today = Date.today()
+        todo = [self]
+
+        with self._bulk():
+            while todo:
+                task = todo.pop()
+                task.status = status
+                task.date_closed = today
+                todo.extend(c for c in task.children
+                            if c.status is Status.ACTIVE)
 
 
     def set_status(self, status: Status) -> None:
         """Set status for task."""
 
-        self.status = status
+        with self._bulk():
+            todo = [self]
 
-        for child in self.children:
-            child.set_status(status)
+            while todo:
+                task = todo.pop()
+                task.status = status
+                todo.extend(task.children)
+
+
+    @property
+    def status(self) -> Status:
+        return self._status
+
+
+    @status.setter
+    def status(self, value: Status) -> None:
+        self._status = value
+        self._changed()
+
+
+    @property
+    def tags(self) -> tuple:
+        return self._tags
+
+
+    @tags.setter
+    def tags(self, value: Iterable[Tag2]) -> None:
+        self._tags = tuple(value)
+        self._changed()
 
 
     @property
     def date_due(self) -> Date:
-        return self._date_due
+        return unpack_date(self._date_due)
 
 
     @date_due.setter
     def date_due(self, value: Date) -> None:
-        self._date_due = value
+        self._date_due = pack_date(value)
 
         if not value or value.is_fuzzy():
+            self._changed()
             return
 
-        for child in self.children:
-            if (child.date_due
-               and not child.date_due.is_fuzzy()
-               and child.date_due > value):
+        with self._bulk():
+            self._changed()
+
+            for child in self.children:
+                if (child.date_due
+                   and not child.date_due.is_fuzzy()
+                   and child.date_due > value):
 
-                child.date_due = value
+                    child.date_due = value
 
-        if (self.parent
-           and self.parent.date_due
-           and self.parent.date_due.is_fuzzy()
-           and self.parent.date_due < value):
-            self.parent.date_due = value
+            if (self.parent
+               and self.parent.date_due
+               and self.parent.date_due.is_fuzzy()
+               and self.parent.date_due < value):
+                self.parent.date_due = value
 
 
     @property
     def date_added(self) -> Date:
-        return self._date_added
+        return unpack_date(self._date_added)
 
 
     @date_added.setter
     def date_added(self, value: Any) -> None:
-        self._date_added = Date(value)
+        self._date_added = pack_date(value)
+        self._changed()
 
 
     @property
     def date_start(self) -> Date:
-        return self._date_start
+        return unpack_date(self._date_start)
 
 
     @date_start.setter
     def date_start(self, value: Any) -> None:
-        self._date_start = Date(value)
+        self._date_start = pack_date(value)
+        self._changed()
 
 
     @property
     def date_closed(self) -> Date:
-        return self._date_closed
+        return unpack_date(self._date_closed)
 
 
     @date_closed.setter
     def date_closed(self, value: Any) -> None:
-        self._date_closed = Date(value)
+        self._date_closed = pack_date(value)
+        self._changed()
 
 
     @property
     def date_modified(self) -> Date:
-        return self._date_modified
+        return unpack_date(self._date_modified)
 
 
     @date_modified.setter
     def date_modified(self, value: Any) -> None:
-        self._date_modified = Date(value)
+        self._date_modified = pack_date(value)
+        self._changed()
 
 
     @property
@@ -237,6 +371,7 @@ class Task2(GObject.Object):
     @title.setter
     def title(self, value) -> None:
         self.raw_title = value.strip('\t\n') or _('(no title)')
+        self._changed()
 
 
     @property
@@ -259,7 +394,7 @@ class Task2(GObject.Object):
 
         if isinstance(tag, Tag2):
             if tag not in self.tags:
-                self.tags.append(tag)
+                self.tags = self.tags + (tag,)
         else:
             raise ValueError
 
@@ -269,7 +404,7 @@ class Task2(GObject.Object):
 
         for t in self.tags:
             if t.name == tag_name:
-                self.tags.remove(t)
+                self.tags = tuple(_t for _t in self.tags if _t is not t)
                 (self.content.replace(f'{tag_name}\n\n', '')
                              .replace(f'{tag_name},', '')
                              .replace(f'{tag_name}', ''))
@@ -283,7 +418,8 @@ class Task2(GObject.Object):
     def update_modified(self) -> None:
         """Update the modified property."""
 
-        self._date_modified = Date(datetime.datetime.now())
+        self._date_modified = datetime.datetime.now()
+        self._changed()
 
 
     def __str__(self) -> str:
@@ -312,6 +448,361 @@ class Task2(GObject.Object):
         return hash(self.id)
 
 
+# ------------------------------------------------------------------------------
+# SORTED VIEWS
+# ------------------------------------------------------------------------------
+
+def date_sort_key(value: Any) -> tuple:
+    """Sort key for a packed date. Real dates first, then fuzzy, then none."""
+
+    if value is None:
+        return (2, 0, 0)
+    elif isinstance(value, int):
+        return (0, value, 0)
+    elif isinstance(value, datetime.datetime):
+        if value.tzinfo:
+            value = value.astimezone().replace(tzinfo=None)
+
+        seconds = (value - datetime.datetime.combine(value, datetime.time()))
+        return (0, value.toordinal(), seconds.total_seconds())
+
+    # Soon, then someday
+    return (1, value.dt_value, 0)
+
+
+#: Bulk changes touching more than this share of the tasks are handled
+#: by recomputing everything
+BULK_REBUILD_RATIO = 0.25
+
+#: Sort keys of the sorted views
+SORT_KEYS = {
+    'added': lambda t: date_sort_key(t._date_added),
+    'modified': lambda t: date_sort_key(t._date_modified),
+    'due': lambda t: date_sort_key(t._date_due),
+    'start': lambda t: date_sort_key(t._date_start),
+    'closed': lambda t: date_sort_key(t._date_closed),
+    'title': lambda t: t.raw_title.casefold(),
+}
+
+
+class SortedView:
+    """Tasks of a store, kept sorted by one attribute.
+
+    Each level of the tree (the root tasks, and the children of every
+    task) is a separate sorted list, updated with bisect as tasks are
+    added, removed, reparented or changed. Get views from
+    TaskStore.sorted_view().
+    """
+
+    def __init__(self, store: 'TaskStore', key: str) -> None:
+        self.key = key
+        self._key_func = SORT_KEYS[key]
+
+        # Parent id (None for roots) -> sorted (key, task id) entries.
+        # Ids are strings, like the ones in the removed signal.
+        self._levels: Dict[Optional[str], list] = {}
+
+        # Task id -> (entry, parent id)
+        self._entries: Dict[str, tuple] = {}
+        self._tasks: Dict[str, Task2] = {}
+
+        # Set after big bulk changes, the view is rebuilt when next used
+        self._stale = False
+
+        self._store = store
+        self.rebuild()
+
+        store.connect('added', lambda _, task: self.update(task))
+        store.connect('removed', lambda _, tid: self._on_removed(tid))
+        store.connect('parent-change', lambda _, task, p: self.update(task))
+        store.connect('parent-removed', lambda _, task, p: self.update(task))
+        store.connect('task-changed', lambda _, task: self.update(task))
+        store.connect('bulk-changed', self._on_bulk_changed)
+
+
+    def rebuild(self) -> None:
+        """Sort everything again, from scratch."""
+
+        self._stale = False
+        self._levels.clear()
+        self._entries.clear()
+        self._tasks.clear()
+
+        key_func = self._key_func
+        stack = [(None, t) for t in self._store.data]
+
+        while stack:
+            parent_id, task = stack.pop()
+            tid = str(task.id)
+            entry = (key_func(task), tid)
+
+            self._levels.setdefault(parent_id, []).append(entry)
+            self._entries[tid] = (entry, parent_id)
+            self._tasks[tid] = task
+
+            stack.extend((tid, c) for c in task.children)
+
+        for level in self._levels.values():
+            level.sort()
+
+
+    def update(self, task: Task2) -> None:
+        """Move a task to its new place, after it changed."""
+
+        if self._stale:
+            return
+
+        tid = str(task.id)
+
+        if tid in self._entries:
+            self._discard(tid)
+            self._insert(task)
+        else:
+            self._add_tree(task)
+
+
+    def tasks(self, parent: Optional[UUID] = None, offset: int = 0,
+              limit: Optional[int] = None, reverse: bool = False) -> list:
+        """Get a window of the sorted children of parent (or the roots)."""
+
+        self._ensure()
+        level = self._levels.get(None if parent is None else str(parent), [])
+
+        if reverse:
+            stop = max(len(level) - offset, 0)
+            start = 0 if limit is None else max(stop - limit, 0)
+            entries = reversed(level[start:stop])
+        else:
+            stop = None if limit is None else offset + limit
+            entries = level[offset:stop]
+
+        return [self._tasks[tid] for _key, tid in entries]
+
+
+    def until(self, key: Any, parent: Optional[UUID] = None) -> list:
+        """Get the first tasks of a level, up to a sort key (excluded)."""
+
+        self._ensure()
+        level = self._levels.get(None if parent is None else str(parent), [])
+        stop = bisect_left(level, (key,))
+
+        return [self._tasks[tid] for _key, tid in level[:stop]]
+
+
+    def __iter__(self):
+        """Walk the whole tree, depth first, in order."""
+
+        self._ensure()
+        stack = list(reversed(self._levels.get(None, [])))
+
+        while stack:
+            tid = stack.pop()[1]
+            yield self._tasks[tid]
+
+            stack.extend(reversed(self._levels.get(tid, [])))
+
+
+    def __len__(self) -> int:
+        self._ensure()
+        return len(self._entries)
+
+
+    def _ensure(self) -> None:
+        if self._stale:
+            self.rebuild()
+
+
+    def _on_removed(self, tid: str) -> None:
+        if not self._stale:
+            self._discard_tree(tid)
+
+
+    def _on_bulk_changed(self, store: 'TaskStore', ids: set) -> None:
+        if self._stale or len(ids) > len(store.lookup) * BULK_REBUILD_RATIO:
+            self._stale = True
+            return
+
+        for tid in ids:
+            task = store.lookup.get(tid)
+
+            if task is None:
+                self._discard_tree(str(tid))
+            else:
+                self.update(task)
+
+
+    def _insert(self, task: Task2) -> None:
+        tid = str(task.id)
+        parent_id = str(task.parent.id) if task.parent else None
+        entry = (self._key_func(task), tid)
+
+        insort(self._levels.setdefault(parent_id, []), entry)
+        self._entries[tid] = (entry, parent_id)
+        self._tasks[tid] = task
+
+
+    def _discard(self, tid: str) -> None:
+        entry, parent_id = self._entries.pop(tid)
+        level = self._levels[parent_id]
+
+        del level[bisect_left(level, entry)]
+        del self._tasks[tid]
+
+        if not level:
+            del self._levels[parent_id]
+
+
+    def _add_tree(self, task: Task2) -> None:
+        if str(task.id) not in self._entries:
+            self._insert(task)
+
+        for child in task.children:
+            self._add_tree(child)
+
+
+    def _discard_tree(self, tid: str) -> None:
+        for _key, child_id in list(self._levels.get(tid, [])):
+            self._discard_tree(child_id)
+
+        if tid in self._entries:
+            self._discard(tid)
+
+
+# ------------------------------------------------------------------------------
+# TAG USAGE
+# ------------------------------------------------------------------------------
+
+class TagUsage:
+    """Number of tasks using each tag, kept up to date from store signals.
+
+    Tags whose count drops to zero, and new tags, are remembered so that
+    finding unused tags only looks at tags that changed.
+    """
+
+    def __init__(self, task_store: 'TaskStore', tag_store: TagStore) -> None:
+        self._tag_store = tag_store
+
+        # Tag id -> number of tasks
+        self._counts: Dict[Any, int] = {}
+
+        # Task id -> tags counted for it
+        self._task_tags: Dict[str, tuple] = {}
+
+        # Tags that may be unused
+        self._candidates = set()
+
+        # Set after big bulk changes, counts are redone when next used
+        self._stale = True
+
+        task_store.connect('added', lambda _, task: self._update(task))
+        task_store.connect('task-changed', lambda _, task: self._update(task))
+        task_store.connect('removed', lambda _, tid: self._forget(tid))
+        task_store.connect('bulk-changed', self._on_bulk_changed)
+
+        tag_store.connect('added', lambda _, tag: self._add_candidate(tag))
+        tag_store.connect('bulk-changed', self._on_tags_changed)
+
+        self._task_store = task_store
+
+
+    def count(self, tag: Tag2) -> int:
+        """Get the number of tasks using a tag."""
+
+        self._ensure()
+        return self._counts.get(tag.id, 0)
+
+
+    def take_unused(self) -> list:
+        """Get the tags that became unused since last time."""
+
+        self._ensure()
+
+        lookup = self._tag_store.lookup
+        unused = [lookup[tid] for tid in self._candidates
+                  if tid in lookup and not self._counts.get(tid)]
+
+        self._candidates.clear()
+        return unused
+
+
+    def recount(self) -> None:
+        """Count everything again."""
+
+        self._stale = False
+        self._counts.clear()
+        self._task_tags.clear()
+
+        for task in self._task_store.lookup.values():
+            self._update(task)
+
+        # All tags must be checked
+        self._candidates = set(self._tag_store.lookup)
+
+
+    def _ensure(self) -> None:
+        if self._stale:
+            self.recount()
+
+
+    def _update(self, task: Task2) -> None:
+        if self._stale:
+            return
+
+        tid = str(task.id)
+        old = self._task_tags.get(tid, ())
+
+        if old is task.tags:
+            return
+
+        for tag in old:
+            self._decrement(tag.id)
+
+        for tag in task.tags:
+            self._counts[tag.id] = self._counts.get(tag.id, 0) + 1
+
+        self._task_tags[tid] = task.tags
+
+
+    def _forget(self, tid: str) -> None:
+        if self._stale:
+            return
+
+        for tag in self._task_tags.pop(tid, ()):
+            self._decrement(tag.id)
+
+
+    def _decrement(self, tag_id: Any) -> None:
+        count = self._counts[tag_id] - 1
+
+        if count:
+            self._counts[tag_id] = count
+        else:
+            del self._counts[tag_id]
+            self._candidates.add(tag_id)
+
+
+    def _add_candidate(self, tag: Tag2) -> None:
+        self._candidates.add(tag.id)
+
+
+    def _on_bulk_changed(self, store: 'TaskStore', ids: set) -> None:
+        if self._stale or len(ids) > len(store.lookup) * BULK_REBUILD_RATIO:
+            self._stale = True
+            return
+
+        for tid in ids:
+            task = store.lookup.get(tid)
+
+            if task is None:
+                self._forget(str(tid))
+            else:
+                self._update(task)
+
+
+    def _on_tags_changed(self, store: TagStore, ids: set) -> None:
+        self._candidates.update(tid for tid in ids if tid in store.lookup)
+
+
 # ------------------------------------------------------------------------------
 # STORE
 # ------------------------------------------------------------------------------
@@ -324,9 +815,16 @@ class TaskStore(BaseStore):
     #: Tag to look for in XML
     XML_TAG = 'task'
 
+    #: Tag of the element holding all tasks
+    XML_ROOT = 'tasklist'
+
+    BULK_SIGNALS = BaseStore.BULK_SIGNALS | {'task-changed'}
+
     def __init__(self) -> None:
         super().__init__()
 
+        self._views: Dict[str, SortedView] = {}
+
 
     def __str__(self) -> str:
         """String representation."""
@@ -348,16 +846,47 @@ class TaskStore(BaseStore):
         task = Task2(id=tid, title=title)
         task.date_added = Date.now()
 
-        if parent:
-            self.add(task, parent)
-        else:
-            self.data.append(task)
-            self.lookup[tid] = task
-
-        self.emit('added', task)
+        self.add(task, parent)
         return task
 
 
+    def add(self, item: Any, parent_id: UUID = None) -> None:
+        """Add a task to the taskstore."""
+
+        super().add(item, parent_id)
+        item.store = self
+        self.emit('added', item)
+
+
+    @GObject.Signal(name='task-changed', arg_types=(object,))
+    def task_changed_signal(self, *_):
+        """Signal to emit when the title, dates or status of a task change."""
+
+
+    def refresh_lookup_cache(self) -> None:
+        """Refresh lookup cache.
+
+        Ids may have changed, so all tasks are signaled as changed, in
+        one bulk-changed signal. Sorted views and tag usage start over.
+        """
+
+        super().refresh_lookup_cache()
+
+        with self.bulk():
+            for task in self.lookup.values():
+                self.emit('task-changed', task)
+
+
+    def sorted_view(self, key: str) -> SortedView:
+        """Get the view of tasks sorted by key (see SORT_KEYS)."""
+
+        try:
+            return self._views[key]
+        except KeyError:
+            view = self._views[key] = SortedView(self, key)
+            return view
+
+
     def from_xml(self, xml: Element, tag_store: TagStore) -> None:
         """Load up tasks from a lxml object."""
 
@@ -380,7 +909,8 @@ class TaskStore(BaseStore):
 
             if status == 'Done':
                 task.status = Status.DONE
-            elif status == 'Dismissed':
+            elif status in ('Dismiss', 'Dismissed'):
+                # Dismiss is written by GTG.core.task
                 task.status = Status.DISMISSED
 
             # Dates
@@ -394,9 +924,9 @@ class TaskStore(BaseStore):
             due_date = Date.parse(dates.findtext('due'))
 
             if fuzzy_due_date:
-                task._date_due = fuzzy_due_date
+                task._date_due = pack_date(fuzzy_due_date)
             elif due_date:
-                task._date_due = due_date
+                task._date_due = pack_date(due_date)
 
             fuzzy_start = dates.findtext('fuzzyStart')
             start = dates.findtext('start')
@@ -409,13 +939,16 @@ class TaskStore(BaseStore):
             taglist = element.find('tags')
 
             if taglist is not None:
+                tags = []
+
                 for t in taglist.iter('tag'):
                     try:
-                        tag = tag_store.get(t.text)
-                        task.tags.append(tag)
+                        tags.append(tag_store.get(t.text))
                     except KeyError:
                         pass
 
+                task.tags = tuple(tags)
+
             # Content
             content = element.find('content').text or ''
             content = content.replace(']]&gt;', ']]>')
@@ -438,10 +971,17 @@ class TaskStore(BaseStore):
     def to_xml(self) -> Element:
         """Serialize the taskstore into a lxml element."""
 
-        root = Element('tasklist')
+        root = Element(self.XML_ROOT)
+        root.extend(self.xml_elements())
+
+        return root
+
+
+    def xml_elements(self) -> Iterator[Element]:
+        """Serialize tasks one by one."""
 
         for task in self.lookup.values():
-            element = SubElement(root, self.XML_TAG)
+            element = Element(self.XML_TAG)
             element.set('id', str(task.id))
             element.set('status', task.status.value)
 
@@ -462,7 +1002,7 @@ class TaskStore(BaseStore):
             modified_date = SubElement(dates, 'modified')
             modified_date.text = str(task.date_modified)
 
-            if task.status == Status.DONE:
+            if task.status != Status.ACTIVE:
                 done_date = SubElement(dates, 'done')
                 done_date.text = str(task.date_closed)
 
@@ -488,7 +1028,7 @@ class TaskStore(BaseStore):
             text = text.replace(']]>', ']]&gt;')
             content.text = CDATA(text)
 
-        return root
+            yield element
 
 
     def filter(self, filter_type: Filter, arg = None) -> list:
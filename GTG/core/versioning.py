@@ -20,16 +20,19 @@
 
 import os
 import html
+import logging
+from concurrent.futures import ProcessPoolExecutor
 from uuid import uuid4
 
 from lxml import etree as et
 from GTG.core.dates import Date
 from GTG.core.dirs import DATA_DIR
 from GTG.core import xml
-from GTG.core import datastore
 
 from datetime import date
-from typing import Optional, Tuple
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
 
 
 #: A dicionary of tags and IDs to add in tasks
@@ -38,8 +41,14 @@ tags_cache = {}
 #: A dictionary of old style task IDs to UUIDs
 tid_cache = {}
 
+#: Tasks sent to a worker at once
+CHUNK_SIZE = 500
+
+#: Below this many tasks, converting in this process is faster
+PARALLEL_THRESHOLD = 5000
+
 
-def convert(path: str, ds: datastore) -> et.ElementTree:
+def convert(path: str) -> et.ElementTree:
     """Convert old XML into the new format."""
 
     old_tree = xml.open_file(path, 'project')
@@ -50,34 +59,209 @@ def convert(path: str, ds: datastore) -> et.ElementTree:
     # Bump this when there are known file format changes:
     new_root.set('xmlVersion', '2')
 
-    taglist, searches = convert_tags(old_tree)
+    tag_names = scan_tasks(old_tree.iter('task'))
+
+    taglist, searches = convert_tags(tag_names)
     new_root.append(taglist)
     new_root.append(searches)
 
     tasklist = et.SubElement(new_root, 'tasklist')
 
     for task in old_tree.iter('task'):
+        new_task = convert_task(task)
+
+        if new_task is not None:
+            tasklist.append(new_task)
+
+    return et.ElementTree(new_root)
+
 
-        # Keep a map of old style IDs to UUIDs for later
+def scan_tasks(tasks: Iterable[et.Element]) -> dict:
+    """Map old task ids to UUIDs, and get the tags used by tasks."""
+
+    tags_cache.clear()
+    tid_cache.clear()
+
+    tag_names = {}
+
+    for task in tasks:
         tid = task.attrib['id']
 
         try:
-            new_tid = task.attrib['uuid']
+            tid_cache[tid] = task.attrib['uuid']
         except KeyError:
-            new_tid = str(uuid4())
+            tid_cache[tid] = str(uuid4())
 
-        tid_cache[tid] = new_tid
+        tag_names.update(dict.fromkeys(task.get('tags').split(',')))
 
-    for task in old_tree.iter('task'):
-        new_task = convert_task(task, ds)
+    return tag_names
 
-        if new_task is not None:
-            tasklist.append(new_task)
 
-    return et.ElementTree(new_root)
+# -----------------------------------------------------------------------------
+# STREAMING CONVERSION
+# -----------------------------------------------------------------------------
+
+def iter_tasks(path: str) -> Iterator[et.Element]:
+    """Go through the tasks of an old file, without keeping them around."""
+
+    for _, element in et.iterparse(path, tag='task'):
+        yield element
+
+        element.clear()
+
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+
+def _init_worker(tags: dict, tids: dict) -> None:
+    tags_cache.update(tags)
+    tid_cache.update(tids)
+
+
+def task_bytes(task: et.Element) -> bytes:
+    """Convert an old task, and serialize it indented for the file."""
+
+    new_task = convert_task(task)
+
+    if new_task is None:
+        return b''
+
+    et.indent(new_task, level=2)
+    return b'\n    ' + et.tostring(new_task, encoding='UTF-8')
+
+
+def convert_chunk(tasks: List[bytes]) -> bytes:
+    """Convert serialized old tasks, in a worker process."""
+
+    return b''.join(task_bytes(et.fromstring(task)) for task in tasks)
+
+
+def _convert_serial(tasks: Iterable[et.Element]) -> Iterator[bytes]:
+    """Convert tasks in this process, as they are parsed."""
+
+    chunk = []
+
+    for task in tasks:
+        chunk.append(task_bytes(task))
+
+        if len(chunk) == CHUNK_SIZE:
+            yield b''.join(chunk)
+            chunk = []
+
+    if chunk:
+        yield b''.join(chunk)
+
 
+def _chunks(tasks: Iterable[et.Element]) -> Iterator[List[bytes]]:
+    """Serialize old tasks in chunks, to send them to workers."""
 
-def convert_tags(old_tree: et.Element) -> Tuple[et.Element, et.Element]:
+    chunk = []
+
+    for task in tasks:
+        chunk.append(et.tostring(task, encoding='UTF-8', with_tail=False))
+
+        if len(chunk) == CHUNK_SIZE:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def _convert_parallel(chunks: Iterator[List[bytes]],
+                      processes: int) -> Iterator[bytes]:
+    """Convert chunks on a process pool, keeping their order.
+
+    Only a few chunks are in flight at once, so the old file is never
+    in memory as a whole.
+    """
+
+    with ProcessPoolExecutor(processes, initializer=_init_worker,
+                             initargs=(tags_cache, tid_cache)) as pool:
+        pending = []
+
+        for chunk in chunks:
+            pending.append(pool.submit(convert_chunk, chunk))
+
+            if len(pending) >= processes * 2:
+                yield pending.pop(0).result()
+
+        for future in pending:
+            yield future.result()
+
+
+def convert_file(path: str, new_path: str,
+                 progress: Optional[Callable[[int, int], None]] = None,
+                 processes: Optional[int] = None) -> int:
+    """Convert an old file into a new one, return the number of tasks.
+
+    The old file is read twice with iterparse: once to collect ids and
+    tags, then to convert tasks. Large files are converted by a pool of
+    processes, and tasks are written as soon as they are converted.
+    progress is called with the number of tasks done and the total.
+    """
+
+    try:
+        tag_names = scan_tasks(iter_tasks(path))
+        tasks = iter_tasks(path)
+
+    except (et.XMLSyntaxError, OSError) as error:
+        # Let open_file() look for a backup
+        log.warning('Could not stream %r (%r), loading it whole', path, error)
+
+        old_tree = xml.open_file(path, 'project')
+        tag_names = scan_tasks(old_tree.iter('task'))
+        tasks = old_tree.iter('task')
+
+    taglist, searches = convert_tags(tag_names)
+
+    total = len(tid_cache)
+    done = 0
+    processes = processes or os.cpu_count() or 1
+
+    if total >= PARALLEL_THRESHOLD and processes > 1:
+        converted = _convert_parallel(_chunks(tasks), processes)
+    else:
+        converted = _convert_serial(tasks)
+
+    xml.create_dirs(new_path)
+    temp_path = new_path + '__'
+
+    with open(temp_path, 'wb') as stream:
+        stream.write(b"<?xml version='1.0' encoding='UTF-8'?>\n"
+                     b'<gtgData appVersion="0.6" xmlVersion="2">')
+
+        for element in (taglist, searches):
+            et.indent(element, level=1)
+            stream.write(b'\n  ' + et.tostring(element, encoding='UTF-8'))
+
+        if total:
+            stream.write(b'\n  <tasklist>')
+
+            for chunk in converted:
+                stream.write(chunk)
+                done = min(done + CHUNK_SIZE, total)
+
+                if progress:
+                    progress(done, total)
+
+            stream.write(b'\n  </tasklist>')
+        else:
+            stream.write(b'\n  <tasklist/>')
+
+        stream.write(b'\n</gtgData>\n')
+
+    os.replace(temp_path, new_path)
+    log.debug('Converted %d tasks from %r', total, path)
+
+    return total
+
+
+# -----------------------------------------------------------------------------
+# CONVERSION OF EACH ELEMENT
+# -----------------------------------------------------------------------------
+
+def convert_tags(task_tags: Iterable[str]) -> Tuple[et.Element, et.Element]:
     """Convert old tags for the new format."""
 
     old_file = os.path.join(DATA_DIR, 'tags.xml')
@@ -124,31 +308,27 @@ def convert_tags(old_tree: et.Element) -> Tuple[et.Element, et.Element]:
     # Some were just saved in the tasks, so we need to loop
     # through the tasks to make sure we get *all* tags and have
     # their IDs ready for task conversion.
-    for task in old_tree.iter('task'):
-        for tag_name in task.get('tags').split(','):
-            if tag_name and tag_name not in tags_cache:
-                new_tag = et.SubElement(taglist, 'tag')
-                tid = str(uuid4())
-                new_tag.set('id', tid)
-                new_tag.set('name', tag_name[1:])
+    for tag_name in task_tags:
+        if tag_name and tag_name not in tags_cache:
+            new_tag = et.SubElement(taglist, 'tag')
+            tid = str(uuid4())
+            new_tag.set('id', tid)
+            new_tag.set('name', tag_name[1:])
 
-                tags_cache[tag_name] = tid
+            tags_cache[tag_name] = tid
 
     return taglist, searchlist
 
 
-def convert_task(task: et.Element, ds: datastore) -> Optional[et.Element]:
+def convert_task(task: et.Element) -> Optional[et.Element]:
     """Convert old task XML into the new format."""
 
-    tid = task.attrib['id']
-    real_task = ds.task_factory(tid)
-
     if task is None:
         return
 
     # Get the old task properties
     # TIDs were stored as UUID, but sometimes they were not present
-    tid = task.get('uuid') or real_task.get_uuid() or tid_cache[tid]
+    tid = task.get('uuid') or tid_cache[task.attrib['id']]
     status = task.get('status')
     title = task.find('title').text
     content = task.find('content')
@@ -17,10 +17,10 @@
 # -----------------------------------------------------------------------------
 
 import os
-import shutil
 import logging
 from datetime import datetime
 from GTG.core.dates import Date
+from GTG.core import backups
 
 from lxml import etree
 
@@ -182,7 +182,7 @@ def get_xml_tree(filepath: str) -> etree.ElementTree:
 
     parser = etree.XMLParser(remove_blank_text=True, strip_cdata=False)
 
-    with open(filepath, 'rb') as stream:
+    with backups.open_backup(filepath) as stream:
         tree = etree.parse(stream, parser=parser)
 
     return tree
@@ -193,9 +193,10 @@ def open_file(xml_path: str, root_tag: str) -> etree.ElementTree:
 
     If file could not be opened, try:
         - file__
+        - the backups, newest first
         - file.bak.0
         - file.bak.1
-        - .... until BACKUP_NBR
+        - .... until BACKUP_NBR (made by older versions)
 
     If file doesn't exist, create a new file."""
 
@@ -207,6 +208,7 @@ def open_file(xml_path: str, root_tag: str) -> etree.ElementTree:
     ]
 
     # Add backup files
+    files += backups.store_for(xml_path, BACKUPS).manifests()
     files += [get_backup_name(xml_path, i) for i in range(BACKUPS)]
 
     root = None
@@ -235,7 +237,7 @@ def open_file(xml_path: str, root_tag: str) -> etree.ElementTree:
             log.debug('Not allowed to open: %r. Trying next.', filepath)
             continue
 
-        except etree.XMLSyntaxError as error:
+        except (etree.XMLSyntaxError, backups.BackupError) as error:
             log.debug('Syntax error in %r. %r. Trying next.', filepath, error)
             continue
 
@@ -257,39 +259,10 @@ def open_file(xml_path: str, root_tag: str) -> etree.ElementTree:
 def write_backups(filepath: str) -> None:
     """Make backups for the file at filepath."""
 
-    current_back = BACKUPS
-    backup_name = get_backup_name(filepath, None)
-    backup_dir = os.path.dirname(backup_name)
-
-    # Make sure backup dir exists
     try:
-        os.makedirs(backup_dir, exist_ok=True)
-
-    except IOError:
-        log.error('Backup dir %r cannot be created!', backup_dir)
-        return
-
-    # Cycle backups
-    while current_back > 0:
-        older = f"{backup_name}.bak.{current_back}"
-        newer = f"{backup_name}.bak.{current_back - 1}"
-
-        if os.path.exists(newer):
-            shutil.move(newer, older)
-
-        current_back -= 1
-
-    # bak.0 is always a fresh copy of the closed file
-    # so that it's not touched in case of not opening next time
-    bak_0 = f"{backup_name}.bak.0"
-    shutil.copy(filepath, bak_0)
-
-    # Add daily backup
-    today = datetime.today().strftime('%Y-%m-%d')
-    daily_backup = f'{backup_name}.{today}.bak'
-
-    if not os.path.exists(daily_backup):
-        shutil.copy(filepath, daily_backup)
+        backups.store_for(filepath, BACKUPS).backup()
+    except OSError as error:
+        log.error('Could not back up %r: %r', filepath, error)
 
 
 def write_xml(filepath: str, tree: etree.ElementTree) -> None:
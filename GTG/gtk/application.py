@@ -40,11 +40,14 @@ from GTG.core.plugins.engine import PluginEngine
 from GTG.core.plugins.api import PluginAPI
 from GTG.backends import BackendFactory
 from GTG.core.datastore import DataStore
-from GTG.core.dirs import CSS_DIR
+from GTG.core.dirs import CSS_DIR, QUERY_SOCKET
 from GTG.core.dates import Date
 from GTG.gtk.backends import BackendsDialog
 from GTG.gtk.browser.tag_editor import TagEditor
 from GTG.core.timer import Timer
+from GTG.core import importtime
+from GTG.core import profiler
+from GTG.core.query_service import QueryService
 from GTG.gtk.errorhandler import do_error_dialog
 
 log = logging.getLogger(__name__)
@@ -75,6 +78,9 @@ class Application(Gtk.Application):
     # Timer to refresh views and purge tasks
     timer = None
 
+    # Socket answering other programs about the tasks
+    query_service = None
+
     # Plugin Engine instance
     plugin_engine = None
 
@@ -113,7 +119,9 @@ class Application(Gtk.Application):
 
             # Load default file
             data_file = os.path.join(DATA_DIR, 'gtg_data.xml')
-            self.ds.find_and_load_file(data_file)
+
+            with profiler.span('Load data file'):
+                self.ds.find_and_load_file(data_file)
 
             # TODO: Remove this once the new core is stable
             self.ds.data_path = os.path.join(DATA_DIR, 'gtg_data2.xml')
@@ -121,8 +129,9 @@ class Application(Gtk.Application):
             # Register backends
             datastore = DataStore()
 
-            for backend_dic in BackendFactory().get_saved_backends_list():
-                datastore.register_backend(backend_dic)
+            with profiler.span('Register backends'):
+                for backend_dic in BackendFactory().get_saved_backends_list():
+                    datastore.register_backend(backend_dic)
 
             # Save the backends directly to be sure projects.xml is written
             datastore.save(quit=False)
@@ -143,6 +152,9 @@ class Application(Gtk.Application):
             if self.config.get('dark_mode'):
                 self.toggle_darkmode()
 
+            if self.config.get('query_service'):
+                self.start_query_service()
+
             self.init_style()
         except Exception as e:
             self._exception = e
@@ -238,11 +250,36 @@ class Application(Gtk.Application):
         when creating windows in the startup signal
         """
         if not self.browser:  # Prevent multiple inits
-            self.init_browser()
+            with profiler.span('Create main window'):
+                self.init_browser()
+
             self.init_actions()
-            self.init_plugin_engine()
+
+            with profiler.span('Activate plugins'):
+                self.init_plugin_engine()
+
+            if profiler.is_enabled():
+                self.browser.connect('draw', self._on_first_paint)
+
             self.browser.present()
 
+            # Only filled in with --debug
+            importtime.report()
+
+    def _on_first_paint(self, widget, cr):
+        """Mark the end of the startup timeline and write it."""
+
+        widget.disconnect_by_func(self._on_first_paint)
+        profiler.instant('First paint')
+
+        # Write once GTK is done with this frame
+        GLib.idle_add(self._write_startup_profile)
+        return False
+
+    def _write_startup_profile(self):
+        profiler.write()
+        return GLib.SOURCE_REMOVE
+
     def init_browser(self):
         # Browser (still hidden)
         if not self.browser:
@@ -468,19 +505,23 @@ class Application(Gtk.Application):
 
         log.debug("Deleting old tasks")
 
-        today = Date.today()
         max_days = self.config.get('autoclean_days')
-        closed_tree = self.req.get_tasks_tree(name='inactive')
+        to_remove = self.req.get_tasks_closed_before(max_days)
+
+        # Without NumPy, check every closed task
+        if to_remove is None:
+            today = Date.today()
+            closed_tree = self.req.get_tasks_tree(name='inactive')
 
-        closed_tasks = [self.req.get_task(tid) for tid in
-                        closed_tree.get_all_nodes()]
+            closed_tasks = [self.req.get_task(tid) for tid in
+                            closed_tree.get_all_nodes()]
 
-        to_remove = [t for t in closed_tasks
-                     if (today - t.get_closed_date()).days > max_days]
+            to_remove = [t.get_id() for t in closed_tasks
+                         if (today - t.get_closed_date()).days > max_days]
 
-        [self.req.delete_task(task.get_id())
-         for task in to_remove
-         if self.req.has_task(task.get_id())]
+        [self.req.delete_task(tid)
+         for tid in to_remove
+         if self.req.has_task(tid)]
 
     def autoclean(self, timer):
         """Run Automatic cleanup of old tasks."""
@@ -654,6 +695,12 @@ class Application(Gtk.Application):
     def do_shutdown(self):
         """Callback when GTG is closed."""
 
+        # In case we quit before the window got painted
+        profiler.write()
+
+        if self.query_service is not None:
+            self.query_service.stop()
+
         self.save_plugin_settings()
         self.ds.save()
 
@@ -661,12 +708,28 @@ class Application(Gtk.Application):
             # Save data and shutdown datastore backends
             self.req.save_datastore(quit=True)
 
+            # Write configuration changes still waiting to be saved
+            self.req.save_config()
+
         Gtk.Application.do_shutdown(self)
 
     # --------------------------------------------------------------------------
     # MISC
     # --------------------------------------------------------------------------
 
+    def start_query_service(self):
+        """Let other programs query and change the tasks.
+
+        See GTG.core.query_service.
+        """
+        self.query_service = QueryService(self.req, QUERY_SOCKET)
+
+        try:
+            self.query_service.start()
+        except OSError:
+            log.exception("Can't start the query service")
+            self.query_service = None
+
     @staticmethod
     def set_logging(debug: bool = False):
         """Set whenever it should activate debug stuff like logging or not"""
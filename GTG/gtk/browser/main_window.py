@@ -27,6 +27,7 @@ import liblarch_gtk  # Just for types
 from gi.repository import GObject, Gtk, Gdk, Gio, GLib
 
 from GTG.core import info
+from GTG.core import profiler
 from GTG.backends.backend_signals import BackendSignals
 from GTG.core.dirs import ICONS_DIR
 from GTG.core.search import parse_search_query, InvalidQuery
@@ -140,7 +141,8 @@ class MainWindow(Gtk.ApplicationWindow):
 
         self.restore_state_from_conf()
 
-        self.reapply_filter()
+        with profiler.span('First filter pass'):
+            self.reapply_filter()
         self._set_defer_days()
         self.browser_shown = False
 
@@ -1046,6 +1048,7 @@ class MainWindow(Gtk.ApplicationWindow):
         # TODO: New core
         new_task = self.app.ds.tasks.new()
         new_task.id = uid
+        self.app.ds.tasks.refresh_lookup_cache()
 
         for t in tags:
             new_task.add_tag(self.app.ds.tags.new(t))
@@ -844,7 +844,8 @@ class TaskEditor:
 
         try:
             self.req.get_task(tid).set_title(new_title)
-            self.app.ds.tasks.get(tid).title = new_title
+            t = self.app.ds.tasks.get(tid)
+            t.title = new_title
         except (AttributeError, KeyError):
             # There's no task at that tid
             pass
@@ -930,7 +931,8 @@ class TaskEditor:
         # TODO: New core, remove previous code once stable
         t = self.app.ds.tasks.get(self.task.tid)
         t.title = self.textview.get_title()
-        t.contents = self.textview.get_text()
+        t.content = self.textview.get_text()
+        self.app.ds.tasks.emit('task-changed', t)
         self.app.ds.save()
 
 
@@ -22,6 +22,8 @@
 import re
 from time import time
 from uuid import uuid4
+from collections import Counter
+from functools import partial
 import logging
 
 from gi.repository import Gtk, GLib, Gdk, GObject, GtkSource
@@ -30,8 +32,9 @@ from GTG.core.requester import Requester
 import GTG.core.urlregex as url_regex
 from webbrowser import open as openurl
 from gettext import gettext as _
-from typing import List
+from typing import List, Callable, Dict, Tuple
 
+from GTG.gtk.editor import GnomeConfig
 from GTG.gtk.editor.text_tags import (TitleTag, SubTaskTag, TaskTagTag,
                                       InternalLinkTag, LinkTag, CheckboxTag,
                                       InvisibleTag, SubheadingTag)
@@ -58,14 +61,16 @@ class TaskView(GtkSource.View):
     after the user has modified the buffer and analyzes the contents to find
     the title, tags, etc.
 
-    Process() starts by removing all tags except subtasks. Then goes
-    line-by-line detecting tags, subtasks, etc and applying Gtk.Textags
-    to them. The tags themselves are in the text_tags module.
+    Only the lines touched since the last run are processed. Insertions and
+    deletions extend a "dirty" region (kept with two text marks), and
+    process() goes line-by-line through that region detecting tags,
+    subtasks, etc and applying Gtk.Textags to them. The tags themselves are
+    in the text_tags module.
 
-    Subtasks are not deleted since we need to keep a reference to the tasks.
-    They are deleted and reapplied if the content needs to be refreshed.
-    We also keep a reference to the subtask tids, we use this to know which
-    subtasks were deleted in the text and have to be removed.
+    Text tags already on a line are reused when the detection finds them
+    again at the same place, and only the ones that don't match anymore
+    are removed. We also keep a reference to the subtask tids, we use this
+    to know which subtasks were deleted in the text and have to be removed.
 
     This widget requires several callbacks to work. These have to be set
     after the widget has been initialized, otherwise many things won't work.
@@ -74,6 +79,10 @@ class TaskView(GtkSource.View):
     # Timeout in milliseconds
     PROCESSING_DELAY = 250
 
+    # Timeout in seconds before saving changes to the text alone. It's longer
+    # than the editor's SAVETIME, so its light save never skips them.
+    SAVE_DELAY = GnomeConfig.SAVETIME + 1
+
 
     def __init__(self, req: Requester, clipboard) -> None:
         super().__init__()
@@ -81,14 +90,17 @@ class TaskView(GtkSource.View):
         self.req = req
         self.clipboard = clipboard
 
-        # The timeout handler
+        # The timeout handlers, for processing and saving
         self.timeout = None
+        self.save_timeout = None
 
         # Title of the task
         self.title = None
 
-        # Tags applied to this task
+        # Tags applied to this task, and how many times each one appears
+        # in the buffer
         self.task_tags = set()
+        self.task_tags_count = Counter()
 
         # Callbacks. These need to be set after init
         self.browse_tag_cb = NotImplemented
@@ -130,27 +142,65 @@ class TaskView(GtkSource.View):
         self.checkbox_tag = CheckboxTag()
         self.table.add(self.checkbox_tag)
 
-        # Tags applied to the buffer. Does not include Title or subtasks,
-        # since this is used to remove the tags from the tag table, which
-        # also removes them from the buffer
-        self.tags_applied = []
+        # Tags applied to the buffer (except Title and checkboxes), mapped
+        # to a key describing what they highlight. This is used to reuse or
+        # remove tags from the tag table, which also removes them from
+        # the buffer
+        self.tags_applied: Dict[Gtk.TextTag, Tuple] = {}
+
+        # Tags found on the line being processed, indexed by key and
+        # bounds. Whatever is left after the detection gets removed.
+        self.line_tags: Dict[Tuple, Gtk.TextTag] = {}
+
+        # Tags that were (maybe partially) in a deleted range of text
+        self.maybe_deleted = set()
+
+        # Region of the buffer that changed since the last process()
+        self.dirty = False
+        start = self.buffer.get_start_iter()
+        self.dirty_start = self.buffer.create_mark(None, start, True)
+        self.dirty_end = self.buffer.create_mark(None, start, False)
 
         # Keep track of subtasks in this task. Tags keeps all the subtask tags
-        # applied in the buffer, while 'to_delete' is a temporary list used in
-        # process() to determine which subtasks we have to delete from the
-        # task.
+        # applied in the buffer. 'to_delete' and 'found' are temporary sets
+        # used in process(): subtasks seen in the processed lines before
+        # detection, and the ones detected again. The difference is what
+        # we have to delete from the task.
         self.subtasks = {
             'tags': [],
-            'to_delete': []
+            'to_delete': set(),
+            'found': set(),
         }
 
+        # Whether subtasks were added, removed or renamed during process()
+        self.subtasks_changed = False
+
         # Signals and callbacks
         self.id_modified = self.buffer.connect('changed', self.on_modified)
+        self.buffer.connect_after('insert-text', self.on_insert_text)
+        self.buffer.connect('delete-range', self.on_delete_range)
+        self.buffer.connect_after('delete-range', self.on_range_deleted)
         self.motion_controller = Gtk.EventControllerMotion(widget=self)
         self.motion_controller.connect('motion', self.on_mouse_move)
         self.key_controller = Gtk.EventControllerKey(widget=self)
         self.key_controller.connect('key-pressed', self.on_key_pressed)
         self.key_controller.connect('key-released', self.on_key_released)
+        self.id_status = self.req.connect('status-changed',
+                                          self.on_status_changed)
+        self.connect('destroy', self.on_destroy)
+
+
+    def on_destroy(self, widget) -> None:
+        """Stop the timeouts and signals that refer to this view."""
+
+        self.req.disconnect(self.id_status)
+
+        for source in (self.timeout, self.save_timeout):
+            if source:
+                GLib.source_remove(source)
+
+        self.timeout = None
+        self.save_timeout = None
 
 
     def on_modified(self, buffer: Gtk.TextBuffer) -> None:
@@ -163,57 +213,172 @@ class TaskView(GtkSource.View):
         self.timeout = GLib.timeout_add(self.PROCESSING_DELAY, self.process)
 
 
+    def on_insert_text(self, buffer, location, text, length) -> None:
+        """Mark inserted text as dirty (location is now after it)."""
+
+        start = location.copy()
+        start.backward_chars(len(text))
+        self.mark_dirty(start, location)
+
+
+    def on_delete_range(self, buffer, start, end) -> None:
+        """Remember the tags in a range that is about to be deleted."""
+
+        self.maybe_deleted.update(self.get_tags_in_range(start, end))
+
+
+    def on_range_deleted(self, buffer, start, end) -> None:
+        """Mark the place where text was deleted as dirty."""
+
+        self.mark_dirty(start, end)
+
+
+    def on_status_changed(self, req, tid, old_status, new_status) -> None:
+        """Refresh the line of a subtask whose status changed."""
+
+        if tid in self.subtasks['tags'] and self.mark_subtask_dirty(tid):
+            self.on_modified(self.buffer)
+
+
+    def mark_dirty(self, start: Gtk.TextIter, end: Gtk.TextIter) -> None:
+        """Extend the region that has to be processed again."""
+
+        if self.dirty:
+            dirty_start = self.buffer.get_iter_at_mark(self.dirty_start)
+            dirty_end = self.buffer.get_iter_at_mark(self.dirty_end)
+
+            if dirty_start.compare(start) < 0:
+                start = dirty_start
+
+            if dirty_end.compare(end) > 0:
+                end = dirty_end
+
+        self.buffer.move_mark(self.dirty_start, start)
+        self.buffer.move_mark(self.dirty_end, end)
+        self.dirty = True
+
+
+    def mark_subtask_dirty(self, tid: str) -> bool:
+        """Mark the line of a subtask as dirty. Returns False if the subtask
+        isn't in the buffer."""
+
+        for tag, key in self.tags_applied.items():
+            if key == ('subtask', tid):
+                start = self.buffer.get_start_iter()
+
+                if start.has_tag(tag) or start.forward_to_tag_toggle(tag):
+                    end = start.copy()
+                    end.forward_to_tag_toggle(tag)
+                    self.mark_dirty(start, end)
+                    return True
+
+                break
+
+        return False
+
+
+    def queue_save(self) -> None:
+        """Save the task once the text didn't change for SAVE_DELAY."""
+
+        if self.save_timeout:
+            GLib.source_remove(self.save_timeout)
+
+        self.save_timeout = GLib.timeout_add_seconds(self.SAVE_DELAY,
+                                                     self.on_save_timeout)
+
+
+    def on_save_timeout(self) -> bool:
+        self.save_timeout = None
+        self.save_cb()
+        return False
+
+
     def process(self) -> None:
-        """Process the contents of the text buffer."""
+        """Process the lines of the text buffer that changed."""
 
-        if not self.buffer.props.text:
+        if not self.buffer.get_char_count():
             # Why process if there's nothing to process
             return
 
+        if not self.dirty:
+            self.timeout = None
+            return False
+
         log.debug('Processing text buffer after %dms', self.PROCESSING_DELAY)
         bench_start = 0  # saving call on time() in non debug mode
         if log.isEnabledFor(logging.DEBUG):
             bench_start = time()
 
-        # Clear all tags first
-        [self.table.remove(t) for t in self.tags_applied]
-        self.tags_applied = []
-
-        # Keep a copy and clear list of task tags
+        # Keep a copy of what we derive from the text, to know if we
+        # have something new to save at the end
         prev_tasktags = self.task_tags.copy()
-        self.task_tags.clear()
+        prev_title = self.title
+        self.subtasks_changed = False
 
-        start = self.detect_title()
-        start.forward_line()
+        self.subtasks['to_delete'] = set()
+        self.subtasks['found'] = set()
+        seen_tags = set()
 
-        self.subtasks['to_delete'] = self.subtasks['tags'].copy()
+        start = self.buffer.get_iter_at_mark(self.dirty_start)
+        start.set_line_offset(0)
 
-        # Parse the text line by line until the end of the buffer
+        if start.get_line() == 0:
+            end = start.copy()
+            end.forward_to_line_end()
+            seen_tags.update(self.collect_line_tags(start, end))
+
+            start = self.detect_title()
+            self.clear_line_tags()
+            start.forward_line()
+
+        # Parse the text line by line until the end of the dirty region.
+        # The region can change while we go (subtasks add/remove text),
+        # so the end mark is checked on every line.
         while not start.is_end():
+            last_line = self.buffer.get_iter_at_mark(self.dirty_end)
+
+            if start.get_line() > last_line.get_line():
+                break
+
             end = start.copy()
             end.forward_to_line_end()
             text = self.buffer.get_text(start, end, True)
+            seen_tags.update(self.collect_line_tags(start, end))
 
-            # Avoid empty new lines
-            if text.startswith('\n'):
-                start.forward_line()
-                continue
+            if not self.detect_subtasks(text, start):
+                self.detect_subheading(text, start.copy())
+                self.detect_url(text, start.copy())
+                self.detect_internal_link(text, start.copy())
+                self.detect_tag(text, start.copy())
 
-            if self.detect_subtasks(text, start):
-                start.forward_line()
-                continue
+            self.clear_line_tags()
+            start.forward_line()
 
-            self.detect_subheading(text, start)
-            self.detect_url(text, start)
-            self.detect_internal_link(text, start)
-            self.detect_tag(text, start)
+        # Tags that vanished with deleted text
+        for tag in self.maybe_deleted:
+            if tag in self.tags_applied and tag not in seen_tags:
+                key = self.tags_applied[tag]
 
-            start.forward_line()
+                if key[0] == 'subtask':
+                    self.subtasks['to_delete'].add(key[1])
+
+                self.remove_text_tag(tag)
+
+        self.maybe_deleted.clear()
 
         # Remove subtasks that were deleted
-        for tid in self.subtasks['to_delete']:
-            self.delete_subtask_cb(tid)
-            self.subtasks['tags'].remove(tid)
+        for tid in self.subtasks['to_delete'] - self.subtasks['found']:
+            if tid in self.subtasks['tags']:
+                self.delete_subtask_cb(tid)
+                self.subtasks['tags'].remove(tid)
+                self.subtasks_changed = True
+
+        # Update the tags used in the text
+        self.task_tags.clear()
+        self.task_tags.update(t for t, c in self.task_tags_count.items() if c)
+
+        for tasktag in self.task_tags.difference(prev_tasktags):
+            self.add_tasktag_cb(tasktag)
 
         # Clear tags that were added but aren't used anymore
         for tasktag in prev_tasktags.difference(self.task_tags):
@@ -222,14 +387,115 @@ class TaskView(GtkSource.View):
         if log.isEnabledFor(logging.DEBUG):
             log.debug('Processed in %.2fms', (time() - bench_start) * 1000)
 
+        self.dirty = False
         self.buffer.set_modified(False)
-        self.save_cb()
+
+        if (self.title != prev_title
+           or self.task_tags != prev_tasktags
+           or self.subtasks_changed):
+            self.save_cb()
+
+        # Changes to the rest of the text are saved once the typing stops,
+        # so they don't wait for the editor to close
+        self.queue_save()
 
         # Return False to only run the function once,
         # and clear the handle for next time.
         self.timeout = None
         return False
 
+    # --------------------------------------------------------------------------
+    # TEXT TAGS BOOKKEEPING
+    # --------------------------------------------------------------------------
+
+    def get_tags_in_range(self, start: Gtk.TextIter,
+                          end: Gtk.TextIter) -> Dict[Gtk.TextTag, Tuple]:
+        """Get the tags applied in a range, with their bounds (as offsets)."""
+
+        found = {}
+        cursor = start.copy()
+
+        while cursor.compare(end) < 0:
+            for tag in cursor.get_tags():
+                if tag in found or tag not in self.tags_applied:
+                    continue
+
+                tag_start = cursor.copy()
+                if not tag_start.starts_tag(tag):
+                    tag_start.backward_to_tag_toggle(tag)
+
+                tag_end = cursor.copy()
+                tag_end.forward_to_tag_toggle(tag)
+
+                found[tag] = (tag_start.get_offset(), tag_end.get_offset())
+
+            if not cursor.forward_to_tag_toggle(None):
+                break
+
+        return found
+
+
+    def collect_line_tags(self, start: Gtk.TextIter,
+                          end: Gtk.TextIter) -> Dict[Gtk.TextTag, Tuple]:
+        """Index the tags of a line before running the detection on it."""
+
+        tags = self.get_tags_in_range(start, end)
+
+        for tag, bounds in tags.items():
+            key = self.tags_applied[tag]
+
+            if key[0] == 'subtask':
+                self.subtasks['to_delete'].add(key[1])
+
+            if (key, bounds) in self.line_tags:
+                # Same tag twice in the same place, drop one
+                self.remove_text_tag(tag)
+            else:
+                self.line_tags[(key, bounds)] = tag
+
+        return tags
+
+
+    def clear_line_tags(self) -> None:
+        """Remove the tags that weren't detected again on this line."""
+
+        for tag in self.line_tags.values():
+            self.remove_text_tag(tag)
+
+        self.line_tags.clear()
+
+
+    def apply_text_tag(self, key: Tuple, factory: Callable,
+                       start: Gtk.TextIter, end: Gtk.TextIter) -> Gtk.TextTag:
+        """Apply a text tag, unless the same one is already in place."""
+
+        bounds = (start.get_offset(), end.get_offset())
+
+        try:
+            return self.line_tags.pop((key, bounds))
+        except KeyError:
+            pass
+
+        tag = factory()
+        self.table.add(tag)
+        self.buffer.apply_tag(tag, start, end)
+        self.tags_applied[tag] = key
+
+        if key[0] == 'tag':
+            self.task_tags_count[key[1]] += 1
+
+        return tag
+
+
+    def remove_text_tag(self, tag: Gtk.TextTag) -> None:
+        """Remove a text tag from the table (and the buffer)."""
+
+        key = self.tags_applied.pop(tag)
+        self.table.remove(tag)
+
+        if key[0] == 'tag':
+            self.task_tags_count[key[1]] -= 1
+
     # --------------------------------------------------------------------------
     # DETECTION
     # --------------------------------------------------------------------------
@@ -268,21 +534,19 @@ class TaskView(GtkSource.View):
             after_checkbox.forward_char()
 
             # Add the internal link
-            link_tag = InternalLinkTag(tid, status)
-            self.table.add(link_tag)
-
             end = start.copy()
             end.forward_to_line_end()
-            self.buffer.apply_tag(link_tag, after_checkbox, end)
-            self.tags_applied.append(link_tag)
+            self.apply_text_tag(('subtask-link', tid, status),
+                                partial(InternalLinkTag, tid, status),
+                                after_checkbox, end)
 
             # Add the subtask tag
             start.backward_char()
-            subtask_tag = SubTaskTag(tid)
-            self.table.add(subtask_tag)
-            self.buffer.apply_tag(subtask_tag, start, end)
+            self.apply_text_tag(('subtask', tid), partial(SubTaskTag, tid),
+                                start, end)
 
             self.subtasks['tags'].append(tid)
+            self.subtasks_changed = True
             return True
 
         # A subtask already exists
@@ -340,30 +604,26 @@ class TaskView(GtkSource.View):
                     return False
 
 
-            try:
-                self.subtasks['to_delete'].remove(tid)
-            except ValueError:
-                pass
+            self.subtasks['found'].add(tid)
 
+            old_title = task.get_title()
             self.rename_subtask_cb(tid, text)
 
-            # Get the task and instantiate an internal link tag
-            status = task.get_status() if task else 'Active'
-            link_tag = InternalLinkTag(tid, status)
-            self.table.add(link_tag)
+            if task.get_title() != old_title:
+                self.subtasks_changed = True
 
-            # Apply the new internal link tag (which was removed
-            # by process())
+            # Apply the internal link tag. If it's still there with the same
+            # status it's reused, otherwise process() removes the old one
+            status = task.get_status() if task else 'Active'
             end = start.copy()
             end.forward_to_line_end()
-            self.buffer.apply_tag(link_tag, after_checkbox, end)
-            self.tags_applied.append(link_tag)
+            self.apply_text_tag(('subtask-link', tid, status),
+                                partial(InternalLinkTag, tid, status),
+                                after_checkbox, end)
 
-            # Re-apply the subtask tag too
-            self.table.remove(sub_tag)
-            subtask_tag = SubTaskTag(tid)
-            self.table.add(subtask_tag)
-            self.buffer.apply_tag(subtask_tag, start, end)
+            # Same for the subtask tag
+            self.apply_text_tag(('subtask', tid), partial(SubTaskTag, tid),
+                                start, end)
 
             return True
 
@@ -382,6 +642,9 @@ class TaskView(GtkSource.View):
             return
 
         task.toggle_status()
+
+        # Process the subtask line again to refresh its link
+        self.mark_subtask_dirty(tid)
         self.process()
 
 
@@ -427,14 +690,9 @@ class TaskView(GtkSource.View):
             # I find this confusing too :)
             tag_name = match.group(0)
             tag_name = tag_name.replace('@', '')
-            tag_tag = TaskTagTag(tag_name, self.req)
-            self.tags_applied.append(tag_tag)
-
-            self.table.add(tag_tag)
-            self.buffer.apply_tag(tag_tag, tag_start, tag_end)
-            self.task_tags.add(tag_name)
-
-            self.add_tasktag_cb(tag_name)
+            self.apply_text_tag(('tag', tag_name),
+                                partial(TaskTagTag, tag_name, self.req),
+                                tag_start, tag_end)
 
 
     def detect_internal_link(self, text: str, start: Gtk.TextIter) -> None:
@@ -455,11 +713,10 @@ class TaskView(GtkSource.View):
             task = self.req.get_task(tid)
 
             if task:
-                link_tag = InternalLinkTag(task)
-                self.tags_applied.append(link_tag)
-
-                self.table.add(link_tag)
-                self.buffer.apply_tag(link_tag, url_start, url_end)
+                status = task.get_status()
+                self.apply_text_tag(('link', tid, status),
+                                    partial(InternalLinkTag, tid, status),
+                                    url_start, url_end)
 
 
     def detect_url(self, text: str, start: Gtk.TextIter) -> None:
@@ -476,11 +733,9 @@ class TaskView(GtkSource.View):
             url_start.forward_chars(match.start())
             url_end.forward_chars(match.end())
 
-            url_tag = LinkTag(match.group(0))
-            self.tags_applied.append(url_tag)
-
-            self.table.add(url_tag)
-            self.buffer.apply_tag(url_tag, url_start, url_end)
+            url = match.group(0)
+            self.apply_text_tag(('url', url), partial(LinkTag, url),
+                                url_start, url_end)
 
 
     def detect_subheading(self, text: str, start: Gtk.TextIter) -> None:
@@ -490,19 +745,12 @@ class TaskView(GtkSource.View):
             end = start.copy()
             end.forward_chars(2)
 
-            invisible_tag = InvisibleTag()
-            self.table.add(invisible_tag)
-            self.buffer.apply_tag(invisible_tag, start, end)
+            self.apply_text_tag(('invisible',), InvisibleTag, start, end)
 
             start.forward_chars(2)
             end.forward_to_line_end()
 
-            subheading_tag = SubheadingTag()
-            self.table.add(subheading_tag)
-            self.buffer.apply_tag(subheading_tag, start, end)
-
-            self.tags_applied.append(subheading_tag)
-            self.tags_applied.append(invisible_tag)
+            self.apply_text_tag(('subheading',), SubheadingTag, start, end)
 
 
     def detect_title(self) -> Gtk.TextIter:
@@ -516,11 +764,14 @@ class TaskView(GtkSource.View):
 
         end = start.copy()
         end.forward_to_line_end()
-        buffer_end = self.buffer.get_end_iter()
+
+        # The title tag can only have spread over the lines that changed
+        dirty_end = self.buffer.get_iter_at_mark(self.dirty_end)
+        dirty_end.forward_to_line_end()
 
         # Set the tag to the first line and remove it everywhere below
         self.buffer.apply_tag(self.title_tag, start, end)
-        self.buffer.remove_tag(self.title_tag, end, buffer_end)
+        self.buffer.remove_tag(self.title_tag, end, dirty_end)
 
         title = self.buffer.get_text(start, end, False)
         self.detect_tag(title, start)
@@ -840,16 +1091,15 @@ class TaskView(GtkSource.View):
         end = start.copy()
         end.forward_to_line_end()
 
-        link_tag = InternalLinkTag(tid, task.get_status())
-        self.table.add(link_tag)
-        self.buffer.apply_tag(link_tag, start, end)
-        self.tags_applied.append(link_tag)
+        status = task.get_status()
+        self.apply_text_tag(('subtask-link', tid, status),
+                            partial(InternalLinkTag, tid, status),
+                            start, end)
 
         # Apply subtask tag to everything
         start.backward_char()
-        subtask_tag = SubTaskTag(tid)
-        self.table.add(subtask_tag)
-        self.buffer.apply_tag(subtask_tag, start, end)
+        self.apply_text_tag(('subtask', tid), partial(SubTaskTag, tid),
+                            start, end)
 
         self.subtasks['tags'].append(tid)
 
@@ -27,8 +27,10 @@ import logging
 from gi.repository import GObject, Gtk, GdkPixbuf, GLib, Gio
 
 from gettext import gettext as _
-from GTG.plugins.export.task_str import get_task_wrappers
-from GTG.plugins.export.templates import Template, get_templates_paths
+from GTG.plugins.export.streaming import (ExportJob, get_exporter,
+                                          get_exporter_paths)
+from GTG.plugins.export.task_str import walk_tasks
+from GTG.plugins.export.templates import get_templates_paths
 
 log = logging.getLogger(__name__)
 
@@ -63,6 +65,7 @@ class ExportPlugin():
     def __init__(self):
         self.filename = None
         self.template = None
+        self.job = None
 
     def activate(self, plugin_api):
         """ Loads saved preferences """
@@ -73,6 +76,9 @@ class ExportPlugin():
 
     def deactivate(self, plugin_api):
         """ Removes the gtk widgets before quitting """
+        if self.job:
+            self.job.cancel()
+            self.job = None
         self._gtk_deactivate()
 
 # CALLBACK AND CORE FUNCTIONS #################################################
@@ -83,10 +89,12 @@ class ExportPlugin():
 
         model = self.combo.get_model()
         active = self.combo.get_active()
-        self.template = Template(model[active][0])
+        self.template = get_exporter(model[active][0])
 
-        tasks = self.get_selected_tasks()
-        if len(tasks) == 0:
+        tree, timespan = self.get_selected_tree()
+        timespan_ids = self.get_timespan_ids(timespan)
+        if next(walk_tasks(tree, timespan, timespan_ids=timespan_ids),
+                None) is None:
             self.show_error_dialog(_("No task matches your criteria. "
                                      "Empty report can't be generated."))
             return
@@ -99,20 +107,31 @@ class ExportPlugin():
 
         self.save_button.set_sensitive(False)
         self.open_button.set_sensitive(False)
-
-        try:
-            self.template.generate(tasks, self.plugin_api,
-                                   self.on_export_finished)
-        except Exception as err:
-            self.show_error_dialog(
-                _("GTG could not generate the document: %s") % err)
-            raise
-
-    def on_export_finished(self):
+        self.progress.set_fraction(0)
+        self.progress.set_text(_("Collecting tasks…"))
+        self.progress.show()
+
+        self.job = ExportJob(tree, timespan, self.template, self.plugin_api,
+                             self.on_export_progress, self.on_export_finished,
+                             timespan_ids)
+        self.job.start()
+
+    def on_export_progress(self, fraction):
+        """ Show how many tasks were collected """
+        self.progress.set_fraction(fraction)
+        if fraction >= 1:
+            self.progress.set_text(_("Writing the document…"))
+
+    def on_export_finished(self, job):
         """ Save generated file or open it, reenable buttons
         and hide dialog """
+        self.job = None
+        self.progress.hide()
         document_path = self.template.get_document_path()
-        if document_path:
+        if job.error:
+            self.show_error_dialog(
+                _("GTG could not generate the document: %s") % job.error)
+        elif document_path:
             if self.filename:
                 shutil.copyfile(document_path, self.filename)
             else:
@@ -125,8 +144,8 @@ class ExportPlugin():
         self.open_button.set_sensitive(True)
         self.export_dialog.hide()
 
-    def get_selected_tasks(self):
-        """ Filter tasks based on user option """
+    def get_selected_tree(self):
+        """ Return the tree and timespan of tasks based on user option """
         timespan = None
         req = self.plugin_api.get_requester()
 
@@ -142,7 +161,17 @@ class ExportPlugin():
         if treename not in tree.list_applied_filters():
             tree.apply_filter(treename)
 
-        return get_task_wrappers(tree, timespan)
+        return tree, timespan
+
+    def get_timespan_ids(self, timespan):
+        """ Return the ids of the tasks done in the timespan, as a set.
+        None if there is no timespan, or the requester can't tell. """
+        if timespan is None or timespan >= 0:
+            return None
+
+        req = self.plugin_api.get_requester()
+        ids = req.get_tasks_done_since(-timespan)
+        return None if ids is None else set(ids)
 
 # GTK FUNCTIONS ###############################################################
     def _init_gtk(self):
@@ -172,6 +201,7 @@ class ExportPlugin():
         self.description_label = builder.get_object("label_description")
         self.save_button = builder.get_object("export_btn_save")
         self.open_button = builder.get_object("export_btn_open")
+        self.progress = builder.get_object("export_progress")
 
         self.export_all_active = builder.get_object(
             "export_all_active_rb")
@@ -214,10 +244,10 @@ class ExportPlugin():
         model = self.combo.get_model()
         model.clear()
 
-        templates = get_templates_paths()
+        templates = get_exporter_paths(get_templates_paths())
         active_entry = None
         for i, path in enumerate(templates):
-            template = Template(path)
+            template = get_exporter(path)
             if path == self.preferences["last_template"]:
                 active_entry = i
 
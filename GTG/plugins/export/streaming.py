@@ -0,0 +1,244 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+""" Exporting without blocking the user interface
+
+Tasks are walked on the main loop a few at a time, and the document is
+written from a thread. JSON Lines and CSV documents are written while
+the tasks are walked, templates once all tasks are there. """
+
+import logging
+import os.path
+import queue
+import tempfile
+import threading
+from gettext import gettext as _
+
+from gi.repository import GLib
+
+from GTG.core.export_formats import FIELDS, write_csv, write_jsonl
+from GTG.plugins.export.task_str import TaskStr, TaskStrBuilder, walk_tasks
+from GTG.plugins.export.templates import Template
+
+log = logging.getLogger(__name__)
+
+
+def task_record(task, parent_id):
+    """ Fields of a TaskStr as a dict """
+    return {name: parent_id if name == 'parent' else getattr(task, name)
+            for name in FIELDS}
+
+
+class StreamExporter():
+    """ Write tasks one by one in a machine readable format, as they come.
+
+    Used in place of a Template, without thumbnail nor script. """
+
+    PATH = None
+    SUFFIX = None
+    TITLE = None
+    DESCRIPTION = None
+
+    def __init__(self):
+        self._document_path = None
+
+    def get_path(self):
+        """ Return the name of the format """
+        return self.PATH
+
+    def get_image_path(self):
+        """ No thumbnail """
+        return None
+
+    def get_title(self):
+        """ Return title of the format """
+        return self.TITLE
+
+    def get_description(self):
+        """ Return description of the format """
+        return self.DESCRIPTION
+
+    def get_document_path(self):
+        """ Return path to generated document.
+        Return None until the document is written."""
+        return self._document_path
+
+    def write_document(self, records):
+        """ Write tasks from an iterable of task_record() dicts """
+        with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8',
+                                         newline='', suffix=self.SUFFIX,
+                                         delete=False) as output:
+            self.write_records(output, records)
+
+        self._document_path = output.name
+
+    def write_records(self, stream, records):
+        """ Write all the records to a stream """
+        raise NotImplementedError
+
+
+class JsonLinesExporter(StreamExporter):
+    """ One JSON object by task and by line """
+
+    PATH = 'builtin:jsonl'
+    SUFFIX = '.jsonl'
+    TITLE = _('JSON Lines')
+    DESCRIPTION = _('One JSON object per task, to be read by other programs. '
+                    'Subtasks have the id of their parent.')
+
+    def write_records(self, stream, records):
+        write_jsonl(stream, records)
+
+
+class CsvExporter(StreamExporter):
+    """ One row by task, with a header """
+
+    PATH = 'builtin:csv'
+    SUFFIX = '.csv'
+    TITLE = _('CSV')
+    DESCRIPTION = _('A table with one task per row, for spreadsheets. '
+                    'Subtasks have the id of their parent.')
+
+    def write_records(self, stream, records):
+        write_csv(stream, records)
+
+
+STREAM_EXPORTERS = {exporter.PATH: exporter
+                    for exporter in (JsonLinesExporter, CsvExporter)}
+
+
+def get_exporter(path):
+    """ Return the exporter of a path, from get_exporter_paths() """
+    try:
+        return STREAM_EXPORTERS[path]()
+    except KeyError:
+        return Template(path)
+
+
+def get_exporter_paths(template_paths):
+    """ Return the paths of the machine readable formats, then templates """
+    return list(STREAM_EXPORTERS) + template_paths
+
+
+class ExportJob():
+    """ Export the tasks of a tree with an exporter.
+
+    progress is called on the main loop with the fraction of tasks
+    walked, finished with the job once the document is written. """
+
+    # Tasks walked at each run of the main loop
+    CHUNK_SIZE = 200
+
+    def __init__(self, tree, days, exporter, plugin_api, progress, finished,
+                 timespan_ids=None):
+        self.exporter = exporter
+        self.plugin_api = plugin_api
+        self.count = 0
+        self.error = None
+
+        self._total = max(len(tree.get_all_nodes()), 1)
+        self._walk = walk_tasks(tree, days, timespan_ids=timespan_ids)
+        self._progress = progress
+        self._finished = finished
+        self._cancelled = False
+        self._source = None
+
+        if isinstance(exporter, StreamExporter):
+            self._queue = queue.Queue()
+            self._builder = None
+        else:
+            self._queue = None
+            self._builder = TaskStrBuilder()
+
+    def start(self):
+        """ Start walking the tasks """
+        if self._queue is not None:
+            self._start_thread(self._write_stream)
+
+        self._source = GLib.idle_add(self._walk_chunk)
+
+    def cancel(self):
+        """ Stop walking tasks, and don't call finished """
+        self._cancelled = True
+        if self._source:
+            GLib.source_remove(self._source)
+            self._source = None
+        if self._queue is not None:
+            self._queue.put(None)
+
+    def _walk_chunk(self):
+        for _i in range(self.CHUNK_SIZE):
+            try:
+                task, parent_id = next(self._walk)
+            except StopIteration:
+                self._source = None
+                self._walk_done()
+                return False
+
+            self.count += 1
+            if self._queue is not None:
+                self._queue.put(task_record(TaskStr(task, []), parent_id))
+            else:
+                self._builder.add(task, parent_id)
+
+        self._progress(min(self.count / self._total, 1.0))
+        return True
+
+    def _walk_done(self):
+        self._progress(1.0)
+        if self._queue is not None:
+            self._queue.put(None)
+        else:
+            self._start_thread(self._write_template)
+
+    def _start_thread(self, target):
+        threading.Thread(target=self._run, args=(target,),
+                         daemon=True).start()
+
+    def _run(self, target):
+        """ Write the document in the thread, then get back to the main loop
+        """
+        try:
+            target()
+        except Exception as error:
+            log.exception('Failed to export tasks')
+            self.error = error
+
+        if not self._cancelled:
+            GLib.idle_add(self._finished, self)
+
+    def _records(self):
+        while True:
+            record = self._queue.get()
+            if record is None:
+                return
+            yield record
+
+    def _write_stream(self):
+        self.exporter.write_document(self._records())
+        if self._cancelled:
+            self._remove_document()
+
+    def _write_template(self):
+        self.exporter.write_document(self._builder.roots, self.plugin_api)
+        self.exporter.run_script()
+
+    def _remove_document(self):
+        path = self.exporter.get_document_path()
+        if path and os.path.exists(path):
+            os.remove(path)
@@ -26,6 +26,7 @@ class TaskStr():
     # Ignore big number of properties and small number of public methods
 
     def __init__(self, task, subtasks):
+        self.id = task.get_id()
         self.title = task.get_title()
         self.text = str(task.get_text())
         self.status = task.get_status()
@@ -51,39 +52,65 @@ class TaskStr():
     has_tags = property(lambda s: s.tags != [])
 
 
-def get_task_wrappers(tree, days=None, task_id=None):
-    """ Recursively find all task on given tree and
-    convert them into TaskStr
+def is_in_timespan(task, days):
+    """ Return True if days is not set.
+    If days < 0, returns True if the task has been done in the last
+    #abs(days).
+    If days >= 0, returns True if the task is due in the next #days """
+    if days is None:
+        return True
+    elif days < 0:
+        done = task.get_status() == task.STA_DONE
+        closed_date = task.get_closed_date()
+        return done and closed_date and closed_date.days_left() >= days
+    else:
+        return task.get_days_left() <= days
+
+
+def walk_tasks(tree, days=None, task_id=None, timespan_ids=None):
+    """ Go through the tree depth first, without recursion.
+
+    Yields (task, parent_id) for the tasks in the timespan, parents
+    before their subtasks. Subtasks of a task out of the timespan are
+    skipped along with it.
 
     tree - tree of tasks
     days - filter days in certain timespan
-    task_id - return subtasks of this tasks. If not set, use root node """
-
-    def _is_in_timespan(task):
-        """ Return True if days is not set.
-        If days < 0, returns True if the task has been done in the last
-        #abs(days).
-        If days >= 0, returns True if the task is due in the next #days """
-        if days is None:
-            return True
-        elif days < 0:
-            done = task.get_status() == task.STA_DONE
-            closed_date = task.get_closed_date()
-            return done and closed_date and closed_date.days_left() >= days
-        else:
-            return task.get_days_left() <= days
-
-    subtasks = []
-    for sub_id in tree.node_all_children(task_id):
-        subtask = get_task_wrappers(tree, days, sub_id)
-        if subtask is not None:
-            subtasks.append(subtask)
-
-    if task_id is None:
-        return subtasks
-    else:
-        task = tree.get_node(task_id)
-        if task is None or not _is_in_timespan(task):
-            return None
+    task_id - walk the subtasks of this tasks. If not set, use root node
+    timespan_ids - ids of the tasks in the timespan, if already known.
+    Tasks are not checked one by one then. """
+    stack = [(sub_id, task_id)
+             for sub_id in reversed(tree.node_all_children(task_id))]
+
+    while stack:
+        node_id, parent_id = stack.pop()
+        task = tree.get_node(node_id)
+        if task is None:
+            continue
+        elif timespan_ids is not None:
+            if node_id not in timespan_ids:
+                continue
+        elif not is_in_timespan(task, days):
+            continue
+
+        yield task, parent_id
+
+        stack.extend((sub_id, node_id)
+                     for sub_id in reversed(tree.node_all_children(node_id)))
+
+
+class TaskStrBuilder():
+    """ Put together the TaskStr of tasks walked by walk_tasks() """
+
+    def __init__(self):
+        self.roots = []
+        # A task can be under several parents, keep the wrapper of each
+        # place it was walked in, by the id of its parent
+        self._subtasks = {}
 
-        return TaskStr(task, subtasks)
+    def add(self, task, parent_id):
+        """ Wrap a task, parents must be added before their subtasks """
+        wrapper = TaskStr(task, [])
+        self._subtasks.setdefault(parent_id, self.roots).append(wrapper)
+        self._subtasks[wrapper.id] = wrapper.subtasks
+        return wrapper
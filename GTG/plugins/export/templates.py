@@ -22,12 +22,10 @@ import os.path
 import subprocess
 import sys
 import tempfile
-import threading
 
 from GTG.core.dirs import plugin_configuration_dir
 
 from Cheetah.Template import Template as CheetahTemplate
-from gi.repository import GObject, GLib
 
 TEMPLATE_PATHS = [
     os.path.join(plugin_configuration_dir('export'), "export_templates"),
@@ -109,11 +107,14 @@ class Template():
 
     def get_document_path(self):
         """ Return path to generated document.
-        Return None until generate() was successful."""
+        Return None until write_document() was successful."""
         return self._document_path
 
-    def generate(self, tasks, plugin_api, callback):
-        """ Fill template and run callback when finished.
+    def write_document(self, tasks, plugin_api):
+        """ Fill template, writing the document as it is generated.
+
+        This blocks until the document is written, so it's best called
+        from a thread. Templates should then only read from plugin_api.
 
         Created files are saved with the same suffix as the template. Opening
         the final file determines its type based on suffix. """
@@ -122,54 +123,51 @@ class Template():
                                                 'plugin_api': plugin_api}])
 
         suffix = ".%s" % self._get_suffix()
-        output = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
-        output.write(str(document).encode('utf-8'))
+        with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8',
+                                         suffix=suffix,
+                                         delete=False) as output:
+            document.respond(trans=_FileTransaction(output))
+
         self._document_path = output.name
-        output.close()
 
-        if self._script_path:
-            self._run_script(callback)
-        else:
-            callback()
+    def run_script(self):
+        """ Run script of the template, if any, using its shebang
 
-    def _run_script(self, callback):
-        """ Run script in its own thread and in other thread wait
-        for the result. """
-        document_ready = threading.Event()
+        The script gets path to a document as it only argument and
+        the resulting file is the only output of the script.
+        This blocks until the script is done. """
+        if not self._script_path:
+            return
 
-        def script():
-            """ Run script using the shebang of the script
+        with open(self._script_path, 'r') as script_file:
+            first_line = script_file.readline().strip()
+            if first_line.startswith('#!'):
+                cmd = [first_line[2:], self._script_path,
+                       self._document_path]
+            else:
+                cmd = None
 
-            The script gets path to a document as it only argument and
-            this thread expects resulting file as the only output of
-            the script. """
+        self._document_path = None
 
-            with open(self._script_path, 'r') as script_file:
-                first_line = script_file.readline().strip()
-                if first_line.startswith('#!'):
-                    cmd = [first_line[2:], self._script_path,
-                           self._document_path]
-                else:
-                    cmd = None
+        if cmd is not None:
+            try:
+                self._document_path = subprocess.Popen(
+                    args=cmd, shell=False,
+                    stdout=subprocess.PIPE).communicate()[0]
+            except Exception:
+                pass
 
+        if self._document_path and not os.path.exists(self._document_path):
             self._document_path = None
 
-            if cmd is not None:
-                try:
-                    self._document_path = subprocess.Popen(
-                        args=cmd, shell=False,
-                        stdout=subprocess.PIPE).communicate()[0]
-                except Exception:
-                    pass
-
-            if self._document_path and not os.path.exists(self._document_path):
-                self._document_path = None
-            document_ready.set()
-
-        def wait_for_document():
-            """ Wait for the completion of the script and finish generation """
-            document_ready.wait()
-            GLib.idle_add(callback)
-
-        threading.Thread(target=script).start()
-        threading.Thread(target=wait_for_document).start()
+
+class _FileTransaction():
+    """ Cheetah transaction writing the document straight to a file,
+    instead of putting it together in memory """
+
+    def __init__(self, stream):
+        self.write = stream.write
+
+    def response(self):
+        """ Cheetah writes to the response of the transaction """
+        return self
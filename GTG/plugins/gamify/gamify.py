@@ -1,6 +1,6 @@
 import os
 import random
-from datetime import date
+from datetime import date, timedelta
 from collections import defaultdict
 import logging
 
@@ -18,11 +18,8 @@ log = logging.getLogger(__name__)
 class Gamify:
     PLUGIN_PATH = os.path.dirname(os.path.abspath(__file__))
     PLUGIN_NAMESPACE = 'gamify'
+    # Tasks done per day and streaks come from the core statistics
     DEFAULT_ANALYTICS = {
-        "last_task_date": date.today(),  # The date of the last task marked as done
-        "last_task_number": 0,           # The number of tasks done today
-        "streak": 0,                     # The number of days in which the goal was achieved
-        "goal_achieved": False,          # achieved today's goal
         "score": 0
     }
     DEFAULT_PREFERENCES = {
@@ -56,6 +53,7 @@ class Gamify:
 
         self.data = None
         self.preferences = None
+        self.statistics = None
 
     def _init_dialog_pref(self):
         # Get the dialog widget
@@ -103,9 +101,10 @@ class Gamify:
         if plugin_api.is_editor():
             return
 
-        # Load preferences and data
-        self.analytics_load()
+        # Load preferences and data, once
+        self.statistics = plugin_api.get_requester().get_statistics()
         self.preferences_load()
+        self.analytics_load()
 
         # Settings up the menu
         self.add_ui()
@@ -117,17 +116,18 @@ class Gamify:
             self.configureable = False
             log.debug('Cannot load preference dialog widget')
 
-        # Connect to the signals
+        # Connect to the signals. The statistics got them first, so tasks
+        # done today are already counted.
         self.signal_connect_id = self.plugin_api.get_requester().connect("status-changed",
                 self.on_status_changed)
 
-        self.update_date()
-        self.update_streak()
-        self.analytics_save()
         self.update_widget()
 
     def deactivate(self, plugin_api):
-        self.browser.disconnect(self.signal_connect_id)
+        if plugin_api.is_editor():
+            return
+
+        self.plugin_api.get_requester().disconnect(self.signal_connect_id)
         self.remove_ui()
 
 
@@ -155,6 +155,25 @@ class Gamify:
             default_values=self.DEFAULT_ANALYTICS
         )
 
+        if 'streak' in self.data:
+            self.analytics_migrate()
+
+    def analytics_migrate(self):
+        """Hand the streak counted by older versions to the statistics"""
+        goal = self.preferences['goal']
+        last_date = self.data['last_task_date']
+
+        self.statistics.add_history(last_date, self.data['last_task_number'])
+
+        # The last day was only part of the streak if it reached the goal
+        first = 0 if self.data['goal_achieved'] else 1
+
+        for days in range(first, first + self.data['streak']):
+            self.statistics.add_history(last_date - timedelta(days=days), goal)
+
+        self.data = {'score': self.data['score']}
+        self.analytics_save()
+
     def analytics_save(self):
         self.plugin_api.save_configuration_object(
             self.PLUGIN_NAMESPACE,
@@ -164,27 +183,6 @@ class Gamify:
 
     # GAMIFY LOGIC #############################################################
 
-    def update_streak(self):
-        if self.data['last_task_number'] >= self.preferences['goal']:
-            if not self.data['goal_achieved']:
-                self.data['goal_achieved'] = True
-                self.data['streak'] += 1
-        else:
-            if self.data['goal_achieved']:
-                self.data['streak'] -= 1
-                self.data['goal_achieved'] = False
-
-    def update_date(self):
-        today = date.today()
-        if self.data['last_task_date'] != today:
-            if self.data['last_task_number'] < self.preferences['goal'] or \
-                    (today - self.data['last_task_date']).days > 1:
-                self.data['streak'] = 0
-
-            self.data['goal_achieved'] = False
-            self.data['last_task_number'] = 0
-            self.data['last_task_date'] = today
-
     def get_current_level(self):
         score_levels = [(score, level) for score, level in self.LEVELS.items()
                 if score >= self.get_score()]
@@ -194,10 +192,10 @@ class Gamify:
         return self.data['score']
 
     def get_number_of_tasks(self):
-        return self.data['last_task_number']
+        return self.statistics.done_on(date.today())
 
     def get_streak(self):
-        return self.data['streak']
+        return self.statistics.streak(self.preferences['goal'])
 
     def on_status_changed(self, sender, task_id, old_status, status):
         if status == Task.STA_DONE:
@@ -207,33 +205,14 @@ class Gamify:
 
     def on_marked_as_done(self, task_id):
         log.debug('a task has been marked as done')
-        self.analytics_load()
-        self.preferences_load()
 
-        # Update the date, if it is different from today
-        self.update_date()
-
-        # Increase the number of tasks done and update the streak
-        # if the goal number of tasks was achieved
-        self.data['last_task_number'] += 1
-        self.update_streak()
         self.data['score'] += self.get_points_for_task(task_id)
         self.analytics_save()
         self.update_widget()
 
     def on_marked_as_not_done(self, task_id):
         log.debug('a task has been marked as not done')
-        self.analytics_load()
-        self.preferences_load()
-
-        self.update_date()
-
-        if self.data['last_task_number'] > 0:
-            self.data['last_task_number'] -= 1
-        else:
-            self.data['last_task_number'] = 0
 
-        self.update_streak()
         if self.data['score'] - (score := self.get_points_for_task(task_id)) >= 0:
             self.data['score'] -= score
         else:
@@ -0,0 +1,203 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) - The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Statistics plugin, showing the numbers of GTG.core.statistics."""
+
+from datetime import date
+from gettext import gettext as _
+from gettext import ngettext
+
+from gi.repository import Gio, Gtk
+
+from GTG.core.plugins.api import PluginAPI
+
+#: Tags shown with their lead time, the ones with most done tasks first
+MAX_TAGS = 10
+
+
+class StatisticsPlugin():
+    """Open a window with statistics about tasks."""
+
+    def __init__(self):
+
+        self.api = None
+        self.window = None
+        self.grid = None
+        self.signal_id = None
+
+        self.menu_item = Gio.MenuItem.new(_('Statistics'),
+                                          'app.plugin.show_statistics')
+
+
+    def activate(self, api: PluginAPI) -> None:
+        """Plugin is activated."""
+
+        self.api = api
+
+        if api.is_editor():
+            return
+
+        self.api.add_menu_item(self.menu_item)
+
+        self.window = Gtk.Window()
+        self.window.set_default_size(360, 480)
+        self.window.set_title(_('Statistics'))
+        self.window.connect('delete-event', self.on_delete_event)
+
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12)
+        box.set_border_width(18)
+
+        self.grid = Gtk.Grid(column_spacing=24, row_spacing=6)
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.add(self.grid)
+        box.pack_start(scrolled, True, True, 0)
+
+        rebuild = Gtk.Button(label=_('Count Again From All Tasks'))
+        rebuild.connect('clicked', self.on_rebuild)
+        box.pack_end(rebuild, False, False, 0)
+
+        self.window.add(box)
+
+        show_action = Gio.SimpleAction.new('plugin.show_statistics', None)
+        show_action.connect('activate', self.open_window)
+        self.api.get_view_manager().add_action(show_action)
+
+        # Refresh while the window is open
+        self.signal_id = self.api.get_requester().connect(
+            'status-changed', self.on_status_changed)
+
+
+    def deactivate(self, api: PluginAPI) -> None:
+        """Deactivates the plugin."""
+
+        if api.is_editor():
+            return
+
+        api.remove_menu_item(self.menu_item)
+        api.get_requester().disconnect(self.signal_id)
+        self.window.destroy()
+
+
+    # --------------------------------------------------------------------------
+    # CONTENT
+    # --------------------------------------------------------------------------
+
+    def add_section(self, row: int, title: str) -> int:
+        label = Gtk.Label(xalign=0)
+        label.set_markup(f'<b>{title}</b>')
+        label.set_margin_top(12 if row else 0)
+        self.grid.attach(label, 0, row, 2, 1)
+        return row + 1
+
+
+    def add_row(self, row: int, name: str, value: str) -> int:
+        self.grid.attach(Gtk.Label(label=name, xalign=0), 0, row, 1, 1)
+        self.grid.attach(Gtk.Label(label=value, xalign=1), 1, row, 1, 1)
+        return row + 1
+
+
+    def days_text(self, days) -> str:
+        if days is None:
+            return '—'
+
+        return ngettext('%.1f day', '%.1f days', days) % days
+
+
+    def refresh(self) -> None:
+        """Fill the window with the current numbers."""
+
+        statistics = self.api.get_requester().get_statistics()
+        today = date.today()
+
+        for child in self.grid.get_children():
+            self.grid.remove(child)
+
+        row = self.add_section(0, _('Done'))
+
+        for days, name in ((1, _('Today')),
+                           (7, _('Last 7 days')),
+                           (30, _('Last 30 days'))):
+            done = sum(n for _day, n in statistics.done_per_day(days, today))
+            row = self.add_row(row, name, str(done))
+
+        per_day = statistics.done_per_day(30, today)
+        average = sum(n for _day, n in per_day) / len(per_day)
+        row = self.add_row(row, _('Per day (last 30 days)'), f'{average:.1f}')
+
+        row = self.add_section(row, _('Open'))
+        row = self.add_row(row, _('All open tasks'),
+                           str(statistics.backlog()))
+
+        previous = 0
+
+        for days, count in statistics.backlog_by_age(today):
+            if days is None:
+                name = _('Older, or without date')
+            else:
+                name = _('Added {start} to {end} days ago').format(
+                    start=previous, end=days)
+                previous = days + 1
+
+            row = self.add_row(row, name, str(count))
+
+        row = self.add_section(row, _('Time to get done'))
+        row = self.add_row(row, _('All tasks'),
+                           self.days_text(statistics.lead_time()))
+
+        tags = sorted(statistics.lead_times().items(),
+                      key=lambda item: item[1][0], reverse=True)
+
+        for tag, (count, days) in tags[:MAX_TAGS]:
+            row = self.add_row(row, f'{tag} ({count})', self.days_text(days))
+
+        since = Gtk.Label(xalign=0)
+        since.set_markup('<small>{}</small>'.format(
+            _('Counting since {date}').format(
+                date=statistics.since.strftime('%x'))))
+        since.set_margin_top(12)
+        self.grid.attach(since, 0, row, 2, 1)
+
+        self.grid.show_all()
+
+
+    # --------------------------------------------------------------------------
+    # CALLBACKS
+    # --------------------------------------------------------------------------
+
+    def open_window(self, widget=None, unused=None) -> None:
+        """Open the statistics window."""
+
+        self.refresh()
+        self.window.set_transient_for(self.api.get_browser())
+        self.window.show_all()
+
+
+    def on_rebuild(self, widget=None) -> None:
+        self.api.get_requester().rebuild_statistics()
+        self.refresh()
+
+
+    def on_status_changed(self, sender, task_id, old_status, status) -> None:
+        if self.window.get_visible():
+            self.refresh()
+
+
+    def on_delete_event(self, widget, data):
+        """Callback when window is closed."""
+
+        return self.window.hide_on_delete()
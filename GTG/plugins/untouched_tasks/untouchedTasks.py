@@ -13,13 +13,12 @@
 # You should have received a copy of the GNU General Public License along with
 # this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from threading import Timer
 import datetime
 import os
 import logging
 from gettext import gettext as _
 
-from gi.repository import Gtk, Gio
+from gi.repository import Gtk, Gio, GLib
 
 log = logging.getLogger(__name__)
 
@@ -64,6 +63,8 @@ class UntouchedTasksPlugin():
         # preferences initialization
         self.is_automatic = False
         self.timer = None
+        # Tasks modified before this were already checked
+        self.last_threshold = None
         self.preferences_load()
         self.preferences_apply()
         # add menu item
@@ -80,16 +81,21 @@ class UntouchedTasksPlugin():
 
     # CORE FUNCTIONS ##############################################################
     def schedule_autopurge(self):
-        self.timer = Timer(self.TIME_BETWEEN_PURGES,
-                           self.add_untouched_tag)
-        self.timer.setDaemon(True)
-        self.timer.start()
+        # In the main loop, like the changes to tasks
+        self.timer = GLib.timeout_add_seconds(self.TIME_BETWEEN_PURGES,
+                                              self.on_autopurge)
         log.debug("Automatic untouched tasks check scheduled")
 
     def cancel_autopurge(self):
         if self.timer:
             log.debug("Automatic untouched tasks check cancelled")
-            self.timer.cancel()
+            GLib.source_remove(self.timer)
+            self.timer = None
+
+    def on_autopurge(self):
+        self.timer = None
+        self.add_untouched_tag()
+        return False
 
     def add_untouched_tag(self, action=None, param=None):
         # If no tag is picked up from preferences
@@ -101,22 +107,23 @@ class UntouchedTasksPlugin():
         today = datetime.date.today()
         max_days = self.preferences["max_days"]
         requester = self.plugin_api.get_requester()
-        closed_tree = requester.get_tasks_tree(name='inactive')
-        closed_tasks = [requester.get_task(tid) for tid in
-                        closed_tree.get_all_nodes()]
-
-        # Add untouched tag to all tasks where new_date < time now
-        for task in closed_tasks:
-            modified_time = task.get_modified()
-            # get_modified might return a gtg.core.Date or a datetime.datetime.  The validity of the comparison depends
-            # on which one we get, so check explicitly.  This should probably be fixed in Task, eventually.
-            new_time = modified_time + datetime.timedelta(days=max_days)
-            if type(new_time) == datetime.datetime:
-                new_time = new_time.date()
-            if new_time < today:
-                log.debug('Adding %r tag to: %r as last time it was modified '
-                          'was %r', tag_name, task.get_title(), modified_time)
-                task.add_tag(tag_name)
+
+        # Tasks not modified since the start of that day are untouched. Only
+        # look at the ones which became untouched since the last check.
+        threshold = datetime.datetime.combine(
+            today - datetime.timedelta(days=max_days), datetime.time())
+        tids = requester.get_tasks_modified_between(self.last_threshold,
+                                                    threshold)
+        self.last_threshold = threshold
+
+        # Tagging a task modifies it, so it leaves the range for now. The
+        # backends write all the tagged tasks at once.
+        for tid in tids:
+            task = requester.get_task(tid)
+            log.debug('Adding %r tag to: %r as last time it was modified '
+                      'was %r', tag_name, task.get_title(),
+                      task.get_modified())
+            task.add_tag(tag_name)
 
         # If automatic purging is on, schedule another run
         if self.is_automatic:
@@ -149,6 +156,8 @@ class UntouchedTasksPlugin():
             self.pref_spinbtn_max_days.get_value()
         self.preferences['default_tag'] = \
             self.pref_tag_name.get_text()
+        # Check all the tasks again, with the new tag or number of days
+        self.last_threshold = None
         self.preferences_apply()
         self.preferences_store()
         self.preferences_dialog.hide()
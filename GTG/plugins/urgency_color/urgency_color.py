@@ -15,6 +15,7 @@
 # this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from math import ceil
+from datetime import date
 from gi.repository import Gtk
 from gi.repository import Gdk
 import os
@@ -35,6 +36,22 @@ class UrgencyColorPlugin():
     def __init__(self):
         self._plugin_api = None
         self.req = None
+        self._tree = None
+        self._cllbcks = []
+
+        # Most urgent active descendant (with a due date) of each task, or
+        # None. If a task is cached, all of its descendants are cached too.
+        self._urgent_child = {}
+
+        # Background color of each task, along with the day it was computed
+        self._color_cache = {}
+
+        # (due date, start date, status, parents) of each task seen so far,
+        # used to tell whether a change affects the color of its ancestors
+        self._node_state = {}
+
+        # Gradient colors, keyed by (days left, day span)
+        self._gradient_cache = {}
 
     def activate(self, plugin_api):
         """ Plugin is activated """
@@ -42,12 +59,124 @@ class UrgencyColorPlugin():
         self.req = self._plugin_api.get_requester()
         self.prefs_load()
         self.prefs_init()
+        self._subscribe_task_updates()
         # Set color function
         self._refresh_task_color()
 
     def _refresh_task_color(self):
+        # Preferences might have changed, every color has to be recomputed
+        self._color_cache.clear()
+        self._gradient_cache.clear()
         self._plugin_api.set_bgcolor_func(self.bgcolor)
 
+    def _subscribe_task_updates(self):
+        """ Listen to task changes to keep the urgency cache fresh """
+        self._tree = self.req.get_main_view()
+        for event, cllbck in [('node-added', self._on_task_modified),
+                              ('node-modified', self._on_task_modified),
+                              ('node-deleted', self._on_task_deleted)]:
+            cllbck_id = self._tree.register_cllbck(event, cllbck)
+            self._cllbcks.append((event, cllbck_id))
+
+    def _unsubscribe_task_updates(self):
+        for event, cllbck_id in self._cllbcks:
+            self._tree.deregister_cllbck(event, cllbck_id)
+        self._cllbcks = []
+
+    def _clear_caches(self):
+        self._urgent_child.clear()
+        self._color_cache.clear()
+        self._node_state.clear()
+        self._gradient_cache.clear()
+
+    def _get_node_state(self, node):
+        return (node.get_due_date(), node.get_start_date(),
+                node.get_status(), tuple(node.get_parents()))
+
+    def _on_task_modified(self, tid, path=None):
+        """ Invalidate the cached colors affected by a task change.
+
+        The color of the task itself is always dropped. Ancestors are only
+        invalidated when the dates, status or parents of the task changed.
+        """
+        self._color_cache.pop(tid, None)
+
+        old_state = self._node_state.pop(tid, None)
+        if not self.req.has_task(tid):
+            self._on_task_deleted(tid)
+            return
+
+        new_state = self._get_node_state(self.req.get_task(tid))
+        self._node_state[tid] = new_state
+
+        if old_state != new_state:
+            parents = set(new_state[-1])
+            if old_state:
+                parents.update(old_state[-1])
+            self._invalidate_ancestors(parents)
+
+    def _on_task_deleted(self, tid, path=None):
+        self._color_cache.pop(tid, None)
+        self._urgent_child.pop(tid, None)
+        old_state = self._node_state.pop(tid, None)
+
+        if old_state:
+            self._invalidate_ancestors(old_state[-1])
+
+    def _invalidate_ancestors(self, parents):
+        """ Drop cache entries of parents and all their ancestors """
+        to_visit = list(parents)
+        while to_visit:
+            tid = to_visit.pop()
+            self._color_cache.pop(tid, None)
+
+            # Since cached tasks always have cached descendants, an uncached
+            # task cannot have cached ancestors: stop climbing here.
+            if tid not in self._urgent_child:
+                continue
+            del self._urgent_child[tid]
+
+            if self.req.has_task(tid):
+                to_visit.extend(self.req.get_task(tid).get_parents())
+
+    def _get_urgent_child(self, node):
+        """ Return the most urgent active descendant with a due date.
+
+        Results are cached per task and built from the children's cached
+        values, so each task is visited only once until it changes.
+        """
+        tid = node.get_id()
+        try:
+            return self._urgent_child[tid]
+        except KeyError:
+            pass
+
+        urgent = None
+        daysleft = None
+        for child_id in node.children:
+            child = self.req.get_task(child_id)
+            self._node_state[child_id] = self._get_node_state(child)
+
+            candidates = [self._get_urgent_child(child)]
+            if child.get_status() == child.STA_ACTIVE:
+                candidates.append(child)
+
+            for candidate in candidates:
+                if candidate is None:
+                    continue
+
+                due_date = candidate.get_due_date()
+                if due_date == Date.no_date():
+                    continue
+
+                daysleft_of_child = due_date.days_left()
+                if daysleft is None or daysleft_of_child < daysleft:
+                    daysleft = daysleft_of_child
+                    urgent = candidate
+
+        self._urgent_child[tid] = urgent
+        return urgent
+
     def _get_color(self, colindex):
         if colindex == 0:
             return self._pref_data['color_low']
@@ -73,6 +202,18 @@ class UrgencyColorPlugin():
         B = B1 + (B2 - B1) * position
         return Gdk.Color.to_string(Gdk.Color(int(R), int(G), int(B)))
 
+    def _get_cached_gradient_color(self, daysleft, dayspan, color1, color2,
+                                   position):
+        """Memoized _get_gradient_color(). Preferences are the same for all
+        entries since the cache is emptied whenever they change."""
+        key = (daysleft, dayspan)
+        try:
+            return self._gradient_cache[key]
+        except KeyError:
+            color = self._get_gradient_color(color1, color2, position)
+            self._gradient_cache[key] = color
+            return color
+
     def get_node_bgcolor(self, node):
         """ This method checks the urgency of a node (task) and returns its
          urgency background color"""
@@ -130,16 +271,16 @@ class UrgencyColorPlugin():
                 # Has to be float so division by it is non-zero
                 steps = float(grad_half_dayspan)
                 step = grad_half_dayspan - (daysleft - reddays)
-                color = self._get_gradient_color(self._get_color(1),
-                                                 self._get_color(2),
-                                                 step / steps)
+                color = self._get_cached_gradient_color(
+                    daysleft, dayspan,
+                    self._get_color(1), self._get_color(2), step / steps)
             elif daysleft <= dayspan:
                 # Gradient CL to CN
                 steps = float(grad_half_dayspan)
                 step = grad_half_dayspan - (daysleft - reddays - grad_half_dayspan)
-                color = self._get_gradient_color(self._get_color(0),
-                                                 self._get_color(1),
-                                                 step / steps)
+                color = self._get_cached_gradient_color(
+                    daysleft, dayspan,
+                    self._get_color(0), self._get_color(1), step / steps)
 
             return color
 
@@ -148,41 +289,31 @@ class UrgencyColorPlugin():
             return None
 
     def bgcolor(self, node, standard_color):
-        color = self.get_node_bgcolor(node)
-
-        def __get_active_child_list(node):
-            """ This function recursively fetches a list
-            of all the children of a task which are active
-            (i.e - the subtasks which are not marked as 'Done' or 'Dismissed'
-            """
-            child_list = []
-            for child_id in node.children:
-                child = node.req.get_task(child_id)
-                child_list += __get_active_child_list(child)
-                if child.get_status() in [child.STA_ACTIVE]:
-                    child_list.append(child_id)
-            return child_list
-
-        child_list = __get_active_child_list(node)
+        tid = node.get_id()
+        today = date.today()
 
-        daysleft = None
-        for child_id in child_list:
-            child = self.req.get_task(child_id)
-            if child.get_due_date() == Date.no_date():
-                continue
+        try:
+            day, color = self._color_cache[tid]
+            if day == today:
+                return color
+        except KeyError:
+            pass
+
+        self._node_state[tid] = self._get_node_state(node)
+        urgent = self._get_urgent_child(node)
 
-            daysleft_of_child = child.get_due_date().days_left()
-            if daysleft is None:
-                daysleft = daysleft_of_child
-                color = self.get_node_bgcolor(child)
-            elif daysleft_of_child < daysleft:
-                daysleft = daysleft_of_child
-                color = self.get_node_bgcolor(child)
+        if urgent is None:
+            color = self.get_node_bgcolor(node)
+        else:
+            color = self.get_node_bgcolor(urgent)
 
+        self._color_cache[tid] = (today, color)
         return color
 
     def deactivate(self, plugin_api):
         """ Plugin is deactivated """
+        self._unsubscribe_task_updates()
+        self._clear_caches()
         self._plugin_api.set_bgcolor_func()
 
 # Preferences dialog
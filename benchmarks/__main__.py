@@ -0,0 +1,258 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2021 - the GTG contributors
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Benchmark runner.
+
+    python3 -m benchmarks run --sizes 1k,10k -o results.json
+    python3 -m benchmarks compare baseline.json results.json
+"""
+
+import argparse
+import fnmatch
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime
+from time import perf_counter
+
+#: Dataset sizes used when none are given
+DEFAULT_SIZES = '1k,10k'
+
+#: Relative slowdown (or memory growth) reported as a regression
+DEFAULT_THRESHOLD = 0.10
+
+#: Differences smaller than this (in seconds) are considered noise
+MIN_TIME_DELTA = 0.001
+
+RESULTS_VERSION = 1
+
+
+def parse_size(value: str) -> int:
+    """Parse sizes like 500, 10k or 1m."""
+
+    value = value.strip().lower()
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(value[-1:], 1)
+
+    if multiplier > 1:
+        value = value[:-1]
+
+    return int(value) * multiplier
+
+
+def measure(bench, ctx, repeat: int) -> dict:
+    """Time a benchmark, then run it once more to get its peak memory."""
+
+    from benchmarks.cases import Skip
+
+    times = []
+
+    try:
+        for _ in range(repeat):
+            arg = bench.setup(ctx) if bench.setup else None
+            gc.collect()
+
+            start = perf_counter()
+            bench.func(ctx, arg)
+            times.append(perf_counter() - start)
+
+        arg = bench.setup(ctx) if bench.setup else None
+        gc.collect()
+
+        tracemalloc.start()
+        extra = bench.func(ctx, arg)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    except Skip as reason:
+        return {'skipped': str(reason)}
+
+    result = {
+        'times': times,
+        'min': min(times),
+        'median': statistics.median(times),
+        'peak_memory': peak,
+    }
+
+    # Benchmarks can report their own metrics
+    if isinstance(extra, dict):
+        result['metrics'] = extra
+
+    return result
+
+
+def run(args) -> int:
+    # Keep benchmarks away from the real configuration and data
+    workdir = tempfile.mkdtemp(prefix='gtg-benchmarks-')
+
+    for var in ('XDG_CONFIG_HOME', 'XDG_DATA_HOME', 'XDG_CACHE_HOME'):
+        os.environ[var] = os.path.join(workdir, var.lower())
+
+    import gi
+    gi.require_version('Gdk', '3.0')
+    gi.require_version('Gtk', '3.0')
+    gi.require_version('GtkSource', '4')
+
+    from GTG.core import info
+    from benchmarks.cases import BENCHMARKS, Context
+
+    selected = [b for b in BENCHMARKS
+                if not args.only
+                or any(fnmatch.fnmatch(b.name, p) for p in args.only)]
+
+    results = {
+        'version': RESULTS_VERSION,
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'gtg': info.VERSION,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+        },
+        'results': {},
+    }
+
+    try:
+        for size in [parse_size(s) for s in args.sizes.split(',')]:
+            print(f'Generating {size} tasks...', file=sys.stderr)
+            ctx = Context(workdir, size, args.seed)
+            size_results = results['results'][str(size)] = {}
+
+            for bench in selected:
+                result = measure(bench, ctx, args.repeat)
+                size_results[bench.name] = result
+
+                if 'skipped' in result:
+                    print(f'  {bench.name:<24} skipped: {result["skipped"]}',
+                          file=sys.stderr)
+                else:
+                    metrics = ''.join(
+                        f' {key}={value}'
+                        for key, value in result.get('metrics', {}).items())
+
+                    print(f'  {bench.name:<24} {result["median"] * 1000:>10.1f} ms'
+                          f' {result["peak_memory"] / 2**20:>10.2f} MiB'
+                          f'{metrics}',
+                          file=sys.stderr)
+
+            del ctx
+            gc.collect()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as stream:
+            json.dump(results, stream, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+
+    return 0
+
+
+def compare(args) -> int:
+    """Compare two result files, return 1 if anything regressed."""
+
+    with open(args.baseline) as stream:
+        baseline = json.load(stream)['results']
+
+    with open(args.current) as stream:
+        current = json.load(stream)['results']
+
+    regressions = 0
+
+    print(f'{"size":>8} {"benchmark":<24} {"baseline":>10} {"current":>10}'
+          f' {"time":>8} {"memory":>8}')
+
+    for size, benchmarks in current.items():
+        for name, result in benchmarks.items():
+            before = baseline.get(size, {}).get(name)
+
+            if not before or 'skipped' in before or 'skipped' in result:
+                continue
+
+            time_ratio = result['median'] / before['median'] - 1
+            mem_ratio = (result['peak_memory'] / before['peak_memory'] - 1
+                         if before['peak_memory'] else 0)
+
+            slower = (time_ratio > args.threshold and
+                      result['median'] - before['median'] > MIN_TIME_DELTA)
+            bigger = mem_ratio > args.threshold
+
+            flag = ''
+            if slower or bigger:
+                regressions += 1
+                flag = '  REGRESSION'
+
+            print(f'{size:>8} {name:<24}'
+                  f' {before["median"] * 1000:>8.1f}ms'
+                  f' {result["median"] * 1000:>8.1f}ms'
+                  f' {time_ratio:>+8.1%} {mem_ratio:>+8.1%}{flag}')
+
+    if regressions:
+        print(f'\n{regressions} regression(s) above {args.threshold:.0%}')
+        return 1
+
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog='python3 -m benchmarks',
+        description='Benchmark the GTG core on generated datasets.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument(
+        '-s', '--sizes', default=DEFAULT_SIZES,
+        help=f'comma separated dataset sizes, e.g. 1k,10k,100k,500k '
+             f'(default: {DEFAULT_SIZES})')
+    run_parser.add_argument(
+        '-r', '--repeat', type=int, default=3,
+        help='timed runs of each benchmark (default: 3)')
+    run_parser.add_argument(
+        '--seed', type=int, default=0,
+        help='seed of the generated datasets (default: 0)')
+    run_parser.add_argument(
+        '-k', '--only', action='append', metavar='PATTERN',
+        help='only run benchmarks matching this glob (can be repeated)')
+    run_parser.add_argument(
+        '-o', '--output', help='write results to this file')
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser(
+        'compare', help='compare results against a baseline')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument(
+        '-t', '--threshold', type=float, default=DEFAULT_THRESHOLD,
+        help=f'relative change reported as a regression '
+             f'(default: {DEFAULT_THRESHOLD})')
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
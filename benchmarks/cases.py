@@ -0,0 +1,363 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2021 - the GTG contributors
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""The benchmarks themselves.
+
+A benchmark is a function taking the Context and whatever its setup
+function returned. Only the benchmark function is timed; setup runs
+again before every repetition, so benchmarks are free to modify what
+they get.
+"""
+
+import gc
+import os
+import shutil
+import tracemalloc
+from types import SimpleNamespace
+from typing import Callable, Optional
+
+from GTG.core.datastore2 import Datastore2
+from GTG.core.tasks2 import Filter, Status
+
+from benchmarks import dataset
+
+
+class Skip(Exception):
+    """Raised by a setup function when a benchmark can't run here."""
+
+
+class Benchmark():
+    """A named benchmark with an optional setup function."""
+
+    def __init__(self, name: str, func: Callable,
+                 setup: Optional[Callable] = None) -> None:
+        self.name = name
+        self.func = func
+        self.setup = setup
+
+
+#: All benchmarks, in the order they run
+BENCHMARKS = []
+
+
+def benchmark(name: str, setup: Optional[Callable] = None) -> Callable:
+    """Register a benchmark."""
+
+    def decorator(func):
+        BENCHMARKS.append(Benchmark(name, func, setup))
+        return func
+
+    return decorator
+
+
+# ------------------------------------------------------------------------------
+# CONTEXT
+# ------------------------------------------------------------------------------
+
+class Context():
+    """The dataset for one size, and the stores loaded from it."""
+
+    def __init__(self, workdir: str, size: int, seed: int) -> None:
+        self.size = size
+        self.seed = seed
+        self.workdir = os.path.join(workdir, str(size))
+        self.data_path = os.path.join(self.workdir, 'gtg_data.xml')
+
+        os.makedirs(self.workdir, exist_ok=True)
+        dataset.write(self.data_path, size, seed)
+
+        self._store = None
+        self._legacy = None
+
+
+    def copy_data(self, name: str) -> str:
+        """Copy the data file, for benchmarks that write to it."""
+
+        path = os.path.join(self.workdir, name, 'gtg_data.xml')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copy(self.data_path, path)
+
+        return path
+
+
+    def load(self) -> Datastore2:
+        """Load a new datastore from the data file."""
+
+        ds = Datastore2()
+        ds.load_file(self.data_path)
+
+        return ds
+
+
+    @property
+    def store(self) -> Datastore2:
+        """A shared datastore, for benchmarks that don't modify it."""
+
+        if self._store is None:
+            self._store = self.load()
+
+        return self._store
+
+
+    @property
+    def legacy_tasks(self) -> list:
+        """The tasks loaded in the old core (through the localfile backend)."""
+
+        if self._legacy is None:
+            datastore, _ = load_localfile(self.copy_data('legacy'))
+            self._legacy = legacy_tasks(datastore)
+
+        return self._legacy
+
+
+def load_localfile(path: str):
+    """Load a data file in the old core, with the localfile backend."""
+
+    try:
+        from GTG.core.datastore import DataStore
+        from GTG.backends.backend_localfile import Backend
+    except ImportError as error:
+        raise Skip(f'old core unavailable: {error}')
+
+    datastore = DataStore()
+    backend = Backend({'pid': 'benchmarks', 'path': path})
+    backend.register_datastore(datastore)
+    backend.initialize()
+    backend.start_get_tasks()
+
+    return datastore, backend
+
+
+def legacy_tasks(datastore) -> list:
+    return [datastore.get_task(tid) for tid in datastore.get_all_tasks()]
+
+
+# ------------------------------------------------------------------------------
+# DATASTORE
+# ------------------------------------------------------------------------------
+
+@benchmark('load_file')
+def load_file(ctx, _):
+    ds = Datastore2()
+    ds.load_file(ctx.data_path)
+
+
+def _setup_save(ctx):
+    return ctx.store, ctx.copy_data('save')
+
+
+@benchmark('save', setup=_setup_save)
+def save(ctx, args):
+    ds, path = args
+    ds.save(path)
+
+
+@benchmark('refresh_task_count')
+def refresh_task_count(ctx, _):
+    ctx.store.refresh_task_count()
+
+
+@benchmark('memory_per_task')
+def memory_per_task(ctx, _):
+    """Load the data file and report the memory it keeps, per task."""
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+
+    ds = ctx.load()
+
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+
+    if not tracing:
+        tracemalloc.stop()
+
+    return {'bytes_per_task': retained // max(ds.tasks.count(), 1)}
+
+
+def _setup_purge(ctx):
+    # purge() saves, keep the dataset intact
+    ds = Datastore2()
+    ds.load_file(ctx.copy_data('purge'))
+
+    return ds
+
+
+@benchmark('purge', setup=_setup_purge)
+def purge(ctx, ds):
+    ds.purge(30)
+
+
+# ------------------------------------------------------------------------------
+# FILTERS
+# ------------------------------------------------------------------------------
+
+def _filter_benchmark(mode: Filter) -> None:
+
+    def setup(ctx):
+        if mode == Filter.STATUS:
+            return Status.DISMISSED
+        elif mode == Filter.TAG:
+            # Usually the most popular tag, see dataset.generate()
+            return ctx.store.tags.data[0]
+
+        return None
+
+    def run(ctx, arg):
+        ctx.store.tasks.filter(mode, arg)
+
+    benchmark(f'filter[{mode.name.lower()}]', setup=setup)(run)
+
+
+for _mode in Filter:
+    _filter_benchmark(_mode)
+
+
+# ------------------------------------------------------------------------------
+# DATES
+# ------------------------------------------------------------------------------
+
+#: Dates parsed per task in the dataset (a million for 10k tasks)
+DATE_PARSES_PER_TASK = 100
+
+#: What users type in the editor, quick add and searches
+TYPED_DATES = ['today', 'tomorrow', 'Friday', 'next week', '15', '0314',
+               '2030/01/02', 'soon', 'someday', '']
+
+
+def _setup_date_parse(ctx):
+    # Dates written in the data file, mixed with typed ones
+    dates = [str(task.date_due) for task in ctx.store.tasks.lookup.values()]
+    strings = dates[:len(TYPED_DATES) * 4] + TYPED_DATES
+    count = ctx.size * DATE_PARSES_PER_TASK
+
+    return (strings * (count // len(strings) + 1))[:count]
+
+
+@benchmark('date_parse', setup=_setup_date_parse)
+def date_parse(ctx, strings):
+    from GTG.core.dates import Date
+
+    for string in strings:
+        Date.parse(string)
+
+
+# ------------------------------------------------------------------------------
+# TAGS
+# ------------------------------------------------------------------------------
+
+@benchmark('tag_reparent', setup=lambda ctx: ctx.load())
+def tag_reparent(ctx, ds):
+    tags = ds.tags
+
+    for tag in list(tags.lookup.values()):
+        parent = tag.parent
+
+        if parent is not None:
+            tags.unparent(tag.id, parent.id)
+            tags.parent(tag.id, parent.id)
+
+
+# ------------------------------------------------------------------------------
+# SEARCH
+# ------------------------------------------------------------------------------
+
+SEARCH_QUERIES = [
+    'lorem',
+    '"ab cd"',
+    '!notag',
+    '!today',
+    '!before 2030-01-01',
+    '!not !someday',
+]
+
+
+def _setup_search(ctx):
+    from GTG.core.search import parse_search_query
+
+    tags = ctx.store.tags.data
+    queries = SEARCH_QUERIES + [f'@{tags[0].name}',
+                                f'@{tags[0].name} !or @{tags[-1].name}']
+
+    return ctx.legacy_tasks, [parse_search_query(q) for q in queries]
+
+
+@benchmark('search', setup=_setup_search)
+def search(ctx, args):
+    from GTG.core.search import search_filter
+
+    tasks, queries = args
+
+    for query in queries:
+        [t for t in tasks if search_filter(t, query)]
+
+
+# ------------------------------------------------------------------------------
+# BACKENDS
+# ------------------------------------------------------------------------------
+
+@benchmark('localfile_roundtrip',
+           setup=lambda ctx: ctx.copy_data('localfile'))
+def localfile_roundtrip(ctx, path):
+    from GTG.core import xml
+
+    datastore, backend = load_localfile(path)
+
+    tasklist = backend.task_tree
+    tasklist.clear()
+
+    for task in legacy_tasks(datastore):
+        tasklist.append(xml.task_to_element(task))
+
+    xml.save_file(path, backend.data_tree)
+
+
+CALDAV_NAMESPACE = 'benchmarks'
+
+
+def _setup_caldav(ctx):
+    try:
+        import vobject
+        from GTG.backends.backend_caldav import Translator
+    except ImportError as error:
+        raise Skip(f'caldav backend unavailable: {error}')
+
+    return vobject, Translator, ctx.legacy_tasks
+
+
+@benchmark('caldav_translation', setup=_setup_caldav)
+def caldav_translation(ctx, args):
+    vobject, Translator, tasks = args
+
+    calendar = SimpleNamespace(name='Benchmarks',
+                               url='https://example.org/benchmarks/')
+
+    for task in tasks:
+        vcal = Translator.fill_vtodo(task, calendar.name, CALDAV_NAMESPACE)
+        raw = vcal.serialize()
+
+        todo = SimpleNamespace(
+            instance=SimpleNamespace(vtodo=vobject.readOne(raw).vtodo),
+            url=f'{calendar.url}{task.get_id()}.ics',
+            parent=calendar)
+
+        Translator.fill_task(todo, task, CALDAV_NAMESPACE)
@@ -0,0 +1,233 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2021 - the GTG contributors
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""Deterministic datasets for the benchmarks.
+
+Unlike Datastore2.fill_with_samples(), the same seed always produces the
+same tasks, tags and ids, and the shape of the data tries to look like a
+real task list: a few popular tags in a shallow hierarchy, projects with
+a handful of subtasks, mostly short notes with a long tail of big ones.
+
+Dates are relative to the day of the run, so that date based code
+(purging, actionable tasks...) sees the same proportions every day.
+"""
+
+import random
+import string
+import uuid
+from datetime import date, datetime, time, timedelta
+
+from lxml import etree as et
+
+from GTG.core.dates import Date
+from GTG.core.datastore2 import Datastore2
+from GTG.core.saved_searches import SavedSearch
+from GTG.core.tags2 import Tag2
+from GTG.core.tasks2 import Task2, Status
+
+
+#: Maximum depth of the tag tree
+TAG_DEPTH = 4
+
+#: Maximum depth of the task tree
+TASK_DEPTH = 5
+
+#: Probability of a task being the subtask of a recent task
+SUBTASK_RATIO = 0.4
+
+#: Number of recent tasks that can be picked as parents
+PARENT_WINDOW = 100
+
+#: Probabilities of a task having 0, 1, 2... tags
+TAGS_PER_TASK = [25, 40, 20, 10, 5]
+
+#: Probability of a task being done or dismissed
+DONE_RATIO = 0.2
+DISMISSED_RATIO = 0.07
+
+
+def _word(rng: random.Random, min_len: int = 3, max_len: int = 12) -> str:
+    length = rng.randint(min_len, max_len)
+    return ''.join(rng.choices(string.ascii_lowercase, k=length))
+
+
+def _new_id(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _generate_tags(ds: Datastore2, rng: random.Random, count: int) -> list:
+    """Generate tags, sorted from the most to the least popular."""
+
+    tags = []
+    depths = {}
+
+    for i in range(count):
+        tag = Tag2(id=_new_id(rng), name=f'{_word(rng)}{i}')
+        tag.actionable = rng.random() > 0.1
+
+        if rng.random() < 0.3:
+            tag.color = f'#{rng.getrandbits(24):06x}'
+
+        candidates = [t for t in tags[-50:] if depths[t.id] < TAG_DEPTH - 1]
+
+        if candidates and rng.random() < 0.4:
+            parent = rng.choice(candidates)
+            ds.tags.add(tag, parent.id)
+            depths[tag.id] = depths[parent.id] + 1
+        else:
+            ds.tags.add(tag)
+            depths[tag.id] = 0
+
+        tags.append(tag)
+
+    return tags
+
+
+def _generate_content(rng: random.Random, tags: list) -> str:
+    """Generate the text of a task: tags first, then a long-tail note."""
+
+    lines = []
+
+    if tags:
+        lines.append(', '.join(f'@{t.name}' for t in tags))
+        lines.append('')
+
+    words = min(int(rng.lognormvariate(3.0, 1.2)), 3000)
+    line = []
+
+    for _ in range(words):
+        line.append(_word(rng, 2, 10))
+
+        if rng.random() < 0.08:
+            lines.append(' '.join(line))
+            line = []
+
+    if line:
+        lines.append(' '.join(line))
+
+    return '\n'.join(lines)
+
+
+def _random_due(rng: random.Random, today: datetime) -> Date:
+    roll = rng.random()
+
+    if roll < 0.01:
+        return Date.now()
+    elif roll < 0.02:
+        return Date.soon()
+    elif roll < 0.03:
+        return Date.someday()
+
+    return Date((today + timedelta(days=rng.randint(-60, 180))).date())
+
+
+def generate(ds: Datastore2, size: int, seed: int = 0) -> None:
+    """Fill an empty datastore with `size` tasks."""
+
+    rng = random.Random(seed)
+    today = datetime.combine(date.today(), time())
+
+    tags = _generate_tags(ds, rng, max(20, size // 100))
+
+    # Zipf-like popularity: a few tags are used everywhere
+    tag_weights = [1 / (i + 1) for i in range(len(tags))]
+
+    for i in range(max(3, size // 1000)):
+        search = SavedSearch(id=_new_id(rng), name=f'search{i}',
+                             query=f'@{rng.choice(tags).name}')
+        ds.saved_searches.add(search)
+
+    recent = []
+    depths = {}
+
+    for _ in range(size):
+        title = ' '.join(_word(rng) for _ in range(rng.randint(2, 12)))
+        task = Task2(id=_new_id(rng), title=title)
+
+        count = rng.choices(range(len(TAGS_PER_TASK)), TAGS_PER_TASK)[0]
+        task_tags = list({t.id: t for t in
+                          rng.choices(tags, tag_weights, k=count)}.values())
+        task.tags = tuple(task_tags)
+        task.content = _generate_content(rng, task_tags)
+
+        added = today - timedelta(days=rng.randint(0, 1000),
+                                  seconds=rng.randint(0, 86_399))
+        task.date_added = added
+        task.date_modified = added + (today - added) * rng.random()
+
+        roll = rng.random()
+        if roll < DONE_RATIO:
+            task.status = Status.DONE
+        elif roll < DONE_RATIO + DISMISSED_RATIO:
+            task.status = Status.DISMISSED
+
+        if rng.random() < 0.4:
+            task.date_due = _random_due(rng, today)
+
+        if rng.random() < 0.2:
+            start = today + timedelta(days=rng.randint(-30, 60))
+            task.date_start = start.date()
+
+        parent = None
+        candidates = [t for t in recent if depths[t.id] < TASK_DEPTH - 1]
+
+        if candidates and rng.random() < SUBTASK_RATIO:
+            parent = rng.choice(candidates)
+
+            # Subtasks of a closed task are closed too
+            if parent.status != Status.ACTIVE:
+                task.status = parent.status
+
+            parent.content += f'\n{{!{task.id}!}}'
+            ds.tasks.add(task, parent.id)
+            depths[task.id] = depths[parent.id] + 1
+        else:
+            ds.tasks.add(task)
+            depths[task.id] = 0
+
+        if task.status != Status.ACTIVE:
+            closed = added + (today - added) * rng.random()
+            task.date_closed = closed.date()
+
+        recent.append(task)
+        if len(recent) > PARENT_WINDOW:
+            recent.pop(0)
+
+    ds.refresh_task_count()
+
+
+def write(path: str, size: int, seed: int = 0) -> None:
+    """Generate a dataset and write it as a GTG data file.
+
+    The file also carries the elements the old core expects (recurring),
+    so both cores and the localfile backend can load it.
+    """
+
+    ds = Datastore2()
+    generate(ds, size, seed)
+
+    tree = ds.generate_xml()
+
+    for element in tree.getroot().iter('task'):
+        recurring = et.SubElement(element, 'recurring')
+        recurring.set('enabled', 'false')
+        et.SubElement(recurring, 'term').text = 'None'
+
+    with open(path, 'wb') as stream:
+        tree.write(stream, xml_declaration=True, pretty_print=True,
+                   encoding='UTF-8')
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""List or restore the backups of a GTG data file.
+
+    ./scripts/restore_backup.py ~/.local/share/gtg/gtg_data.xml
+    ./scripts/restore_backup.py ~/.local/share/gtg/gtg_data.xml 0 -o out.xml
+
+Run it from the root of the repo, with GTG closed.
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from GTG.core import backups  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('data_file', help='the data file, e.g. gtg_data.xml')
+    parser.add_argument('backup', nargs='?',
+                        help='number (0 is the newest) or date of the backup '
+                             'to restore, list backups if not given')
+    parser.add_argument('-o', '--output',
+                        help='write here instead of over the data file')
+    args = parser.parse_args()
+
+    manifests = backups.BackupStore(args.data_file).manifests()
+
+    if args.backup is None:
+        for index, manifest in enumerate(manifests):
+            mtime = datetime.fromtimestamp(os.path.getmtime(manifest))
+            print(f'{index:>3}  {mtime:%Y-%m-%d %H:%M}  '
+                  f'{os.path.basename(manifest)}')
+
+        return 0
+
+    if args.backup.isdigit() and int(args.backup) < len(manifests):
+        manifest = manifests[int(args.backup)]
+    else:
+        dated = [m for m in manifests
+                 if os.path.basename(m).endswith(f'.{args.backup}.manifest')]
+
+        if not dated:
+            print(f'No backup {args.backup!r}', file=sys.stderr)
+            return 1
+
+        manifest = dated[0]
+
+    output = args.output or args.data_file
+
+    try:
+        backups.restore(manifest, output)
+    except (OSError, backups.BackupError) as error:
+        print(f'Could not restore {manifest}: {error}', file=sys.stderr)
+        return 1
+
+    print(f'Restored {os.path.basename(manifest)} to {output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
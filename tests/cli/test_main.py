@@ -0,0 +1,302 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+from contextlib import redirect_stderr, redirect_stdout
+from unittest import TestCase
+
+from lxml import etree
+
+from GTG.cli.main import main
+from GTG.cli.reader import read_tasks
+
+MILK = '0a7e4a2c-4f2a-4d0e-9a52-1f1c2b3d4e01'
+REPORT = '0a7e4a2c-4f2a-4d0e-9a52-1f1c2b3d4e02'
+DRAFT = '0a7e4a2c-4f2a-4d0e-9a52-1f1c2b3d4e03'
+BIKE = '0a7e4a2c-4f2a-4d0e-9a52-1f1c2b3d4e04'
+PLANTS = '0a7e4a2c-4f2a-4d0e-9a52-1f1c2b3d4e05'
+IDEA = '0a7e4a2c-4f2a-4d0e-9a52-1f1c2b3d4e06'
+
+ERRANDS = '5c2e0f57-2b0e-4a8e-8f3f-6d9e2a1b7c01'
+WORK = '5c2e0f57-2b0e-4a8e-8f3f-6d9e2a1b7c02'
+
+# A data file as written by GTG.core.xml.task_to_element()
+DATA = f"""<?xml version='1.0' encoding='UTF-8'?>
+<gtgData appVersion="0.6" xmlVersion="2">
+  <taglist>
+    <tag id="{ERRANDS}" name="errands"/>
+    <tag id="{WORK}" name="work" color="729FCF" nonactionable="False"/>
+  </taglist>
+  <searchlist/>
+  <tasklist>
+    <task id="{MILK}" status="Active" uuid="{MILK}" recurring="False">
+      <tags><tag>{ERRANDS}</tag></tags>
+      <title>Buy milk</title>
+      <dates>
+        <added>2029-12-01T10:00:00</added>
+        <modified>2029-12-01T10:00:00</modified>
+        <due>2030-01-10</due>
+      </dates>
+      <recurring enabled="false">
+        <term>None</term>
+        <updated_date>9999-12-30</updated_date>
+      </recurring>
+      <subtasks/>
+      <content><![CDATA[]]></content>
+    </task>
+    <task id="{REPORT}" status="Active" uuid="{REPORT}" recurring="False">
+      <tags><tag>{WORK}</tag></tags>
+      <title>Write report</title>
+      <dates>
+        <added>2029-12-01T10:00:00</added>
+        <modified>2029-12-01T10:00:00</modified>
+        <due>2030-02-01</due>
+      </dates>
+      <recurring enabled="false">
+        <term>None</term>
+        <updated_date>9999-12-30</updated_date>
+      </recurring>
+      <subtasks><sub>{DRAFT}</sub></subtasks>
+      <content><![CDATA[]]></content>
+    </task>
+    <task id="{DRAFT}" status="Active" uuid="{DRAFT}" recurring="False">
+      <tags><tag>{WORK}</tag></tags>
+      <title>Draft</title>
+      <dates>
+        <added>2029-12-01T10:00:00</added>
+        <modified>2029-12-01T10:00:00</modified>
+      </dates>
+      <recurring enabled="false">
+        <term>None</term>
+        <updated_date>9999-12-30</updated_date>
+      </recurring>
+      <subtasks/>
+      <content><![CDATA[]]></content>
+    </task>
+    <task id="{BIKE}" status="Done" uuid="{BIKE}" recurring="False">
+      <tags/>
+      <title>Buy a bike</title>
+      <dates>
+        <added>2028-12-01T10:00:00</added>
+        <modified>2029-01-01T10:00:00</modified>
+        <done>2029-01-01</done>
+      </dates>
+      <recurring enabled="false">
+        <term>None</term>
+        <updated_date>9999-12-30</updated_date>
+      </recurring>
+      <subtasks/>
+      <content><![CDATA[]]></content>
+    </task>
+    <task id="{PLANTS}" status="Active" uuid="{PLANTS}" recurring="True">
+      <tags><tag>{ERRANDS}</tag></tags>
+      <title>Water the plants</title>
+      <dates>
+        <added>2029-12-01T10:00:00</added>
+        <modified>2029-12-01T10:00:00</modified>
+        <due>2030-01-05</due>
+      </dates>
+      <recurring enabled="true">
+        <term>day</term>
+        <updated_date>2029-12-01</updated_date>
+      </recurring>
+      <subtasks/>
+      <content><![CDATA[Use the <b>green</b> can]]></content>
+    </task>
+    <task id="{IDEA}" status="Dismiss" uuid="{IDEA}" recurring="False">
+      <tags/>
+      <title>Learn the banjo</title>
+      <dates>
+        <added>2028-12-01T10:00:00</added>
+        <modified>2029-01-01T10:00:00</modified>
+        <done>2029-01-01</done>
+      </dates>
+      <recurring enabled="false">
+        <term>None</term>
+        <updated_date>9999-12-30</updated_date>
+      </recurring>
+      <subtasks/>
+      <content><![CDATA[]]></content>
+    </task>
+  </tasklist>
+</gtgData>
+"""
+
+
+class TestMain(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'gtg_data.xml')
+
+        with open(self.path, 'w', encoding='utf-8') as stream:
+            stream.write(DATA)
+
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+
+    def run_cli(self, *args):
+        stdout = io.StringIO()
+
+        with redirect_stdout(stdout), redirect_stderr(io.StringIO()):
+            code = main(['--file', self.path] + list(args))
+
+        return code, stdout.getvalue()
+
+
+    def load(self):
+        return {task.id: task for task in read_tasks(self.path)}
+
+
+    def test_read(self):
+        tasks = self.load()
+
+        self.assertEqual(tasks[DRAFT].parent, REPORT)
+        self.assertEqual(tasks[MILK].tags, ['errands'])
+        self.assertEqual(tasks[MILK].due, '2030-01-10')
+        self.assertEqual(tasks[BIKE].status, 'Done')
+
+
+    def test_count(self):
+        self.assertEqual(self.run_cli('count'), (0, '4\n'))
+        self.assertEqual(self.run_cli('count', '--status', 'all'),
+                         (0, '6\n'))
+        self.assertEqual(self.run_cli('count', '--status', 'dismissed'),
+                         (0, '1\n'))
+        self.assertEqual(self.run_cli('count', 'buy', '--status', 'all'),
+                         (0, '2\n'))
+        self.assertEqual(self.run_cli('count', '@work !before 2030-01-15'),
+                         (0, '0\n'))
+        self.assertEqual(self.run_cli('count', '!not @work'), (0, '2\n'))
+
+        code, _output = self.run_cli('count', '!unknown')
+        self.assertEqual(code, 1)
+
+
+    def test_export(self):
+        code, output = self.run_cli('export', '@work')
+        records = [json.loads(line) for line in output.splitlines()]
+
+        self.assertEqual(code, 0)
+        self.assertEqual({r['title'] for r in records},
+                         {'Write report', 'Draft'})
+
+        code, output = self.run_cli('export', '--format', 'csv', 'milk')
+        rows = list(csv.DictReader(io.StringIO(output)))
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['tags'], 'errands')
+        self.assertEqual(rows[0]['due_date'], '2030-01-10')
+
+
+    def test_tag(self):
+        self.run_cli('tag', '@work', '--add', '@urgent', '--remove', 'work')
+
+        tasks = self.load()
+        self.assertEqual(tasks[REPORT].tags, ['urgent'])
+        self.assertEqual(tasks[MILK].tags, ['errands'])
+
+        # Nothing changes without a match
+        before = os.path.getmtime(self.path)
+        self.run_cli('tag', 'nothing', '--add', 'urgent')
+        self.assertEqual(os.path.getmtime(self.path), before)
+
+
+    def test_close(self):
+        self.run_cli('close', 'report')
+
+        tasks = self.load()
+        self.assertEqual(tasks[REPORT].status, 'Done')
+        self.assertEqual(tasks[DRAFT].status, 'Done')
+        self.assertEqual(tasks[MILK].status, 'Active')
+
+        self.run_cli('close', '--dismiss')
+        tasks = self.load()
+        self.assertEqual(tasks[MILK].status, 'Dismiss')
+
+        # Closed tasks stay as they were
+        self.assertEqual(tasks[REPORT].status, 'Done')
+
+        # GTG has to add the next occurrence of recurring tasks
+        self.assertEqual(tasks[PLANTS].status, 'Active')
+
+
+    def test_due(self):
+        self.run_cli('due', '--shift', '3')
+
+        tasks = self.load()
+        self.assertEqual(tasks[MILK].due, '2030-01-13')
+        self.assertEqual(tasks[REPORT].due, '2030-02-04')
+        self.assertEqual(tasks[DRAFT].due, '')
+
+        self.run_cli('due', 'milk', '--set', 'someday')
+        self.assertEqual(self.load()[MILK].due, 'someday')
+
+        code, _output = self.run_cli('due', '--set', 'not a date')
+        self.assertEqual(code, 1)
+
+
+    def test_round_trip(self):
+        original = etree.parse(self.path)
+
+        self.run_cli('tag', '@errands', '--add', 'home')
+        self.run_cli('due', '--shift', '1')
+
+        tree = etree.parse(self.path)
+        plants = tree.find(f'tasklist/task[@id="{PLANTS}"]')
+
+        self.assertEqual(plants.get('uuid'), PLANTS)
+        self.assertEqual(plants.get('recurring'), 'True')
+        self.assertEqual(plants.find('recurring').get('enabled'), 'true')
+        self.assertEqual(plants.findtext('recurring/term'), 'day')
+        self.assertEqual(plants.findtext('recurring/updated_date'),
+                         '2029-12-01')
+        self.assertEqual(plants.findtext('content'),
+                         'Use the <b>green</b> can')
+        self.assertEqual(plants.findtext('dates/due'), '2030-01-06')
+        self.assertEqual(plants.findtext('dates/added'),
+                         '2029-12-01T10:00:00')
+
+        # New tags are added to the tag list
+        home = tree.find('taglist/tag[@name="home"]')
+        self.assertIn(home.get('id'),
+                      [tag.text for tag in plants.find('tags')])
+
+        # Tags and tasks that didn't change are the same
+        self.assertEqual(tree.find(f'taglist/tag[@id="{WORK}"]').attrib,
+                         original.find(f'taglist/tag[@id="{WORK}"]').attrib)
+
+        for tid in BIKE, IDEA:
+            self.assertEqual(
+                etree.tostring(tree.find(f'tasklist/task[@id="{tid}"]')),
+                etree.tostring(original.find(f'tasklist/task[@id="{tid}"]')))
+
+
+    def test_dry_run(self):
+        code, output = self.run_cli('close', '--dry-run', 'milk')
+
+        self.assertEqual(code, 0)
+        self.assertEqual(output, f'{MILK}\tBuy milk\n')
+        self.assertEqual(self.load()[MILK].status, 'Active')
@@ -0,0 +1,140 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+
+from GTG.core import backups
+from GTG.core.backups import BackupStore
+from GTG.core.datastore2 import Datastore2
+
+
+class TestBackups(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'gtg_data.xml')
+
+        self.ds = Datastore2()
+
+        for i in range(300):
+            task = self.ds.tasks.new(f'Task {i}')
+            task.content = f'Some notes about task {i}\n' * 5
+
+        self.ds.write_file(self.path)
+
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+
+    def chunk_files(self, store):
+        return {name for _, _, files in os.walk(store.chunks_dir)
+                for name in files}
+
+
+    def test_split(self):
+        with open(self.path, 'rb') as stream:
+            content = stream.read()
+
+        chunks = list(backups.split(content))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(b''.join(chunks), content)
+
+        task = list(self.ds.tasks.lookup.values())[150]
+        task.title = 'Changed title'
+        self.ds.write_file(self.path)
+
+        with open(self.path, 'rb') as stream:
+            changed = list(backups.split(stream.read()))
+
+        # Only the chunks around the change are different
+        self.assertLessEqual(len(set(changed) - set(chunks)), 2)
+
+
+    def test_backup(self):
+        store = BackupStore(self.path, keep=3)
+        first = store.backup()
+        chunks = self.chunk_files(store)
+
+        # One numbered and one daily backup, sharing chunks
+        self.assertEqual(len(store.manifests()), 2)
+        self.assertIsNone(store.backup())
+
+        for i in range(5):
+            task = list(self.ds.tasks.lookup.values())[i * 50]
+            task.title = f'Changed {i}'
+            self.ds.write_file(self.path)
+            store.backup()
+
+            self.assertLessEqual(len(self.chunk_files(store) - chunks),
+                                 2 * (i + 1))
+
+        # Old numbered backups go, daily ones stay
+        manifests = store.manifests()
+        self.assertEqual(len(manifests), 4)
+        self.assertNotIn(first, manifests)
+
+        restored = os.path.join(self.tmpdir, 'restored.xml')
+        backups.restore(manifests[0], restored)
+
+        with open(self.path, 'rb') as a, open(restored, 'rb') as b:
+            self.assertEqual(a.read(), b.read())
+
+        # Chunks only used by removed backups are gone too
+        used = {digest for m in manifests
+                for digest, _ in backups.read_manifest(m)}
+        self.assertEqual(self.chunk_files(store), used)
+
+
+    def test_prune(self):
+        store = BackupStore(self.path)
+        store.backup()
+
+        daily = store.manifests()[-1]
+        long_ago = time.time() - 40 * 86_400
+        os.utime(daily, (long_ago, long_ago))
+
+        # A chunk left behind by a crash
+        os.makedirs(os.path.join(store.chunks_dir, '00'), exist_ok=True)
+        open(os.path.join(store.chunks_dir, '00', '00ff'), 'w').close()
+
+        self.assertEqual(store.prune(30), 1)
+        self.assertEqual(len(store.manifests()), 1)
+        self.assertNotIn('00ff', self.chunk_files(store))
+
+        restored = os.path.join(self.tmpdir, 'restored.xml')
+        backups.restore(store.manifests()[0], restored)
+
+
+    def test_fallback(self):
+        self.ds.write_backups(self.path)
+
+        with open(self.path, 'w') as stream:
+            stream.write('<gtgData><tasklist><task')
+
+        ds = Datastore2()
+        ds.find_and_load_file(self.path)
+
+        self.assertEqual(ds.tasks.count(), 300)
+        self.assertTrue(backups.is_manifest(ds.backup_info['name']))
+        self.assertEqual(ds.data_path, self.path)
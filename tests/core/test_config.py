@@ -18,10 +18,11 @@
 
 from unittest import TestCase
 import configparser
+import itertools
 
 from mock import patch, mock_open, Mock
 
-from GTG.core.config import open_config_file, SectionConfig
+from GTG.core.config import open_config_file, CoreConfig, SectionConfig
 
 
 class TestOpenConfigFile(TestCase):
@@ -183,3 +184,93 @@ class TestSectionConfig(TestCase):
         self.assertEqual('1,2', config['list'])
         # Automatically saved value
         save_mock.assert_any_call()
+
+    def test_caches_parsed_values(self):
+        config = self.make_section_config({'option': '42'})
+        section = SectionConfig('Name', config, {'option': 0}, Mock())
+        self.assertEqual(42, section.get('option'))
+
+        # Changes behind our back are not seen, the value was cached
+        config['option'] = '7'
+        self.assertEqual(42, section.get('option'))
+
+    def test_set_invalidates_shared_cache(self):
+        config = self.make_section_config({'option': '42'})
+        cache = {}
+        section = SectionConfig('Name', config, {'option': 0}, Mock(), cache)
+        other = SectionConfig('Name', config, {'option': 0}, Mock(), cache)
+        self.assertEqual(42, other.get('option'))
+
+        section.set('option', 7)
+        self.assertEqual(7, other.get('option'))
+
+    def test_cached_lists_are_copies(self):
+        config = self.make_section_config({'list': 'a,b'})
+        section = SectionConfig('Name', config, {'list': []}, Mock())
+        section.get('list').append('c')
+        self.assertEqual(['a', 'b'], section.get('list'))
+
+
+class TestCoreConfig(TestCase):
+    def setUp(self):
+        patch('GTG.core.config.open_config_file',
+              side_effect=lambda path: configparser.ConfigParser()).start()
+        self.mock_timeout_add = patch(
+            'GTG.core.config.GLib.timeout_add',
+            side_effect=itertools.count(1)).start()
+        self.mock_source_remove = patch(
+            'GTG.core.config.GLib.source_remove').start()
+        self.mock_open = patch(
+            'GTG.core.config.open', mock_open(), create=True).start()
+        self.config = CoreConfig()
+
+    def tearDown(self):
+        patch.stopall()
+
+    def test_coalesces_changes(self):
+        browser = self.config.get_subconfig('browser')
+        for width in range(100, 110):
+            browser.set('bg_width', width)
+
+        # Each change restarts the timeout, nothing is written yet
+        self.assertEqual(self.mock_timeout_add.call_count, 10)
+        self.assertEqual(self.mock_source_remove.call_count, 9)
+        self.mock_open.assert_not_called()
+
+        delay, callback = self.mock_timeout_add.call_args[0]
+        self.assertEqual(delay, CoreConfig.SAVE_DELAY)
+        self.assertFalse(callback())
+
+        self.mock_open.assert_called_once_with(self.config._conf_path, 'w')
+        text = ''.join(c[0][0] for c in
+                       self.mock_open.return_value.write.call_args_list)
+        self.assertIn('bg_width = 109', text)
+
+    def test_flush_writes_pending_changes(self):
+        self.config.get_subconfig('browser').set('bg_width', 42)
+        self.config.get_task_config('task-1').set('position', (1, 2))
+        self.config.flush()
+
+        # The pending timeout is cancelled
+        self.mock_source_remove.assert_called_with(2)
+        self.assertEqual(
+            sorted(c[0] for c in self.mock_open.call_args_list),
+            sorted([(self.config._conf_path, 'w'),
+                    (self.config._task_conf_path, 'w')]))
+
+        # Nothing is left to write
+        self.mock_open.reset_mock()
+        self.mock_source_remove.reset_mock()
+        self.config.flush()
+        self.mock_open.assert_not_called()
+        self.mock_source_remove.assert_not_called()
+
+    @patch('GTG.core.config.log')
+    def test_flush_goes_on_after_write_errors(self, mock_log):
+        self.mock_open.side_effect = [OSError('Disk full'), mock_open()()]
+        self.config.get_subconfig('browser').set('bg_width', 42)
+        self.config.get_backend_config('backend').set('pid', 1)
+        self.config.flush()
+
+        self.assertEqual(self.mock_open.call_count, 2)
+        self.assertTrue(mock_log.error.called)
@@ -0,0 +1,114 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+import datetime
+import io
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from GTG.core.datastore2 import Datastore2
+from GTG.core.dates import Date
+from GTG.core.tasks2 import Status
+
+
+class TestDatastore2(TestCase):
+
+    def assert_writes_tree(self, ds):
+        """Check the streamed file is the same as the pretty tree."""
+
+        expected = io.BytesIO()
+        ds.generate_xml().write(expected, xml_declaration=True,
+                                pretty_print=True, encoding='UTF-8')
+
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'gtg_data.xml')
+
+        ds.write_file(path)
+
+        with open(path, 'rb') as stream:
+            self.assertEqual(stream.read(), expected.getvalue())
+
+
+    def test_write_file(self):
+        ds = Datastore2()
+        self.assert_writes_tree(ds)
+
+        parent_tag = ds.tags.new('home')
+        tag = ds.tags.new('errands', parent_tag.id)
+        tag.color = '#ff0000'
+        ds.saved_searches.new('Errands', '@errands')
+
+        task = ds.tasks.new('Groceries & <stuff>')
+        task.add_tag(tag)
+        task.content = 'Milk\n  ]]> eggs\n\n<b>bread</b>'
+        task.date_due = Date.today()
+
+        child = ds.tasks.new('Subtask', task.id)
+        child.status = Status.DONE
+        ds.tasks.new('Empty task')
+
+        self.assert_writes_tree(ds)
+
+
+
+    def test_purge(self):
+        ds = Datastore2()
+        today = datetime.date.today()
+
+        used = ds.tags.new('used')
+        orphan = ds.tags.new('orphan')
+        colored = ds.tags.new('colored')
+        colored.color = '#ff0000'
+
+        # Consecutive old tasks, that iterating while removing would skip
+        old = [ds.tasks.new(f'Old task {i}') for i in range(4)]
+        recent = ds.tasks.new('Recently closed')
+        active = ds.tasks.new('Active')
+        child = ds.tasks.new('Old subtask', old[0].id)
+
+        for task in old + [child]:
+            task.status = Status.DONE
+            task.date_closed = today - datetime.timedelta(days=40)
+            task.add_tag(orphan)
+
+        recent.status = Status.DONE
+        recent.date_closed = today - datetime.timedelta(days=2)
+        active.add_tag(used)
+
+        ds.purge(30)
+
+        self.assertEqual(set(ds.tasks.lookup), {recent.id, active.id})
+        self.assertEqual(set(ds.tags.lookup), {used.id, colored.id})
+        self.assertEqual(ds.tag_usage.count(used), 1)
+        self.assertEqual(ds.tag_usage.count(orphan), 0)
+
+
+    def test_purge_keeps_new_tags(self):
+        ds = Datastore2()
+        ds.purge(30)
+
+        task = ds.tasks.new('Errands')
+        task.add_tag(ds.tags.new('errands'))
+        ds.purge(30)
+
+        self.assertEqual([t.name for t in ds.tags.lookup.values()],
+                         ['errands'])
+        self.assertIs(ds.tags.find('errands'), task.tags[0])
@@ -0,0 +1,151 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from datetime import date, datetime, time, timedelta
+from random import Random
+from unittest import TestCase, skipIf
+
+from GTG.core import date_columns
+from GTG.core.date_columns import DateColumns
+from GTG.core.dates import Date
+from GTG.core.task import Task
+
+# Fuzzy dates are relative to the real today
+TODAY = date.today()
+
+
+class FakeTask():
+
+    def __init__(self, status, closed):
+        self.status = status
+        self.closed = closed
+
+    def get_status(self):
+        return self.status
+
+    def get_closed_date(self):
+        return self.closed
+
+
+class FakeRequester():
+    """ The parts of the requester and of its tasks tree that are used """
+
+    def __init__(self):
+        self.tasks = {}
+        self.callbacks = {}
+        self.calls = 0
+
+    def register_cllbck(self, event, callback):
+        self.callbacks[event] = callback
+
+    def has_task(self, tid):
+        return tid in self.tasks
+
+    def get_task(self, tid):
+        self.calls += 1
+        return self.tasks[tid]
+
+    def set_task(self, tid, task):
+        event = 'node-modified' if tid in self.tasks else 'node-added'
+        self.tasks[tid] = task
+        self.callbacks[event](tid, None)
+
+    def delete_task(self, tid):
+        del self.tasks[tid]
+        self.callbacks['node-deleted'](tid, None)
+
+
+@skipIf(date_columns.numpy is None, 'NumPy is not installed')
+class TestDateColumns(TestCase):
+
+    def setUp(self):
+        self.random = Random(42)
+        self.req = FakeRequester()
+        self.columns = DateColumns()
+        self.columns.connect(self.req, self.req)
+
+
+    def random_task(self):
+        status = self.random.choice([Task.STA_ACTIVE, Task.STA_DONE,
+                                     Task.STA_DISMISSED])
+        choice = self.random.random()
+
+        if choice < 0.2:
+            closed = Date.no_date()
+        elif choice < 0.3:
+            closed = self.random.choice([Date.soon(), Date.someday()])
+        elif choice < 0.4:
+            day = TODAY - timedelta(self.random.randint(-5, 60))
+            closed = Date(datetime.combine(day, time(12)))
+        else:
+            closed = Date(TODAY - timedelta(self.random.randint(-5, 60)))
+
+        return FakeTask(status, closed)
+
+
+    def check(self):
+        for days in (0, 7, 30):
+            # The checks the application and the export plugin did
+            closed = {tid for tid, t in self.req.tasks.items()
+                      if t.status != Task.STA_ACTIVE
+                      and (Date(TODAY) - t.closed).days > days}
+            done = {tid for tid, t in self.req.tasks.items()
+                    if t.status == Task.STA_DONE and t.closed
+                    and (t.closed.date() - TODAY).days >= -days}
+
+            self.assertEqual(
+                set(self.columns.closed_before(days, today=TODAY)), closed)
+            self.assertEqual(
+                set(self.columns.done_since(days, today=TODAY)), done)
+
+
+    def test_queries(self):
+        for i in range(3000):
+            self.req.set_task(f'task-{i}', self.random_task())
+
+        # Nothing is copied before the first query
+        self.assertEqual(self.req.calls, 0)
+        self.check()
+        self.assertEqual(len(self.columns), 3000)
+
+        for step in range(500):
+            tid = f'task-{self.random.randrange(3500)}'
+
+            if step % 4 == 0 and tid in self.req.tasks:
+                self.req.delete_task(tid)
+            else:
+                self.req.set_task(tid, self.random_task())
+
+        self.assertEqual(len(self.columns), len(self.req.tasks))
+        self.check()
+
+
+    def test_only_changes_are_copied(self):
+        for i in range(10):
+            self.req.set_task(f'task-{i}', self.random_task())
+
+        self.columns.closed_before(30, today=TODAY)
+        self.req.calls = 0
+
+        self.req.set_task('task-3', FakeTask(Task.STA_DONE,
+                                             Date(TODAY - timedelta(40))))
+        self.req.delete_task('task-4')
+
+        self.assertIn('task-3', self.columns.closed_before(30, today=TODAY))
+        self.assertEqual(self.req.calls, 1)
+        self.assertEqual(len(self.columns), 9)
@@ -0,0 +1,63 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+import csv
+import io
+import json
+from unittest import TestCase
+
+from GTG.core.export_formats import FIELDS, WRITERS, write_csv, write_jsonl
+
+
+class TestExportFormats(TestCase):
+
+    def setUp(self):
+        self.records = [
+            dict(dict.fromkeys(FIELDS), id='a', title='Ünïcode',
+                 tags=['@work', '@home']),
+            dict(dict.fromkeys(FIELDS), id='b', parent='a', tags=[]),
+        ]
+
+
+    def test_jsonl(self):
+        stream = io.StringIO()
+        write_jsonl(stream, self.records)
+
+        lines = stream.getvalue().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], self.records)
+        self.assertIn('Ünïcode', lines[0])
+
+
+    def test_csv(self):
+        stream = io.StringIO()
+        write_csv(stream, self.records)
+
+        rows = list(csv.reader(io.StringIO(stream.getvalue())))
+        self.assertEqual(rows[0], list(FIELDS))
+
+        first = dict(zip(FIELDS, rows[1]))
+        self.assertEqual(first['tags'], '@work,@home')
+        self.assertEqual(first['parent'], '')
+        self.assertEqual(dict(zip(FIELDS, rows[2]))['parent'], 'a')
+
+        # The records can still be written in another format
+        self.assertEqual(self.records[0]['tags'], ['@work', '@home'])
+
+
+    def test_writers(self):
+        self.assertEqual(WRITERS, {'jsonl': write_jsonl, 'csv': write_csv})
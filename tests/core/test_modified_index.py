@@ -0,0 +1,86 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from datetime import datetime, timedelta
+from random import Random
+from unittest import TestCase
+
+from GTG.core.dates import Date
+from GTG.core.modified_index import ModifiedIndex
+
+START = datetime(2030, 1, 1, 12, 0)
+
+
+class TestModifiedIndex(TestCase):
+
+    def test_between(self):
+        random = Random(42)
+        index = ModifiedIndex()
+        modified = {}
+
+        def check():
+            for _ in range(20):
+                start = START + timedelta(hours=random.randrange(-50, 2500))
+                end = start + timedelta(hours=random.randrange(500))
+
+                expected = sorted((d, t) for t, d in modified.items()
+                                  if start <= d < end)
+                self.assertEqual(index.between(start, end),
+                                 [t for _, t in expected])
+
+            end = START + timedelta(days=40)
+            self.assertEqual(set(index.between(None, end)),
+                             {t for t, d in modified.items() if d < end})
+
+        for i in range(200):
+            modified[f'task-{i}'] = START + timedelta(
+                hours=random.randrange(2400))
+            index.update(f'task-{i}', modified[f'task-{i}'])
+
+        check()
+
+        # Changes once the index got sorted
+        for step in range(300):
+            tid = f'task-{random.randrange(250)}'
+
+            if step % 3 == 0:
+                modified.pop(tid, None)
+                index.remove(tid)
+            else:
+                modified[tid] = START + timedelta(
+                    hours=random.randrange(2400))
+                index.update(tid, modified[tid])
+
+        self.assertEqual(len(index), len(modified))
+        check()
+
+
+    def test_loaded_dates(self):
+        index = ModifiedIndex()
+
+        # Loaded from the file, then modified
+        index.update('loaded', Date('2030-01-03'))
+        index.update('changed', Date('2030-01-03'))
+        index.update('changed', datetime(2030, 1, 5, 8, 30))
+        index.update('no date', Date.no_date())
+
+        self.assertEqual(index.between(None, datetime(2030, 1, 4)),
+                         ['no date', 'loaded'])
+        self.assertEqual(index.between(datetime(2030, 1, 3),
+                                       datetime(2030, 1, 6)),
+                         ['loaded', 'changed'])
@@ -0,0 +1,79 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+import os
+import pickle
+import shutil
+import tempfile
+from unittest import TestCase
+
+from GTG.core.plugins.api import ConfigurationCache
+
+
+class TestConfigurationCache(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'plugin', 'preferences')
+        self.cache = ConfigurationCache()
+
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+
+    def test_write_behind(self):
+        self.assertIsNone(self.cache.load(self.path))
+
+        preferences = {'goal': 3, 'tags': ['@easy']}
+        self.cache.save(self.path, preferences)
+
+        # Not written yet, but loaded from memory
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(self.cache.load(self.path), preferences)
+
+        # Changes after saving don't reach the cache
+        preferences['tags'].append('@hard')
+        loaded = self.cache.load(self.path)
+        self.assertEqual(loaded['tags'], ['@easy'])
+
+        loaded['goal'] = 5
+        self.assertEqual(self.cache.load(self.path)['goal'], 3)
+
+        # Same format as before
+        self.cache.flush()
+
+        with open(self.path, 'rb') as file:
+            self.assertEqual(pickle.load(file),
+                             {'goal': 3, 'tags': ['@easy']})
+
+
+    def test_read_once(self):
+        os.makedirs(os.path.dirname(self.path))
+
+        with open(self.path, 'wb') as file:
+            pickle.dump({'goal': 7}, file)
+
+        self.assertEqual(self.cache.load(self.path), {'goal': 7})
+
+        os.remove(self.path)
+        self.assertEqual(self.cache.load(self.path), {'goal': 7})
+
+        # Nothing to write, the file stays removed
+        self.cache.flush()
+        self.assertFalse(os.path.exists(self.path))
@@ -0,0 +1,58 @@
+# -----------------------------------------------------------------------------
+# Gettings Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2021 - the GTG contributors
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from GTG.core import profiler
+
+
+class TestProfiler(TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_disabled_records_nothing(self):
+        with profiler.span('ignored'):
+            profiler.instant('ignored too')
+
+        self.assertIsNone(profiler.write(self.path))
+
+    def test_writes_chrome_trace(self):
+        profiler.enable(self.path)
+
+        with profiler.span('Load', path='data.xml'):
+            profiler.instant('Loaded')
+
+        self.assertEqual(profiler.write(), self.path)
+        self.assertFalse(profiler.is_enabled())
+
+        with open(self.path) as stream:
+            events = json.load(stream)['traceEvents']
+
+        by_name = {e['name']: e for e in events}
+        self.assertEqual(by_name['Load']['ph'], 'X')
+        self.assertEqual(by_name['Load']['args'], {'path': 'data.xml'})
+        self.assertEqual(by_name['Loaded']['ph'], 'i')
+        self.assertIn('thread_name', by_name)
+        self.assertLessEqual(by_name['Load']['ts'], by_name['Loaded']['ts'])
@@ -0,0 +1,254 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+import json
+import os
+import socket
+import stat
+import tempfile
+from unittest import TestCase
+
+from GTG.core.datastore import DataStore
+from GTG.core.dates import Date
+from GTG.core.query_service import (INTERNAL_ERROR, INVALID_PARAMS,
+                                    METHOD_NOT_FOUND, PARSE_ERROR,
+                                    QueryClient, QueryError, QueryService)
+from GTG.core.task import Task
+
+
+class TestQueryService(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'gtg', 'query.socket')
+
+        self.datastore = DataStore()
+        self.req = self.datastore.get_requester()
+
+        self.groceries = self.new_task('Buy groceries')
+        self.groceries.add_tag('@errands')
+        self.groceries.set_due_date(Date.parse('2030-01-02'))
+        self.milk = self.new_task('Milk', self.groceries)
+        self.report = self.new_task('Write report')
+        self.report.add_tag('@work')
+        self.old = self.new_task('Old report')
+        self.old.set_status(Task.STA_DONE)
+
+        # Run requests right away, there is no main loop here
+        self.service = QueryService(self.req, self.path,
+                                    dispatch=lambda func: func())
+        self.service.start()
+        self.client = QueryClient(self.path, timeout=5)
+
+
+    def tearDown(self):
+        self.client.close()
+        self.service.stop()
+        self.directory.cleanup()
+
+
+    def new_task(self, title, parent=None):
+        task = self.req.new_task()
+        task.set_title(title)
+        task.set_to_keep()
+
+        if parent is not None:
+            parent.add_child(task.get_id())
+
+        return task
+
+
+    def test_socket(self):
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+        self.assertEqual(
+            stat.S_IMODE(os.stat(os.path.dirname(self.path)).st_mode), 0o700)
+
+        # Only one service per socket
+        with self.assertRaises(OSError):
+            QueryService(self.req, self.path).start()
+
+        self.service.stop()
+        self.assertFalse(os.path.exists(self.path))
+
+        # A socket left behind is replaced
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.path)
+        stale.close()
+        self.service.start()
+
+        with QueryClient(self.path, timeout=5) as client:
+            self.assertEqual(client.call('search')['total'], 3)
+
+
+    def test_search(self):
+        result = self.client.call('search', query='report')
+        self.assertEqual(result['total'], 1)
+        self.assertEqual(result['tasks'][0]['id'], self.report.get_id())
+        self.assertEqual(result['tasks'][0]['tags'], ['@work'])
+
+        result = self.client.call('search', query='report', status='all')
+        self.assertEqual({t['title'] for t in result['tasks']},
+                         {'Write report', 'Old report'})
+
+        result = self.client.call('search', query='@errands')
+        self.assertEqual(result['tasks'][0]['due'], '2030-01-02')
+        self.assertEqual(result['tasks'][0]['children'],
+                         [self.milk.get_id()])
+
+        result = self.client.call('search', status='closed')
+        self.assertEqual([t['status'] for t in result['tasks']], ['Done'])
+
+        # Pages of the sorted tasks
+        titles = [t['title'] for t in
+                  self.client.call('search', sort='title')['tasks']]
+        self.assertEqual(titles, sorted(titles))
+
+        page = self.client.call('search', sort='title', offset=1, limit=1)
+        self.assertEqual(page['total'], 3)
+        self.assertEqual([t['title'] for t in page['tasks']], titles[1:2])
+
+
+    def test_get(self):
+        result = self.client.call('get', ids=[self.milk.get_id(), 'nope'])
+        milk, missing = result['tasks']
+
+        self.assertEqual(milk['title'], 'Milk')
+        self.assertEqual(milk['parent'], self.groceries.get_id())
+        self.assertIsNone(missing)
+
+
+    def test_batch(self):
+        result = self.client.call('batch', operations=[
+            {'op': 'new', 'title': 'Call mom', 'tags': ['@family'],
+             'due': '2030-05-01'},
+            {'op': 'new', 'title': 'Eggs', 'parent': self.groceries.get_id()},
+            {'op': 'update', 'id': self.report.get_id(), 'title': 'Report',
+             'add_tags': ['urgent'], 'remove_tags': ['work']},
+            {'op': 'update', 'id': self.old.get_id(), 'status': 'Active'},
+            {'op': 'delete', 'id': self.groceries.get_id()},
+        ])
+
+        call, eggs = result['created']
+        call = self.req.get_task(call)
+
+        self.assertEqual(call.get_title(), 'Call mom')
+        self.assertEqual(call.get_tags_name(), ['@family'])
+        self.assertEqual(call.get_due_date(), Date.parse('2030-05-01'))
+        self.assertEqual(self.report.get_title(), 'Report')
+        self.assertEqual(self.report.get_tags_name(), ['@urgent'])
+        self.assertEqual(self.old.get_status(), Task.STA_ACTIVE)
+
+        # Deleting the parent took its subtasks with it
+        self.assertFalse(self.req.has_task(eggs))
+        self.assertFalse(self.req.has_task(self.milk.get_id()))
+
+        self.client.call('batch', operations=[
+            {'op': 'update', 'id': call.get_id(), 'status': 'Dismiss'}])
+        self.assertEqual(call.get_status(), Task.STA_DISMISSED)
+
+
+    def test_batch_is_checked_first(self):
+        count = len(self.datastore.get_all_tasks())
+
+        for operation in [{'op': 'update', 'id': 'nope'},
+                          {'op': 'new'},
+                          {'op': 'new', 'title': 'A', 'due': 'someday soon'},
+                          {'op': 'update', 'id': self.report.get_id(),
+                           'status': 'Sleeping'},
+                          {'op': 'update', 'id': self.report.get_id(),
+                           'colour': 'blue'},
+                          {'op': 'rename'}]:
+            with self.assertRaises(QueryError) as error:
+                self.client.call('batch', operations=[
+                    {'op': 'new', 'title': 'Valid'},
+                    {'op': 'update', 'id': self.report.get_id(),
+                     'title': 'Changed'},
+                    operation,
+                ])
+
+            self.assertEqual(error.exception.code, INVALID_PARAMS)
+
+        self.assertEqual(len(self.datastore.get_all_tasks()), count)
+        self.assertEqual(self.report.get_title(), 'Write report')
+
+
+    def test_errors(self):
+        cases = [
+            (METHOD_NOT_FOUND, 'drop', {}),
+            (INVALID_PARAMS, 'search', {'status': 'lost'}),
+            (INVALID_PARAMS, 'search', {'sort': 'mood'}),
+            (INVALID_PARAMS, 'search', {'query': '!not'}),
+            (INVALID_PARAMS, 'search', {'colour': 'blue'}),
+            (INVALID_PARAMS, 'get', {'ids': 'all'}),
+            (INVALID_PARAMS, 'get', {}),
+            (INVALID_PARAMS, 'subscribe', {'ids': []}),
+            (INVALID_PARAMS, 'batch', {'operations': {}}),
+        ]
+
+        for code, method, params in cases:
+            with self.assertRaises(QueryError) as error:
+                self.client.call(method, **params)
+
+            self.assertEqual(error.exception.code, code, (method, params))
+
+        # Still usable after garbage
+        self.client.sock.sendall(b'{"id": \n')
+        self.assertEqual(json.loads(self.client._stream.readline())
+                         ['error']['code'], PARSE_ERROR)
+        self.assertEqual(self.client.call('search')['total'], 3)
+
+
+    def test_internal_error(self):
+        def broken(connection):
+            return len(None)
+
+        self.service.methods['broken'] = broken
+
+        # A TypeError inside a method is a bug, not a bad request
+        with self.assertLogs('GTG.core.query_service', 'ERROR'):
+            with self.assertRaises(QueryError) as error:
+                self.client.call('broken')
+
+        self.assertEqual(error.exception.code, INTERNAL_ERROR)
+
+
+    def test_subscribe(self):
+        self.client.call('subscribe')
+        notifications = self.client.notifications()
+
+        self.report.set_title('Report')
+        self.assertEqual(next(notifications),
+                         {'changed': [self.report.get_id()], 'removed': []})
+
+        # A batch comes as one notification
+        result = self.client.call('batch', operations=[
+            {'op': 'new', 'title': 'New'},
+            {'op': 'delete', 'id': self.groceries.get_id()},
+        ])
+
+        self.assertEqual(next(notifications), {
+            'changed': result['created'],
+            'removed': sorted([self.groceries.get_id(), self.milk.get_id()]),
+        })
+
+        self.client.call('unsubscribe')
+        self.report.set_title('Write report')
+
+        # Only the response comes back
+        self.assertEqual(self.client.call('get', ids=[])['tasks'], [])
+        self.assertFalse(self.client._pending)
@@ -0,0 +1,160 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from datetime import date, timedelta
+from unittest import TestCase
+
+from GTG.core.dates import Date
+from GTG.core.recurrence import (compile_term, Every, Monthly, Once, Weekly,
+                                 Yearly)
+
+
+def next_after(term, day, anchor=None):
+    return compile_term(term).next_after(day, anchor or day)
+
+
+class TestRecurrence(TestCase):
+
+    def test_compile(self):
+        self.assertEqual(compile_term('day'), Every(1))
+        self.assertEqual(compile_term('Other-Day'), Every(2))
+        self.assertEqual(compile_term('week'), Every(7))
+        self.assertEqual(compile_term('month'), Monthly())
+        self.assertEqual(compile_term('year'), Yearly())
+        self.assertEqual(compile_term('Wednesday'), Weekly(2))
+        self.assertEqual(compile_term('15'), Monthly(15))
+        self.assertEqual(compile_term('0314'), Yearly(3, 14))
+        self.assertEqual(compile_term('2030/01/02'), Once(date(2030, 1, 2)))
+
+        # Compiled once per term
+        self.assertIs(compile_term('friday'), compile_term('friday'))
+
+        for term in ('', None, 'soon', '05', 'fortnight', '0230'):
+            with self.assertRaises(ValueError):
+                compile_term(term)
+
+
+    def test_days(self):
+        self.assertEqual(next_after('day', date(2021, 12, 31)),
+                         date(2022, 1, 1))
+        self.assertEqual(next_after('other-day', date(2024, 2, 28)),
+                         date(2024, 3, 1))
+
+        # Counted from the anchor, not from the day asked about
+        self.assertEqual(next_after('other-day', date(2021, 1, 10),
+                                    date(2021, 1, 1)),
+                         date(2021, 1, 11))
+        self.assertEqual(next_after('week', date(2021, 1, 10),
+                                    date(2021, 1, 1)),
+                         date(2021, 1, 15))
+
+
+    def test_weekdays(self):
+        # 2021-06-07 is a Monday
+        monday = date(2021, 6, 7)
+
+        self.assertEqual(next_after('monday', monday), date(2021, 6, 14))
+        self.assertEqual(next_after('tuesday', monday), date(2021, 6, 8))
+        self.assertEqual(next_after('sunday', monday), date(2021, 6, 13))
+
+
+    def test_month_end(self):
+        # Last day of shorter months
+        self.assertEqual(next_after('month', date(2021, 1, 31)),
+                         date(2021, 2, 28))
+        self.assertEqual(next_after('31', date(2021, 3, 31)),
+                         date(2021, 4, 30))
+        self.assertEqual(next_after('31', date(2021, 4, 30)),
+                         date(2021, 5, 31))
+
+        # The anchor keeps the day from drifting
+        self.assertEqual(next_after('month', date(2021, 2, 28),
+                                    date(2021, 1, 31)),
+                         date(2021, 3, 31))
+
+        self.assertEqual(next_after('15', date(2021, 12, 20)),
+                         date(2022, 1, 15))
+        self.assertEqual(next_after('15', date(2021, 12, 3)),
+                         date(2021, 12, 15))
+
+
+    def test_leap_years(self):
+        self.assertEqual(next_after('month', date(2024, 1, 30)),
+                         date(2024, 2, 29))
+        self.assertEqual(next_after('30', date(2023, 1, 30)),
+                         date(2023, 2, 28))
+
+        # Same date next year, whatever the length of the year
+        self.assertEqual(next_after('year', date(2023, 3, 14)),
+                         date(2024, 3, 14))
+        self.assertEqual(next_after('year', date(2024, 2, 29)),
+                         date(2025, 2, 28))
+        self.assertEqual(next_after('year', date(2027, 2, 28),
+                                    date(2024, 2, 29)),
+                         date(2028, 2, 29))
+        self.assertEqual(next_after('0301', date(2024, 2, 29)),
+                         date(2024, 3, 1))
+
+
+    def test_next_occurrence(self):
+        today = date(2023, 6, 15)
+        rule = compile_term('day')
+
+        # Done on time: the occurrence after the due date
+        self.assertEqual(rule.next_occurrence(date(2023, 6, 20), today),
+                         date(2023, 6, 21))
+
+        # Two years overdue: straight to today
+        self.assertEqual(rule.next_occurrence(date(2021, 6, 1), today),
+                         today)
+
+        self.assertEqual(
+            compile_term('week').next_occurrence(date(2021, 6, 2), today),
+            date(2023, 6, 21))
+
+        self.assertEqual(
+            compile_term('month').next_occurrence(date(2023, 1, 31), today),
+            date(2023, 6, 30))
+
+        self.assertIsNone(
+            compile_term('2020/01/01').next_occurrence(date(2019, 5, 1),
+                                                       today))
+
+
+    def test_same_as_parsing(self):
+        """Compare with stepping through Date.parse_from_date()."""
+
+        today = date(2023, 6, 15)
+
+        for term in ('day', 'other-day', 'week', 'monday', 'saturday',
+                     '15', '28', '0704'):
+            for days in range(-120, 30, 11):
+                due = today + timedelta(days=days)
+
+                if term in ('15', '28', '0704'):
+                    # Due dates of these tasks fall on the rule
+                    due = compile_term(term).next_after(due, due)
+
+                expected = Date(due).parse_from_date(term)
+
+                while expected.date() < today or expected.date() <= due:
+                    expected = expected.parse_from_date(term)
+
+                self.assertEqual(
+                    compile_term(term).next_occurrence(due, today),
+                    expected.date(), f'{term} due {due}')
@@ -0,0 +1,182 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from random import Random
+from unittest import TestCase
+
+from GTG.core.datastore import DataStore
+from GTG.core.dates import Date
+from GTG.core.statistics import Statistics
+from GTG.core.task import Task
+
+TODAY = date(2030, 6, 15)
+
+
+class TestStatistics(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'statistics.json')
+        self.random = Random(42)
+        self.datastore = DataStore()
+        self.req = self.datastore.get_requester()
+        self.stats = Statistics(self.path)
+        self.tasks = []
+
+        for i in range(80):
+            task = self.datastore.task_factory(f'task-{i}')
+            task.set_added_date(
+                TODAY - timedelta(days=self.random.randrange(400)))
+
+            for tag in ('@work', '@home'):
+                if self.random.random() < 0.4:
+                    task.tag_added(tag)
+
+            self.datastore.push_task(task)
+            self.stats.task_added(task)
+            self.tasks.append(task)
+
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+
+    def set_status(self, task, status):
+        old_status = task.get_status()
+        closed = TODAY - timedelta(days=self.random.randrange(10))
+
+        task.set_status(status, donedate=Date(closed))
+        self.stats.status_changed(task, old_status, status)
+
+
+    def assert_same(self, stats, other):
+        self.assertEqual(stats.done_per_day(20, TODAY),
+                         other.done_per_day(20, TODAY))
+        self.assertEqual(stats.backlog_by_age(TODAY),
+                         other.backlog_by_age(TODAY))
+        self.assertEqual(stats.lead_times(), other.lead_times())
+        self.assertEqual(stats.lead_time(), other.lead_time())
+
+
+    def test_incremental(self):
+        for _ in range(300):
+            self.set_status(self.random.choice(self.tasks),
+                            self.random.choice((Task.STA_ACTIVE,
+                                                Task.STA_DONE,
+                                                Task.STA_DISMISSED)))
+
+        rebuilt = Statistics()
+        rebuilt.rebuild(self.tasks)
+        self.assert_same(self.stats, rebuilt)
+
+        done = [t for t in self.tasks if t.get_status() == Task.STA_DONE]
+        active = [t for t in self.tasks if t.get_status() == Task.STA_ACTIVE]
+
+        self.assertEqual(sum(n for _, n in self.stats.done_per_day(20, TODAY)),
+                         len(done))
+        self.assertEqual(self.stats.backlog(), len(active))
+
+        # Removed tasks leave the backlog, but not the history
+        for task in active[:5] + done[:5]:
+            self.stats.task_removed(task.get_id())
+
+        self.assertEqual(self.stats.backlog(), len(active) - 5)
+        self.assertEqual(sum(n for _, n in self.stats.done_per_day(20, TODAY)),
+                         len(done))
+
+
+    def test_aggregates(self):
+        work = [t for t in self.tasks if '@work' in t.get_tags_name()]
+
+        for task in self.tasks[:10]:
+            task.set_status(Task.STA_DONE, donedate=Date(TODAY))
+            self.stats.status_changed(task, Task.STA_ACTIVE, Task.STA_DONE)
+
+        self.assertEqual(self.stats.done_on(TODAY), 10)
+        self.assertEqual(self.stats.backlog(), 70)
+        self.assertEqual(sum(n for _, n in self.stats.backlog_by_age(TODAY)),
+                         70)
+
+        for days, count in self.stats.backlog_by_age(TODAY):
+            if days == 7:
+                self.assertEqual(count, len([
+                    t for t in self.tasks[10:]
+                    if (TODAY - t.get_added_date().date()).days <= 7]))
+
+        lead_days = [(TODAY - t.get_added_date().date()).days
+                     for t in work if t in self.tasks[:10]]
+
+        if lead_days:
+            self.assertEqual(self.stats.lead_times()['@work'],
+                             (len(lead_days), sum(lead_days) / len(lead_days)))
+
+
+    def test_streak(self):
+        days = [TODAY, TODAY - timedelta(days=1), TODAY - timedelta(days=2),
+                TODAY - timedelta(days=4)]
+
+        for day, task in zip(days * 2, self.tasks):
+            task.set_status(Task.STA_DONE, donedate=Date(day))
+            self.stats.status_changed(task, Task.STA_ACTIVE, Task.STA_DONE)
+
+        self.assertEqual(self.stats.streak(2, TODAY), 3)
+        self.assertEqual(self.stats.streak(3, TODAY), 0)
+
+        # Today doesn't break the streak before reaching the goal
+        self.assertEqual(self.stats.streak(2, TODAY + timedelta(days=1)), 3)
+
+        # Days counted elsewhere fill the gap, without lowering counts
+        self.stats.add_history(TODAY - timedelta(days=3), 2)
+        self.stats.add_history(TODAY, 1)
+        self.assertEqual(self.stats.streak(2, TODAY), 5)
+
+
+    def test_save(self):
+        for task in self.tasks[:30]:
+            self.set_status(task, Task.STA_DONE)
+
+        self.assertFalse(self.stats.loaded)
+        self.stats.save()
+
+        loaded = Statistics(self.path)
+        self.assertTrue(loaded.loaded)
+
+        self.assertEqual(loaded.done_per_day(20, TODAY),
+                         self.stats.done_per_day(20, TODAY))
+        self.assertEqual(loaded.lead_times(), self.stats.lead_times())
+        self.assertEqual(loaded.lead_time(), self.stats.lead_time())
+
+        # The backlog comes from the tasks, not from the file
+        self.assertEqual(loaded.backlog(), 0)
+
+        # Tasks loaded after a restart are taken back the way they were
+        # counted, even if their closed date moves
+        for task in self.tasks:
+            loaded.task_added(task)
+
+        for task in self.tasks[:10]:
+            task.set_status(Task.STA_DISMISSED, donedate=Date(TODAY))
+            loaded.status_changed(task, Task.STA_DONE, Task.STA_DISMISSED)
+
+        rebuilt = Statistics()
+        rebuilt.rebuild(self.tasks)
+        self.assert_same(loaded, rebuilt)
@@ -20,7 +20,7 @@ from unittest import TestCase
 from uuid import uuid4
 import datetime
 
-from GTG.core.tasks2 import Task2, Status, TaskStore, Filter
+from GTG.core.tasks2 import Task2, Status, TaskStore, Filter, TagUsage
 from GTG.core.tags2 import Tag2, TagStore
 from GTG.core.dates import Date
 
@@ -113,6 +113,28 @@ class TestTask2(TestCase):
         self.assertEqual(task2.date_closed, Date.no_date())
 
 
+    def test_close(self):
+        task = Task2(id=uuid4(), title='A Task')
+        task2 = Task2(id=uuid4(), title='A Child Task')
+        task3 = Task2(id=uuid4(), title='A Dismissed Child Task')
+
+        for child in (task2, task3):
+            task.children.append(child)
+            child.parent = task
+
+        task3.status = Status.DISMISSED
+        task3.date_closed = Date(datetime.date(2020, 1, 1))
+
+        task.close()
+        self.assertEqual(task.status, Status.DONE)
+        self.assertEqual(task.date_closed, Date.today())
+        self.assertEqual(task2.status, Status.DONE)
+
+        # Closed subtasks stay as they were
+        self.assertEqual(task3.status, Status.DISMISSED)
+        self.assertEqual(task3.date_closed, Date(datetime.date(2020, 1, 1)))
+
+
     def test_tags(self):
         task = Task2(id=uuid4(), title='A Task')
         tag = Tag2(id=uuid4(), name='A Tag')
@@ -217,6 +239,29 @@ class TestTask2(TestCase):
         self.assertEqual(task2.date_due, random_date)
 
 
+    def test_compact_dates(self):
+        task = Task2(id=uuid4(), title='A Task')
+        moment = datetime.datetime(2021, 3, 4, 5, 6, 7)
+
+        self.assertEqual(task.date_start, Date.no_date())
+
+        task.date_start = Date('2021-03-04')
+        self.assertIsInstance(task._date_start, int)
+        self.assertEqual(task.date_start, Date('2021-03-04'))
+        self.assertEqual(task.date_start.accuracy, Date('2021-03-04').accuracy)
+
+        task.date_start = moment
+        self.assertEqual(task.date_start, Date(moment))
+
+        task.date_due = Date.someday()
+        self.assertIs(task.date_due, Date.someday())
+        self.assertFalse(task.is_actionable())
+
+        task.date_due = Date.no_date()
+        self.assertIsNone(task._date_due)
+        self.assertEqual(task.date_due, Date.no_date())
+
+
     def test_new_simple(self):
         store = TaskStore()
         task = store.new('My Task')
@@ -274,6 +319,68 @@ class TestTask2(TestCase):
         self.assertEqual(len(child_task.children), 0)
 
 
+    def test_reparenting(self):
+        store = TaskStore()
+
+        root1 = store.new('First Root')
+        root2 = store.new('Second Root')
+        child = store.new('Child', root1.id)
+        other_child = store.new('Other Child', root1.id)
+
+        store.parent(child.id, root2.id)
+
+        self.assertEqual(child.parent, root2)
+        self.assertEqual(root1.children, [other_child])
+        self.assertEqual(root2.children, [child])
+        self.assertEqual(store.data, [root1, root2])
+
+        with self.assertRaises(KeyError):
+            store.unparent(other_child.id, root2.id)
+
+
+    def test_remove_subtree(self):
+        store = TaskStore()
+
+        root = store.new('Root')
+        child = store.new('Child', root.id)
+        grandchild = store.new('Grandchild', child.id)
+        other = store.new('Other')
+
+        store.remove(root.id)
+
+        self.assertEqual(store.count(), 1)
+        self.assertEqual(store.data, [other])
+
+        for task in (root, child, grandchild):
+            self.assertNotIn(task.id, store.lookup)
+
+
+    def test_bulk_signals(self):
+        store = TaskStore()
+        added = []
+        bulk = []
+
+        store.connect('added', lambda _, task: added.append(task))
+        store.connect('bulk-changed', lambda _, ids: bulk.append(ids))
+
+        existing = store.new('Existing')
+        self.assertEqual(added, [existing])
+
+        with store.bulk():
+            root = store.new('Root')
+
+            with store.bulk():
+                child = store.new('Child')
+                store.parent(child.id, root.id)
+
+            self.assertEqual(bulk, [])
+            store.remove(existing.id)
+
+        self.assertEqual(added, [existing])
+        self.assertEqual(bulk, [{root.id, child.id, str(existing.id)}])
+        self.assertFalse(store.in_bulk())
+
+
     def test_xml_load_simple(self):
         task_store = TaskStore()
         tag_store = TagStore()
@@ -311,6 +418,30 @@ class TestTask2(TestCase):
         self.assertEqual(task_store.count(), 1)
 
 
+    def test_xml_load_dismiss(self):
+        task_store = TaskStore()
+        TASK_ID = '1d34df07-4185-43ad-adbd-698a86193411'
+
+        # As written by GTG.core.task
+        parsed_xml = XML(f'''
+        <tasklist>
+            <task id="{TASK_ID}" status="Dismiss" recurring="False">
+                <title>My Task</title>
+                <dates>
+                    <added>2020-10-23T00:00:00</added>
+                    <modified>2021-03-20T14:55:46.219761</modified>
+                    <done>2021-03-20</done>
+                </dates>
+                <subtasks/>
+                <content><![CDATA[]]></content>
+            </task>
+        </tasklist>
+        ''')
+
+        task_store.from_xml(parsed_xml, TagStore())
+        self.assertEqual(task_store.get(TASK_ID).status, Status.DISMISSED)
+
+
     def test_xml_load_tree(self):
         task_store = TaskStore()
 
@@ -461,6 +592,32 @@ class TestTask2(TestCase):
         self.assertEqual(len(xml_root), 4)
 
 
+    def test_xml_closed_date(self):
+        task_store = TaskStore()
+
+        done = task_store.new('Done')
+        dismissed = task_store.new('Dismissed')
+        active = task_store.new('Active')
+
+        done.toggle_active()
+        dismissed.toggle_dismiss()
+
+        # Dismissed tasks keep their closed date, like in the old core
+        xml_root = task_store.to_xml()
+        closed = {element.get('id'): element.findtext('dates/done')
+                  for element in xml_root}
+
+        today = str(Date.today())
+        self.assertEqual(closed[str(done.id)], today)
+        self.assertEqual(closed[str(dismissed.id)], today)
+        self.assertIsNone(closed[str(active.id)])
+
+        new_store = TaskStore()
+        new_store.from_xml(xml_root, None)
+        self.assertEqual(new_store.get(str(dismissed.id)).date_closed,
+                         Date.today())
+
+
     def test_filter_status(self):
         task_store = TaskStore()
 
@@ -642,3 +799,142 @@ class TestTask2(TestCase):
         self.assertEqual(tasks, expected)
 
 
+
+
+    def test_sorted_view(self):
+        task_store = TaskStore()
+
+        task1 = task_store.new('b. My Task')
+        task2 = task_store.new('c. My Other Task')
+        task3 = task_store.new('a. A Child', task2.id)
+
+        view = task_store.sorted_view('title')
+        self.assertIs(task_store.sorted_view('title'), view)
+        self.assertEqual(view.tasks(), [task1, task2])
+        self.assertEqual(list(view), [task1, task2, task3])
+
+        # New tasks and changes go to their place
+        task4 = task_store.new('a. First Task')
+        self.assertEqual(view.tasks(), [task4, task1, task2])
+
+        task1.title = 'd. Last Task'
+        self.assertEqual(view.tasks(), [task4, task2, task1])
+
+        # Windows
+        self.assertEqual(view.tasks(offset=1, limit=1), [task2])
+        self.assertEqual(view.tasks(limit=2, reverse=True), [task1, task2])
+
+        # Tree changes
+        task_store.parent(task4.id, task2.id)
+        self.assertEqual(view.tasks(), [task2, task1])
+        self.assertEqual(view.tasks(task2.id), [task3, task4])
+
+        task_store.remove(task2.id)
+        self.assertEqual(list(view), [task1])
+        self.assertEqual(len(view), 1)
+
+
+    def test_sorted_view_dates(self):
+        task_store = TaskStore()
+
+        task1 = task_store.new('Task 1')
+        task2 = task_store.new('Task 2')
+        task3 = task_store.new('Task 3')
+        task4 = task_store.new('Task 4')
+
+        task1.date_due = Date.someday()
+        task2.date_due = Date(datetime.datetime(2021, 5, 1, 12))
+        task3.date_due = Date('2021-05-01')
+
+        view = task_store.sorted_view('due')
+        self.assertEqual(view.tasks(), [task3, task2, task1, task4])
+
+        with task_store.bulk():
+            task4.date_due = Date('2020-01-01')
+
+        self.assertEqual(view.tasks(), [task4, task3, task2, task1])
+
+
+    def test_sorted_view_status(self):
+        task_store = TaskStore()
+        bulk = []
+        task_store.connect('bulk-changed', lambda _, ids: bulk.append(ids))
+
+        parent = task_store.new('Parent')
+        child1 = task_store.new('Child 1', parent.id)
+        child2 = task_store.new('Child 2', parent.id)
+
+        view = task_store.sorted_view('closed')
+        closed = lambda: view.until((1,), parent.id)
+
+        child2.close()
+        self.assertEqual(closed(), [child2])
+        bulk.clear()
+
+        # Subtasks closed with their parent move too, in one signal
+        parent.close()
+        self.assertCountEqual(closed(), [child1, child2])
+        self.assertEqual(view.until((1,)), [parent])
+        self.assertEqual(bulk, [{parent.id, child1.id}])
+
+        parent.toggle_active()
+        self.assertEqual(view.until((1,)), [])
+        self.assertEqual(closed(), [])
+
+        child1.toggle_dismiss()
+        self.assertEqual(closed(), [child1])
+
+        parent.set_status(Status.ACTIVE)
+        parent.date_closed = Date.no_date()
+        child1.date_closed = Date.no_date()
+        self.assertEqual(closed(), [])
+
+
+    def test_tag_usage(self):
+        task_store = TaskStore()
+        tag_store = TagStore()
+        usage = TagUsage(task_store, tag_store)
+
+        tag1 = tag_store.new('tag1')
+        tag2 = tag_store.new('tag2')
+        task1 = task_store.new('Task 1')
+        task2 = task_store.new('Task 2', task1.id)
+
+        # Every tag is checked the first time
+        self.assertEqual(sorted(t.name for t in usage.take_unused()),
+                         ['tag1', 'tag2'])
+
+        task1.add_tag(tag1)
+        task2.add_tag(tag1)
+        task2.add_tag(tag2)
+
+        self.assertEqual(usage.count(tag1), 2)
+        self.assertEqual(usage.take_unused(), [])
+
+        task2.remove_tag('tag2')
+        self.assertEqual(usage.take_unused(), [tag2])
+
+        # Subtasks are removed too
+        task_store.remove(task1.id)
+        self.assertEqual(usage.count(tag1), 0)
+        self.assertEqual(usage.take_unused(), [tag1])
+        self.assertEqual(usage.take_unused(), [])
+
+
+    def test_tag_usage_new_ids(self):
+        task_store = TaskStore()
+        tag_store = TagStore()
+        usage = TagUsage(task_store, tag_store)
+
+        tag = tag_store.new('tag')
+        task = task_store.new('Task')
+        task.add_tag(tag)
+        usage.take_unused()
+
+        # Like the UI does, to use the id of the old core
+        task.id = 'old-core-id'
+        task_store.refresh_lookup_cache()
+
+        task.tags = ()
+        self.assertEqual(usage.count(tag), 0)
+        self.assertEqual(usage.take_unused(), [tag])
@@ -0,0 +1,171 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from datetime import date, timedelta
+from random import Random
+from unittest import TestCase
+
+from GTG.core.datastore import DataStore
+from GTG.core.dates import Date
+from GTG.core.task import Task
+
+
+def urgent_date(task):
+    """Recursive definition of Task.get_urgent_date()."""
+
+    result = task.get_due_date()
+
+    for sub in task.get_subtasks():
+        if sub.get_status() == Task.STA_ACTIVE:
+            result = min(result, urgent_date(sub))
+
+    return result
+
+
+def due_date_constraint(task):
+    """Recursive definition of Task.get_due_date_constraint()."""
+
+    result = task.get_due_date()
+
+    if result.is_fuzzy():
+        for par_id in task.get_parents():
+            par_date = task.req.get_task(par_id).get_due_date()
+
+            if par_date.is_fuzzy():
+                par_date = due_date_constraint(task.req.get_task(par_id))
+
+            if par_date.is_fuzzy():
+                continue
+
+            if result.is_fuzzy() or par_date < result:
+                result = par_date
+
+    return result
+
+
+class TestTaskDates(TestCase):
+
+    def setUp(self):
+        self.random = Random(42)
+        self.datastore = DataStore()
+        self.req = self.datastore.get_requester()
+        self.tids = []
+
+        for i in range(60):
+            self.push_task(f'task-{i}')
+
+        # A few deep projects
+        for i in range(1, 60):
+            if i % 12:
+                self.req.get_task(f'task-{i - 1}').add_child(f'task-{i}')
+
+        for _ in range(20):
+            self.link()
+
+        for tid in self.tids:
+            self.req.get_task(tid).set_due_date(self.random_date())
+
+
+    def push_task(self, tid):
+        task = self.datastore.task_factory(tid, newtask=True)
+        self.datastore.push_task(task)
+        self.tids.append(tid)
+        return task
+
+
+    def random_date(self):
+        choice = self.random.random()
+
+        if choice < 0.3:
+            return Date.no_date()
+        elif choice < 0.4:
+            return self.random.choice((Date.soon(), Date.someday()))
+
+        return Date(date(2030, 1, 1)
+                    + timedelta(days=self.random.randrange(365)))
+
+
+    def ancestors(self, tid):
+        todo = [tid]
+        found = set()
+
+        while todo:
+            task = self.req.get_task(todo.pop())
+            found.update(task.get_parents())
+            todo.extend(task.get_parents())
+
+        return found
+
+
+    def link(self):
+        parent = self.random.choice(self.tids)
+        child = self.random.choice(self.tids)
+
+        if child != parent and child not in self.ancestors(parent):
+            self.req.get_task(parent).add_child(child)
+
+
+    def assert_consistent(self, message=''):
+        for tid in self.tids:
+            task = self.req.get_task(tid)
+
+            self.assertEqual(task.get_urgent_date(), urgent_date(task),
+                             f'urgent date of {tid} {message}')
+            self.assertEqual(task.get_due_date_constraint(),
+                             due_date_constraint(task),
+                             f'due date constraint of {tid} {message}')
+
+
+    def test_consistent(self):
+        self.assert_consistent()
+
+        for step in range(300):
+            tid = self.random.choice(self.tids)
+            task = self.req.get_task(tid)
+            action = self.random.randrange(7)
+
+            if action == 0:
+                task.set_due_date(self.random_date())
+            elif action == 1:
+                task.set_status(self.random.choice(
+                    (Task.STA_ACTIVE, Task.STA_DONE, Task.STA_DISMISSED)))
+            elif action == 2:
+                self.link()
+            elif action == 3 and task.has_parent():
+                task.remove_parent(self.random.choice(task.get_parents()))
+            elif action == 4:
+                parent = self.random.choice(self.tids)
+
+                if parent != tid and tid not in self.ancestors(parent):
+                    task.set_parent(parent)
+            elif action == 5 and len(self.tids) > 20:
+                self.req.delete_task(tid, recursive=False)
+                self.tids.remove(tid)
+            else:
+                self.push_task(f'new-{step}')
+
+            self.assert_consistent(f'after step {step}')
+
+
+    def test_cached(self):
+        task = self.req.get_task(self.tids[0])
+        urgent = task.get_urgent_date()
+
+        # Not computed again until something changes
+        task._compute_urgent_date = None
+        self.assertEqual(task.get_urgent_date(), urgent)
@@ -18,7 +18,8 @@
 
 import re
 from unittest import TestCase
-from GTG.gtk.editor.taskview import TAG_REGEX
+from mock import Mock, patch
+from GTG.gtk.editor.taskview import TAG_REGEX, TaskView
 
 
 class TestTaskView(TestCase):
@@ -41,3 +42,155 @@ class TestTaskView(TestCase):
         matches = re.findall(TAG_REGEX, content)
 
         self.assertEqual([], matches)
+
+
+class TestTaskViewProcessing(TestCase):
+    """Only the lines that changed are processed again."""
+
+    def setUp(self):
+        # There's no main loop, process() is called by hand
+        patch('GTG.gtk.editor.taskview.GLib.timeout_add').start()
+        patch('GTG.gtk.editor.taskview.GLib.source_remove').start()
+        self.timeout_add_seconds = patch(
+            'GTG.gtk.editor.taskview.GLib.timeout_add_seconds').start()
+
+        self.tasks = {}
+        self.req = Mock()
+        self.req.get_task.side_effect = self.tasks.get
+        self.req.has_task.side_effect = lambda tid: tid in self.tasks
+
+        self.view = TaskView(self.req, None)
+        self.view.tid = 'parent'
+        self.view.new_subtask_cb = self.new_subtask
+
+        for name in ('add_tasktag_cb', 'remove_tasktag_cb', 'refresh_cb',
+                     'save_cb', 'delete_subtask_cb', 'rename_subtask_cb'):
+            setattr(self.view, name, Mock())
+
+        self.buffer = self.view.buffer
+
+
+    def tearDown(self):
+        patch.stopall()
+
+
+    def new_subtask(self, title):
+        tid = f'sub-{len(self.tasks)}'
+        task = Mock(status='Active', STA_ACTIVE='Active')
+        task.get_status.return_value = 'Active'
+        task.get_parents.return_value = ['parent']
+        task.get_title.return_value = title
+        self.tasks[tid] = task
+        return tid
+
+
+    def load(self, lines):
+        self.buffer.set_text('Title\n' + '\n'.join(lines))
+        self.view.process()
+
+        for name in ('add_tasktag_cb', 'remove_tasktag_cb', 'save_cb',
+                     'delete_subtask_cb', 'rename_subtask_cb'):
+            getattr(self.view, name).reset_mock()
+
+
+    def append(self, line, text):
+        end = self.buffer.get_iter_at_line(line)
+        end.forward_to_line_end()
+        self.buffer.insert(end, text)
+
+
+    def test_only_dirty_lines(self):
+        self.load([f'Line {i} @tag{i % 3}' for i in range(200)])
+        self.assertEqual(self.view.task_tags, {'tag0', 'tag1', 'tag2'})
+
+        with patch.object(self.view, 'detect_tag',
+                          wraps=self.view.detect_tag) as detect_tag:
+            self.append(101, ' @new')
+            self.view.process()
+
+        self.assertEqual([c[0][0] for c in detect_tag.call_args_list],
+                         ['Line 100 @tag1 @new'])
+
+        self.view.add_tasktag_cb.assert_called_once_with('new')
+        self.view.remove_tasktag_cb.assert_not_called()
+        self.assertEqual(self.view.task_tags,
+                         {'tag0', 'tag1', 'tag2', 'new'})
+        self.assertEqual(sum(1 for key in self.view.tags_applied.values()
+                             if key[0] == 'tag'), 201)
+
+
+    def test_removed_tags(self):
+        self.load(['@a here', '@a there', '@b'])
+
+        # Delete the last line
+        start = self.buffer.get_iter_at_line(2)
+        start.forward_to_line_end()
+        self.buffer.delete(start, self.buffer.get_end_iter())
+        self.view.process()
+
+        self.view.remove_tasktag_cb.assert_called_once_with('b')
+
+        # @a is still used on the next line
+        start = self.buffer.get_iter_at_line(1)
+        end = start.copy()
+        end.forward_chars(2)
+        self.buffer.delete(start, end)
+        self.view.process()
+
+        self.view.remove_tasktag_cb.assert_called_once_with('b')
+        self.assertEqual(self.view.task_tags, {'a'})
+
+
+    def test_subtasks(self):
+        self.load(['Some text', '- Buy milk', 'More text'])
+        self.assertEqual(self.view.subtasks['tags'], ['sub-0'])
+
+        # The subtask line isn't processed again
+        self.append(3, ' @later')
+        self.view.process()
+        self.view.rename_subtask_cb.assert_not_called()
+        self.assertEqual(self.view.subtasks['tags'], ['sub-0'])
+
+        # Deleting its line deletes the subtask
+        self.buffer.delete(self.buffer.get_iter_at_line(2),
+                           self.buffer.get_iter_at_line(3))
+        self.view.process()
+        self.view.delete_subtask_cb.assert_called_once_with('sub-0')
+        self.assertEqual(self.view.subtasks['tags'], [])
+
+
+    def test_subtask_status(self):
+        self.load(['- Buy milk'])
+
+        self.view.on_status_changed(self.req, 'other', 'Active', 'Done')
+        self.assertFalse(self.view.dirty)
+
+        self.tasks['sub-0'].get_status.return_value = 'Done'
+        self.view.on_status_changed(self.req, 'sub-0', 'Active', 'Done')
+        self.assertTrue(self.view.dirty)
+        self.view.process()
+
+        links = [key for key in self.view.tags_applied.values()
+                 if key[0] == 'subtask-link']
+        self.assertEqual(links, [('subtask-link', 'sub-0', 'Done')])
+        self.view.rename_subtask_cb.assert_called_once()
+
+
+    def test_save(self):
+        self.load(['Some text'])
+
+        # Changes to the text alone are saved later
+        self.append(1, ', and more')
+        self.view.process()
+        self.view.save_cb.assert_not_called()
+
+        delay, callback = self.timeout_add_seconds.call_args[0]
+        self.assertEqual(delay, TaskView.SAVE_DELAY)
+        self.assertFalse(callback())
+        self.view.save_cb.assert_called_once_with()
+
+        # Changes to the title are saved right away
+        self.view.save_cb.reset_mock()
+        self.append(0, ' changed')
+        self.view.process()
+        self.view.save_cb.assert_called_once_with()
@@ -16,9 +16,49 @@
 # this program.  If not, see <http://www.gnu.org/licenses/>.
 # -----------------------------------------------------------------------------
 
+import os
+import shutil
+import tempfile
 from unittest import TestCase
+from unittest.mock import patch
+
+from lxml import etree as et
 
 from GTG.core import versioning
+from GTG.core.datastore2 import Datastore2
+
+
+OLD_FILE = '''<?xml version="1.0" ?>
+<project>
+  <task id="1@1" status="Active" tags="@home,@errands"
+        uuid="a3c0e5fa-8d3e-4b8f-9a57-3b0f1b6e4d01">
+    <title>Groceries</title>
+    <duedate>2021-05-01</duedate>
+    <added>2021-03-01</added>
+    <subtask>2@1</subtask>
+    <subtask>3@1</subtask>
+    <content>&lt;content&gt;&lt;tag&gt;@home&lt;/tag&gt; list&lt;/content&gt;</content>
+  </task>
+  <task id="2@1" status="Done" tags="@errands">
+    <title>Milk</title>
+    <donedate>2021-04-02</donedate>
+  </task>
+  <task id="3@1" status="Active" tags="">
+    <title>Bread</title>
+    <startdate>someday</startdate>
+  </task>
+  <task id="4@1" status="Dismiss" tags="@old">
+    <title>Old thing</title>
+  </task>
+</project>
+'''
+
+OLD_TAGS = '''<?xml version="1.0" ?>
+<tagstore>
+  <tag name="@home" color="#ff0000"/>
+  <tag name="urgent" query="@home !today"/>
+</tagstore>
+'''
 
 
 class TestVersioning(TestCase):
@@ -65,3 +105,92 @@ To spice things up
    {! 28528f83-0e7f-4774-b887-499bfa3ef2a7 !}'''
 
         self.assertEqual(target, versioning.convert_content(source))
+
+
+class TestConvertFile(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.old_path = os.path.join(self.tmpdir, 'gtg_tasks.xml')
+
+        with open(self.old_path, 'w') as stream:
+            stream.write(OLD_FILE)
+
+        with open(os.path.join(self.tmpdir, 'tags.xml'), 'w') as stream:
+            stream.write(OLD_TAGS)
+
+        patcher = patch.object(versioning, 'DATA_DIR', self.tmpdir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+
+    def summary(self, path):
+        """Get what matters of a converted file, without random ids."""
+
+        ds = Datastore2()
+        ds.load_file(path)
+
+        return {
+            task.title: (task.status.value,
+                         sorted(tag.name for tag in task.tags),
+                         task.parent.title if task.parent else None,
+                         task.content)
+            for task in ds.tasks.lookup.values()
+        }, sorted(search.name for search in ds.saved_searches.lookup.values())
+
+
+    def test_same_as_convert(self):
+        expected_path = os.path.join(self.tmpdir, 'expected.xml')
+        et.ElementTree(versioning.convert(self.old_path).getroot()).write(
+            expected_path, pretty_print=True, xml_declaration=True,
+            encoding='UTF-8')
+
+        expected = self.summary(expected_path)
+        tasks, searches = expected
+
+        self.assertEqual(len(tasks), 4)
+        self.assertEqual(tasks['Milk'][2], 'Groceries')
+        self.assertEqual(tasks['Bread'][2], 'Groceries')
+        self.assertEqual(tasks['Groceries'][1], ['errands', 'home'])
+        self.assertEqual(searches, ['urgent'])
+
+        new_path = os.path.join(self.tmpdir, 'gtg_data.xml')
+        calls = []
+
+        count = versioning.convert_file(
+            self.old_path, new_path,
+            progress=lambda done, total: calls.append((done, total)))
+
+        self.assertEqual(count, 4)
+        self.assertEqual(calls, [(4, 4)])
+        self.assertEqual(self.summary(new_path), expected)
+
+        # Written like a pretty printed tree
+        with open(new_path, 'rb') as stream:
+            content = stream.read()
+
+        tree = et.fromstring(content, et.XMLParser(strip_cdata=False))
+        self.assertEqual(et.tostring(tree, pretty_print=True),
+                         content.split(b'\n', 1)[1])
+
+
+    def test_parallel(self):
+        serial_path = os.path.join(self.tmpdir, 'serial.xml')
+        parallel_path = os.path.join(self.tmpdir, 'parallel.xml')
+
+        versioning.convert_file(self.old_path, serial_path)
+
+        with patch.object(versioning, 'PARALLEL_THRESHOLD', 0), \
+             patch.object(versioning, 'CHUNK_SIZE', 1):
+            calls = []
+            versioning.convert_file(
+                self.old_path, parallel_path, processes=2,
+                progress=lambda done, total: calls.append(done))
+
+        self.assertEqual(calls, [1, 2, 3, 4])
+        self.assertEqual(self.summary(parallel_path),
+                         self.summary(serial_path))
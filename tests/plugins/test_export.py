@@ -0,0 +1,234 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) The GTG Team
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+import csv
+import io
+import json
+from datetime import date, timedelta
+from unittest import TestCase
+
+from GTG.core.dates import Date
+from GTG.plugins.export.streaming import (FIELDS, CsvExporter,
+                                          JsonLinesExporter, task_record)
+from GTG.plugins.export.task_str import TaskStr, TaskStrBuilder, walk_tasks
+
+
+class FakeTag():
+
+    def __init__(self, name):
+        self.name = name
+
+    def get_id(self):
+        return self.name
+
+
+class FakeTask():
+
+    STA_ACTIVE = 'Active'
+    STA_DONE = 'Done'
+
+    def __init__(self, tid, status='Active', due=None, closed=None,
+                 tags=()):
+        self.tid = tid
+        self.status = status
+        self.due = Date(due) if due else Date.no_date()
+        self.closed = Date(closed) if closed else Date.no_date()
+        self.tags = [FakeTag(name) for name in tags]
+
+    def get_id(self):
+        return self.tid
+
+    def get_title(self):
+        return f'Task {self.tid}'
+
+    def get_text(self):
+        return f'Text of {self.tid}'
+
+    def get_status(self):
+        return self.status
+
+    def get_modified(self):
+        return Date('2030-01-01')
+
+    def get_added_date(self):
+        return Date('2029-12-01')
+
+    def get_due_date(self):
+        return self.due
+
+    def get_closed_date(self):
+        return self.closed
+
+    def get_start_date(self):
+        return Date.no_date()
+
+    def get_days_left(self):
+        return self.due.days_left()
+
+    def get_tags(self):
+        return self.tags
+
+
+class FakeTree():
+    """ The parts of a liblarch tree used by walk_tasks() """
+
+    def __init__(self, tasks, children):
+        self.tasks = {task.get_id(): task for task in tasks}
+        self.children = children
+
+    def get_node(self, node_id):
+        return self.tasks.get(node_id)
+
+    def node_all_children(self, node_id=None):
+        return self.children.get(node_id, [])
+
+    def get_all_nodes(self):
+        return list(self.tasks)
+
+
+def walked(tree, days=None):
+    return [(task.get_id(), parent_id)
+            for task, parent_id in walk_tasks(tree, days)]
+
+
+class TestWalkTasks(TestCase):
+
+    def test_order(self):
+        tree = FakeTree([FakeTask(tid) for tid in 'abcde'], {
+            None: ['a', 'd'],
+            'a': ['b', 'e'],
+            'b': ['c'],
+        })
+
+        # Parents first, subtasks in order, depth first
+        self.assertEqual(walked(tree), [('a', None), ('b', 'a'), ('c', 'b'),
+                                        ('e', 'a'), ('d', None)])
+
+
+    def test_deep_tree(self):
+        count = 5000
+        tree = FakeTree([FakeTask(i) for i in range(count)],
+                        {i: [i + 1] for i in range(count - 1)})
+        tree.children[None] = [0]
+
+        # No recursion limit
+        self.assertEqual(len(walked(tree)), count)
+
+
+    def test_timespan(self):
+        today = date.today()
+        last_week = today - timedelta(days=3)
+        long_ago = today - timedelta(days=30)
+
+        tree = FakeTree([
+            FakeTask('done', 'Done', closed=last_week),
+            FakeTask('done-child', 'Done', closed=last_week),
+            FakeTask('old', 'Done', closed=long_ago),
+            FakeTask('old-child', 'Done', closed=last_week),
+            FakeTask('open'),
+            FakeTask('open-child', 'Done', closed=last_week),
+        ], {
+            None: ['done', 'old', 'open'],
+            'done': ['done-child'],
+            'old': ['old-child'],
+            'open': ['open-child'],
+        })
+
+        # Subtasks of tasks out of the timespan are skipped with them
+        self.assertEqual(walked(tree, -7), [('done', None),
+                                            ('done-child', 'done')])
+        self.assertEqual(len(walked(tree)), 6)
+
+        # Ids in the timespan from the requester are trusted
+        ids = {'done', 'old-child', 'open', 'open-child'}
+        self.assertEqual([(task.get_id(), parent_id) for task, parent_id
+                          in walk_tasks(tree, -7, timespan_ids=ids)],
+                         [('done', None), ('open', None),
+                          ('open-child', 'open')])
+
+
+    def test_several_parents(self):
+        tree = FakeTree([FakeTask(tid) for tid in 'abcd'], {
+            None: ['a', 'b'],
+            'a': ['c'],
+            'b': ['c'],
+            'c': ['d'],
+        })
+
+        self.assertEqual(walked(tree), [('a', None), ('c', 'a'), ('d', 'c'),
+                                        ('b', None), ('c', 'b'), ('d', 'c')])
+
+        builder = TaskStrBuilder()
+
+        for task, parent_id in walk_tasks(tree):
+            builder.add(task, parent_id)
+
+        # Each parent gets its own copy of the subtree
+        a, b = builder.roots
+        self.assertEqual([t.id for t in a.subtasks], ['c'])
+        self.assertEqual([t.id for t in b.subtasks], ['c'])
+        self.assertIsNot(a.subtasks[0], b.subtasks[0])
+        self.assertEqual([t.id for t in a.subtasks[0].subtasks], ['d'])
+        self.assertEqual([t.id for t in b.subtasks[0].subtasks], ['d'])
+
+
+class TestStreamExporters(TestCase):
+
+    def setUp(self):
+        parent = FakeTask('p', due=date(2030, 1, 2), tags=['@work', '@home'])
+        child = FakeTask('c', 'Done', closed=date(2030, 1, 1))
+
+        self.records = [task_record(TaskStr(parent, []), None),
+                        task_record(TaskStr(child, []), 'p')]
+
+
+    def test_record(self):
+        record = self.records[1]
+
+        self.assertEqual(tuple(record), FIELDS)
+        self.assertEqual(record['id'], 'c')
+        self.assertEqual(record['parent'], 'p')
+        self.assertEqual(record['status'], 'Done')
+        self.assertEqual(record['closed_date'], '2030-01-01')
+        self.assertEqual(self.records[0]['tags'], ['@work', '@home'])
+
+
+    def test_json_lines(self):
+        stream = io.StringIO()
+        JsonLinesExporter().write_records(stream, iter(self.records))
+
+        lines = stream.getvalue().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], self.records)
+
+
+    def test_csv(self):
+        stream = io.StringIO()
+        CsvExporter().write_records(stream, iter(self.records))
+
+        rows = list(csv.reader(io.StringIO(stream.getvalue())))
+        self.assertEqual(rows[0], list(FIELDS))
+        self.assertEqual(len(rows), 3)
+
+        parent = dict(zip(FIELDS, rows[1]))
+        self.assertEqual(parent['parent'], '')
+        self.assertEqual(parent['tags'], '@work,@home')
+        self.assertEqual(parent['due_date'], '2030-01-02')
+
+        child = dict(zip(FIELDS, rows[2]))
+        self.assertEqual(child['parent'], 'p')
+        self.assertEqual(child['text'], 'Text of c')
@@ -20,6 +20,7 @@ from datetime import date, timedelta
 from unittest import TestCase
 
 from gettext import gettext as _
+from GTG.core import dates
 from GTG.core.dates import Date
 
 
@@ -127,6 +128,34 @@ class TestDates(TestCase):
 
             self.assertEqual(Date.parse(str(i)), aday)
 
+    def test_parse_cache(self):
+        """ Cached results are the same as parsing again """
+        today = date.today()
+        for string in ['today', 'Friday', 'next month', '15', '0101',
+                       '2030/01/02', '19850329', 'soon', 'someday', '',
+                       '1985-03-29', '1985-03-29T10:30:00']:
+            expected = Date._parse(string.lower(), today)
+            self.assertEqual(Date.parse(string), expected)
+            self.assertEqual(Date.parse(string), expected)
+
+        for string in ['1985-13-29', '1985-03-', 'soonish']:
+            with self.assertRaises(ValueError):
+                Date.parse(string)
+
+        self.assertEqual(Date.parse('now'), Date.now())
+
+    def test_parse_cache_day(self):
+        """ Parsing the next day doesn't reuse results """
+        today = date.today()
+        tomorrow = today + timedelta(1)
+        locale_key = dates._locale_key()
+
+        self.assertEqual(dates._parse_cached('tomorrow', today, locale_key),
+                         tomorrow)
+        self.assertEqual(
+            dates._parse_cached('tomorrow', tomorrow, locale_key),
+            tomorrow + timedelta(1))
+
     def test_parse_only_month_day_for_recurrency(self):
         #   ["today", "day of month", newtask, "expected"]
         test_set = [